@@ -0,0 +1,276 @@
+"""Throughput benchmarks for the CacheSimulator hot paths
+
+Every case runs in a fresh worker process, so its peak RSS is its own, and
+reports accesses per second (best of --repeat runs), peak RSS, RSS growth
+over the process baseline and the net allocated blocks per access.
+
+Record a baseline, then check later runs against it:
+
+    python benchmarks/bench_simulator.py --save benchmarks/baseline.json
+    python benchmarks/bench_simulator.py --baseline benchmarks/baseline.json
+
+The check exits with status 1 when any case's throughput drops more than
+--threshold below its baseline. Baselines are machine-specific.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cachesim.cache_simulator import CacheSimulator
+from cachesim.replacement_policies import REPLACEMENT_POLICIES
+from cachesim.trace_loader import OP_READ, OP_WRITE
+
+PATHS = ('access_memory', 'run_trace', 'run_trace_hits')
+ASSOCIATIVITIES = ('Direct', 'Set-Associative', 'Fully-Associative')
+DEFAULT_SIZES = (10 ** 4, 10 ** 5, 10 ** 6)
+# Cases that go through Python per access are timed on at most this many accesses
+MAX_SCALAR_ACCESSES = 1 << 20
+# Short cases are repeated until they have run for at least this long
+MIN_SECONDS = 0.2
+# Accesses measured for the allocation count
+ALLOCATION_SAMPLE = 10 ** 4
+
+def synthetic_trace(count, seed=0, footprint=1 << 22, block_size=64, write_ratio=0.0):
+    """Seeded trace mixing a hot region, a sequential stream and uniform accesses
+
+    60% of the accesses fall in a hot region of 256 blocks, 30% stream
+    through the footprint block by block and 10% are uniform over it.
+
+    Returns:
+        tuple: (int64 addresses, uint8 ops or None when write_ratio is 0)
+    """
+    rng = np.random.default_rng(seed)
+    kind = rng.random(count)
+    hot = rng.integers(0, 256 * block_size, count)
+    stream = (np.arange(count, dtype=np.int64) * block_size) % footprint
+    uniform = rng.integers(0, footprint, count)
+    addresses = np.where(kind < 0.6, hot, np.where(kind < 0.9, stream, uniform))
+    if write_ratio <= 0:
+        return addresses, None
+    ops = np.where(rng.random(count) < write_ratio, OP_WRITE, OP_READ).astype(np.uint8)
+    return addresses, ops
+
+def make_cases(paths, associativities, policies, sizes):
+    """Every (path, associativity, policy, size); Direct caches run once, with no policy"""
+    cases = []
+    for path in paths:
+        for associativity in associativities:
+            for policy in (('-',) if associativity == 'Direct' else policies):
+                for size in sizes:
+                    cases.append((path, associativity, policy, size))
+    return cases
+
+def case_name(path, associativity, policy, size):
+    return f'{path}/{associativity}/{policy}/{size}'
+
+def _peak_rss():
+    """Peak resident set size of this process in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _make_simulator(associativity, policy, options):
+    simulator = CacheSimulator()
+    simulator.cache_size = options['cache_size']
+    simulator.block_size = options['block_size']
+    simulator.associativity = associativity
+    simulator.replacement_policy = policy if policy != '-' else 'LRU'
+    simulator.ways = options['ways']
+    return simulator
+
+def _simulate(simulator, path, addresses, ops):
+    if path == 'access_memory':
+        access_memory = simulator.access_memory
+        if ops is None:
+            for address in addresses.tolist():
+                access_memory(address)
+        else:
+            for address, op in zip(addresses.tolist(), ops.tolist()):
+                access_memory(address, op)
+    elif path == 'run_trace':
+        simulator.run_trace(addresses, ops)
+    else:
+        simulator.run_trace_hits(addresses, ops)
+
+def run_case(case, options):
+    """Time one case in the current process and return its result row"""
+    path, associativity, policy, size = case
+    rss_before = _peak_rss()
+    addresses, ops = synthetic_trace(size, options['seed'], block_size=options['block_size'],
+                                     write_ratio=options['write_ratio'])
+    # Only read-only direct-mapped batches are vectorized; the rest pay per access
+    vectorized = path != 'access_memory' and associativity == 'Direct' and ops is None
+    if not vectorized and size > options['max_scalar']:
+        addresses = addresses[:options['max_scalar']]
+        ops = ops[:options['max_scalar']] if ops is not None else None
+
+    best = None
+    elapsed = 0.0
+    runs = 0
+    while runs < options['repeat'] or elapsed < MIN_SECONDS:
+        simulator = _make_simulator(associativity, policy, options)
+        start = time.perf_counter()
+        _simulate(simulator, path, addresses, ops)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+        elapsed += seconds
+        runs += 1
+    hit_rate = simulator.get_hit_rate()
+
+    # Net blocks still allocated after a sample; steady-state paths should retain none
+    sample = addresses[:ALLOCATION_SAMPLE]
+    sample_ops = ops[:ALLOCATION_SAMPLE] if ops is not None else None
+    simulator = _make_simulator(associativity, policy, options)
+    _simulate(simulator, path, sample[:1], None)
+    blocks_before = sys.getallocatedblocks()
+    _simulate(simulator, path, sample, sample_ops)
+    allocated_blocks = sys.getallocatedblocks() - blocks_before
+
+    return {
+        'name': case_name(*case),
+        'path': path,
+        'associativity': associativity,
+        'replacement_policy': policy,
+        'size': size,
+        'accesses': len(addresses),
+        'vectorized': vectorized,
+        'runs': runs,
+        'seconds': best,
+        'accesses_per_second': len(addresses) / best if best > 0 else float('inf'),
+        'hit_rate': hit_rate,
+        'peak_rss_bytes': _peak_rss(),
+        'rss_growth_bytes': _peak_rss() - rss_before,
+        'allocated_blocks_per_access': allocated_blocks / max(len(sample), 1),
+    }
+
+def _run_isolated(args):
+    return run_case(*args)
+
+def run_benchmarks(cases, options, progress=None):
+    """Run every case in its own worker process and return the result rows"""
+    results = []
+    with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+        for row in pool.imap(_run_isolated, [(case, options) for case in cases]):
+            results.append(row)
+            if progress is not None:
+                progress(row)
+    return results
+
+def compare(results, baseline, threshold):
+    """Compare throughput with a baseline
+
+    Returns:
+        list: (name, baseline accesses/s, current accesses/s, relative change,
+            regressed) for every case present in both
+    """
+    previous = {row['name']: row for row in baseline['results']}
+    comparisons = []
+    for row in results:
+        before = previous.get(row['name'])
+        if before is None:
+            continue
+        change = row['accesses_per_second'] / before['accesses_per_second'] - 1
+        comparisons.append((row['name'], before['accesses_per_second'], row['accesses_per_second'], change,
+                            change < -threshold))
+    return comparisons
+
+def _metadata(options):
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'options': options,
+    }
+
+def _format_row(row):
+    return (f"{row['name']:<48} {row['accesses_per_second'] / 1e6:9.3f} M/s  "
+            f"rss {row['peak_rss_bytes'] / 2 ** 20:8.1f} MiB  "
+            f"blocks/access {row['allocated_blocks_per_access']:.3f}")
+
+def _int_list(text):
+    return [int(float(value)) for value in text.split(',') if value]
+
+def _name_list(text):
+    return [value.strip() for value in text.split(',') if value.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the cache simulator hot paths')
+    parser.add_argument('--sizes', type=_int_list, default=list(DEFAULT_SIZES),
+                        help='comma-separated trace lengths, e.g. 1e4,1e6,1e8')
+    parser.add_argument('--paths', type=_name_list, default=list(PATHS))
+    parser.add_argument('--associativity', type=_name_list, default=list(ASSOCIATIVITIES))
+    parser.add_argument('--policy', type=_name_list, default=list(REPLACEMENT_POLICIES))
+    parser.add_argument('--cache-size', type=int, default=1024, help='cache size in lines')
+    parser.add_argument('--block-size', type=int, default=64)
+    parser.add_argument('--ways', type=int, default=8)
+    parser.add_argument('--write-ratio', type=float, default=0.0, help='share of stores in the trace')
+    parser.add_argument('--max-scalar', type=int, default=MAX_SCALAR_ACCESSES,
+                        help='accesses timed for cases that are not vectorized')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the fastest counts')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results to this JSON baseline file')
+    parser.add_argument('--baseline', help='compare with this JSON baseline file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='largest allowed throughput drop against the baseline (default: 0.10)')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args(argv)
+
+    for name in args.paths:
+        if name not in PATHS:
+            parser.error(f'unknown path {name!r}')
+    for name in args.associativity:
+        if name not in ASSOCIATIVITIES:
+            parser.error(f'unknown associativity {name!r}')
+    for name in args.policy:
+        if name not in REPLACEMENT_POLICIES:
+            parser.error(f'unknown replacement policy {name!r}')
+    if not args.sizes or min(args.sizes) <= 0:
+        parser.error('sizes must be positive integers')
+
+    options = {
+        'cache_size': args.cache_size,
+        'block_size': args.block_size,
+        'ways': args.ways,
+        'write_ratio': args.write_ratio,
+        'max_scalar': args.max_scalar,
+        'repeat': max(1, args.repeat),
+        'seed': args.seed,
+    }
+    cases = make_cases(args.paths, args.associativity, args.policy, args.sizes)
+    results = run_benchmarks(cases, options, None if args.json else lambda row: print(_format_row(row)))
+    report = {'metadata': _metadata(options), 'results': results}
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparisons = compare(results, baseline, args.threshold)
+        regressions = [item for item in comparisons if item[4]]
+        if not args.json:
+            print()
+            for name, before, after, change, regressed in comparisons:
+                print(f"{name:<48} {before / 1e6:9.3f} -> {after / 1e6:9.3f} M/s  {change * 100:+6.1f}%"
+                      f"{'  REGRESSION' if regressed else ''}")
+        if regressions:
+            print(f"{len(regressions)} of {len(comparisons)} cases regressed by more than "
+                  f"{args.threshold * 100:g}%", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import math
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+
+# Pixel height of a Treeview row; fixed so the number of visible rows is known
+ROW_HEIGHT = 20
+# Heat-map cells at most; larger caches are drawn with several sets per cell
+MAX_HEAT_CELLS = 1 << 16
+# Color of heat-map cells past the last set
+EMPTY_CELL = (64, 64, 64)
+COLUMNS = ('Line', 'Set', 'Way', 'Block', 'Dirty')
+
+def heat_map_cells(simulator, max_cells=MAX_HEAT_CELLS):
+    """Per-set occupancy and miss density, averaged down to at most max_cells cells
+
+    Returns:
+        tuple: (float occupancy 0..1 per cell, float share of the busiest
+            cell's misses per cell, sets per cell); None before the first access
+    """
+    state = simulator.state
+    if state is None:
+        return None
+    valid = np.frombuffer(state.valid, dtype=np.uint8).reshape(state.num_sets, state.ways)
+    occupancy = valid.sum(axis=1) / state.ways
+    instrumentation = simulator.instrumentation
+    if instrumentation is not None and instrumentation.set_misses.size == state.num_sets:
+        misses = instrumentation.set_misses.astype(np.float64)
+    else:
+        misses = np.zeros(state.num_sets)
+
+    group = -(-state.num_sets // max_cells)
+    if group > 1:
+        padding = -state.num_sets % group
+        occupancy = np.pad(occupancy, (0, padding)).reshape(-1, group).mean(axis=1)
+        misses = np.pad(misses, (0, padding)).reshape(-1, group).sum(axis=1)
+    peak = misses.max()
+    return occupancy, misses / peak if peak > 0 else misses, group
+
+def heat_map_layout(cells, width, height):
+    """Return (columns, rows, pixels per cell) fitting cells into a width x height area"""
+    columns = max(1, min(cells, math.ceil(math.sqrt(cells * width / max(height, 1)))))
+    rows = -(-cells // columns)
+    scale = max(1, min(width // columns, height // rows))
+    return columns, rows, scale
+
+def heat_map_ppm(occupancy, miss_density, columns, rows, scale):
+    """Binary PPM image with one scale x scale square per cell
+
+    Occupancy drives the green channel and miss density the red one, so
+    full sets that keep missing show up yellow.
+    """
+    cells = len(occupancy)
+    rgb = np.empty((rows * columns, 3), dtype=np.uint8)
+    rgb[:] = EMPTY_CELL
+    rgb[:cells, 0] = np.round(miss_density * 255)
+    rgb[:cells, 1] = np.round(occupancy * 255)
+    rgb[:cells, 2] = 0
+    image = rgb.reshape(rows, columns, 3).repeat(scale, axis=0).repeat(scale, axis=1)
+    header = f'P6 {columns * scale} {rows * scale} 255\n'.encode()
+    return header + image.tobytes()
+
+class CacheView:
+    """Cache contents as a virtualized line table or a per-set heat map
+
+    The table holds a fixed pool of rows, one per visible line, and fills
+    them from the simulator's packed state as it scrolls, so a redraw costs
+    O(visible rows) however large the cache is.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.mode_var = tk.StringVar(value='Lines')
+        self.summary_var = tk.StringVar(value='Cache is empty. Run a simulation to see results.')
+        self.detail_var = tk.StringVar(value='')
+        self.simulator = None
+        self.lines = np.empty(0, dtype=np.int64)
+        self.first = 0
+        self.rows = 0
+        self.cells = None
+        self.image = None
+        self.layout = None
+
+    def create_view_ui(self, container):
+        header = ttk.Frame(container)
+        header.pack(fill=tk.X)
+        ttk.Label(header, textvariable=self.summary_var, font=('Arial', 10, 'bold')).pack(side=tk.LEFT)
+        for mode in ('Heat Map', 'Lines'):
+            ttk.Radiobutton(header, text=mode, value=mode, variable=self.mode_var,
+                            command=self.show_mode).pack(side=tk.RIGHT)
+
+        self.body = ttk.Frame(container)
+        self.body.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+
+        # Line table: the scrollbar drives self.first instead of the Treeview scrolling itself
+        self.table_frame = ttk.Frame(self.body)
+        ttk.Style().configure('Cache.Treeview', rowheight=ROW_HEIGHT)
+        self.tree = ttk.Treeview(self.table_frame, columns=COLUMNS, show='headings', style='Cache.Treeview',
+                                 selectmode='none')
+        for column in COLUMNS:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=60, anchor='e')
+        self.scrollbar = ttk.Scrollbar(self.table_frame, command=self.scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.bind('<Configure>', self._resize_table)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll('scroll', -1 if e.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda e: self.scroll('scroll', -1, 'units'))
+        self.tree.bind('<Button-5>', lambda e: self.scroll('scroll', 1, 'units'))
+
+        # Heat map: one image, redrawn from cached per-cell values when resized
+        self.heat_frame = ttk.Frame(self.body)
+        self.canvas = tk.Canvas(self.heat_frame, background='white', highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(self.heat_frame, textvariable=self.detail_var).pack(fill=tk.X)
+        self.canvas.bind('<Configure>', lambda e: self.draw_heat_map())
+        self.canvas.bind('<Motion>', self._describe_cell)
+
+        self.show_mode()
+
+    def show_mode(self):
+        if self.mode_var.get() == 'Heat Map':
+            self.table_frame.pack_forget()
+            self.heat_frame.pack(fill=tk.BOTH, expand=True)
+            self.draw_heat_map()
+        else:
+            self.heat_frame.pack_forget()
+            self.table_frame.pack(fill=tk.BOTH, expand=True)
+            self.render_rows()
+
+    def update(self, simulator):
+        """Take a new snapshot of the simulator's resident lines and redraw"""
+        self.simulator = simulator
+        state = simulator.state
+        if state is None:
+            self.lines = np.empty(0, dtype=np.int64)
+        else:
+            self.lines = np.flatnonzero(np.frombuffer(state.valid, dtype=np.uint8))
+        self.cells = heat_map_cells(simulator)
+        self.first = 0
+        if len(self.lines):
+            self.summary_var.set(f'Cache contains {len(self.lines):,} of {state.num_lines:,} lines')
+        else:
+            self.summary_var.set('Cache is empty. Run a simulation to see results.')
+        self.show_mode()
+
+    def _resize_table(self, event):
+        rows = max(1, (event.height - ROW_HEIGHT) // ROW_HEIGHT)
+        if rows != self.rows:
+            items = self.tree.get_children()
+            for item in items[rows:]:
+                self.tree.delete(item)
+            for _ in range(len(items), rows):
+                self.tree.insert('', tk.END, values=('',) * len(COLUMNS))
+            self.rows = rows
+            self.scroll('moveto', self.first / max(len(self.lines), 1))
+
+    def scroll(self, action, amount, unit=None):
+        """Scrollbar command: move the first visible line and refill the row pool"""
+        if action == 'moveto':
+            first = int(float(amount) * len(self.lines))
+        else:
+            step = self.rows if unit == 'pages' else 1
+            first = self.first + int(amount) * step
+        self.first = max(0, min(first, len(self.lines) - self.rows))
+        self.render_rows()
+
+    def render_rows(self):
+        if self.simulator is None or self.rows == 0:
+            return
+        state = self.simulator.state
+        visible = self.lines[self.first:self.first + self.rows].tolist()
+        for position, item in enumerate(self.tree.get_children()):
+            if position < len(visible):
+                line = visible[position]
+                values = (line, line // state.ways, line % state.ways, state.tags[line],
+                          'D' if state.dirty[line] else '')
+            else:
+                values = ('',) * len(COLUMNS)
+            self.tree.item(item, values=values)
+        total = max(len(self.lines), 1)
+        self.scrollbar.set(self.first / total, min(1.0, (self.first + self.rows) / total))
+
+    def draw_heat_map(self):
+        if self.mode_var.get() != 'Heat Map':
+            return
+        self.canvas.delete('all')
+        if self.cells is None:
+            self.image = None
+            return
+        occupancy, miss_density, _ = self.cells
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        columns, rows, scale = heat_map_layout(len(occupancy), width, height)
+        self.layout = (columns, rows, scale)
+        self.image = tk.PhotoImage(data=heat_map_ppm(occupancy, miss_density, columns, rows, scale), format='PPM')
+        self.canvas.create_image(0, 0, image=self.image, anchor='nw')
+        self.detail_var.set('Green: occupancy, red: miss density')
+
+    def _describe_cell(self, event):
+        if self.image is None:
+            return
+        columns, rows, scale = self.layout
+        occupancy, _, group = self.cells
+        cell = (event.y // scale) * columns + event.x // scale
+        if event.x >= columns * scale or cell >= len(occupancy):
+            return
+        first = cell * group
+        num_sets = self.simulator.state.num_sets
+        sets = f'Set {first}' if group == 1 else f'Sets {first}-{min(first + group, num_sets) - 1}'
+        instrumentation = self.simulator.instrumentation
+        misses = ''
+        if instrumentation is not None and instrumentation.set_misses.size == num_sets:
+            misses = f', {int(instrumentation.set_misses[first:first + group].sum()):,} misses'
+        self.detail_var.set(f'{sets}: {occupancy[cell] * 100:.0f}% occupied{misses}')
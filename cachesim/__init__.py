@@ -0,0 +1,43 @@
+"""Cache simulation library
+
+The simulator core is imported with the package; the larger tools
+(hierarchies, multi-core, sweeps, optimizers, workload generators) are
+imported the first time one of their names is used, so batch jobs only pay
+for what they touch. Nothing here imports tkinter, matplotlib or requests.
+"""
+from .cache_simulator import CacheSimulator, DEFAULT_WAYS, WRITE_POLICIES
+from .replacement_policies import REPLACEMENT_POLICIES, make_policy
+from .trace_loader import (OP_IFETCH, OP_READ, OP_WRITE, iter_trace_records, load_trace, load_trace_records,
+                           parse_records, simulate_trace_file)
+
+# Name -> submodule that defines it, imported on first access
+_LAZY = {
+    'CacheHierarchy': 'cache_hierarchy',
+    'MultiCoreSimulator': 'multicore',
+    'run_sweep': 'parameter_sweep',
+    'run_configs': 'parameter_sweep',
+    'simulate_partitioned': 'set_partition',
+    'LocalOptimizer': 'local_optimizer',
+    'AIOptimizer': 'ai_optimizer',
+    'StackDistanceAnalyzer': 'stack_distance',
+    'ShardsMRC': 'sampling',
+    'estimate_hit_rate': 'sampling',
+    'Instrumentation': 'instrumentation',
+    'generate': 'workload_generators',
+    'save_checkpoint': 'checkpoint',
+    'load_checkpoint': 'checkpoint',
+    'start_profiling': 'profiling',
+    'stop_profiling': 'profiling',
+}
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f'.{_LAZY[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+__all__ = ['CacheSimulator', 'DEFAULT_WAYS', 'WRITE_POLICIES', 'REPLACEMENT_POLICIES', 'make_policy',
+           'OP_READ', 'OP_WRITE', 'OP_IFETCH', 'iter_trace_records', 'load_trace', 'load_trace_records',
+           'parse_records', 'simulate_trace_file', *_LAZY]
@@ -0,0 +1,264 @@
+import argparse
+import json
+import sys
+import time
+from importlib import import_module
+from .profiling import PROFILE_ENV
+
+# Subcommands handled by another module's own command line
+TOOLS = {
+    'sweep': ('parameter_sweep', 'simulate a grid of configurations in parallel'),
+    'hierarchy': ('cache_hierarchy', 'simulate a multi-level cache hierarchy'),
+    'multicore': ('multicore', 'simulate coherent per-core caches'),
+    'generate': ('workload_generators', 'write a synthetic trace'),
+    'binary': ('binary_trace', 'convert and inspect binary traces'),
+    'mrc': ('sampling', 'print an exact or sampled miss-ratio curve'),
+}
+
+def simulate(args):
+    """Run one configuration over a trace and return its statistics"""
+    from .cache_simulator import CacheSimulator
+    from .checkpoint import restore_checkpoint, run_with_checkpoints, skip_accesses
+    from .profiling import stage
+    from .trace_loader import iter_trace_records, parse_records
+
+    simulator = CacheSimulator()
+    position = 0
+    if args.resume:
+        # The checkpoint's configuration replaces the command line's
+        position = restore_checkpoint(simulator, args.resume)
+    else:
+        simulator.cache_size = args.cache_size
+        simulator.block_size = args.block_size
+        simulator.associativity = args.associativity
+        simulator.ways = args.ways
+        simulator.replacement_policy = args.policy
+        simulator.write_policy = args.write_policy
+        simulator.write_allocate = not args.no_write_allocate
+        simulator.seed = args.seed
+    if args.window:
+        simulator.enable_instrumentation(window_size=args.window, classify=args.classify)
+    simulator.enable_profiling()
+
+    start = time.perf_counter()
+    if args.trace:
+        records = iter_trace_records(args.trace, trace_format=args.format)
+    else:
+        with stage('parse'):
+            records = iter([parse_records(args.pattern.split(), 16 if args.format == 'hex' else 10)])
+    if position:
+        records = skip_accesses(records, position)
+    if args.checkpoint:
+        run_with_checkpoints(simulator, records, args.checkpoint, args.checkpoint_every, position)
+    else:
+        for addresses, ops in records:
+            with stage('simulate'):
+                simulator.run_trace(addresses, ops)
+    seconds = time.perf_counter() - start
+
+    stats = {
+        'cache_size': simulator.cache_size,
+        'block_size': simulator.block_size,
+        'associativity': simulator.associativity,
+        'ways': simulator.get_ways(),
+        'replacement_policy': simulator.replacement_policy,
+        'write_policy': simulator.write_policy,
+        'write_allocate': simulator.write_allocate,
+        'accesses': simulator.hits + simulator.misses,
+        'hits': simulator.hits,
+        'misses': simulator.misses,
+        'hit_rate': simulator.get_hit_rate(),
+        **simulator.get_traffic(),
+        'seconds': seconds,
+    }
+    if simulator.instrumentation is not None:
+        stats['instrumentation'] = simulator.instrumentation.summary()
+    return stats
+
+def simulate_parallel(args):
+    """Run one configuration with its cache sets split across worker processes"""
+    from .profiling import stage
+    from .set_partition import simulate_partitioned
+    from .trace_loader import load_trace_records, parse_records
+
+    if args.trace:
+        addresses, ops = load_trace_records(args.trace, trace_format=args.format)
+    else:
+        with stage('parse'):
+            addresses, ops = parse_records(args.pattern.split(), 16 if args.format == 'hex' else 10)
+    with stage('simulate'):
+        stats = simulate_partitioned(addresses, args.cache_size, args.block_size, args.associativity, args.policy,
+                                     ways=args.ways, ops=ops, write_policy=args.write_policy,
+                                     write_allocate=not args.no_write_allocate, seed=args.seed,
+                                     max_workers=args.workers)
+    stats['write_policy'] = args.write_policy
+    stats['write_allocate'] = not args.no_write_allocate
+    stats['accesses'] = stats['hits'] + stats['misses']
+    return stats
+
+def simulate_sampled(args):
+    """Estimate one configuration's hit rate from a sample of its sets or blocks"""
+    from .profiling import stage
+    from .sampling import estimate_hit_rate
+    from .trace_loader import iter_trace_records, parse_records
+
+    start = time.perf_counter()
+    if args.trace:
+        # Streamed: only the sampled part of the trace is ever simulated or kept
+        records = iter_trace_records(args.trace, trace_format=args.format)
+    else:
+        with stage('parse'):
+            records = iter([parse_records(args.pattern.split(), 16 if args.format == 'hex' else 10)])
+    with stage('simulate'):
+        stats = estimate_hit_rate(records, args.cache_size, args.block_size, args.associativity, args.policy,
+                                  ways=args.ways, write_policy=args.write_policy,
+                                  write_allocate=not args.no_write_allocate, seed=args.seed,
+                                  rate=args.sample_rate)
+    stats['write_policy'] = args.write_policy
+    stats['write_allocate'] = not args.no_write_allocate
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+def add_profiling_arguments(parser):
+    parser.add_argument('--profile', metavar='REPORT',
+                        help=f'time each stage and count access branches, writing a JSON report here '
+                             f'("-" for stderr; or set {PROFILE_ENV})')
+    parser.add_argument('--cprofile', action='store_true', help='add the top functions under cProfile to the report')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='add peak memory and the top allocation sites to the report')
+
+def main(argv=None):
+    """Run the command, under the profiler when --profile or CACHESIM_PROFILE asks for it
+
+    The profiling options are taken before the command is dispatched, so
+    they apply to every subcommand.
+    """
+    from .profiling import profiling_from_environment, start_profiling, stop_profiling
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # No abbreviations, or --trace of a subcommand would be taken for --tracemalloc
+    profiling = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    add_profiling_arguments(profiling)
+    options, argv = profiling.parse_known_args(argv)
+    if options.profile:
+        profiler, report = start_profiling(options.cprofile, options.tracemalloc), options.profile
+    else:
+        profiler, report = profiling_from_environment()
+    if profiler is None:
+        return run(argv)
+    try:
+        with profiler.capture():
+            return run(argv)
+    finally:
+        try:
+            profiler.write_report(report)
+        except OSError as e:
+            print(f"Failed to write profile report: {e}", file=sys.stderr)
+        stop_profiling()
+
+def run(argv):
+    if argv and argv[0] in TOOLS:
+        module = import_module(f'.{TOOLS[argv[0]][0]}', __package__)
+        sys.argv[0] = f'python -m cachesim {argv[0]}'
+        return module.main(argv[1:])
+
+    from .cache_simulator import DEFAULT_WAYS, WRITE_POLICIES
+    from .replacement_policies import REPLACEMENT_POLICIES
+    from .trace_loader import TRACE_FORMATS
+
+    tools = '\n'.join(f'  {name:<10} {description}' for name, (_, description) in TOOLS.items())
+    parser = argparse.ArgumentParser(
+        prog='python -m cachesim',
+        description='Simulate a cache over a trace file and print its statistics',
+        epilog=f'other commands (run with -h for their options):\n{tools}',
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('trace', nargs='?', help='trace file (text, gzip-compressed text, Dinero din or binary)')
+    source.add_argument('--pattern', help='space-separated memory addresses, as typed in the GUI')
+    parser.add_argument('--format', choices=TRACE_FORMATS, default=None,
+                        help='trace format (default: detect); hex reads bare hex addresses such as 7fff1a20')
+    parser.add_argument('--cache-size', type=int, help='cache size in lines (required unless resuming)')
+    parser.add_argument('--block-size', type=int, help='block size (required unless resuming)')
+    parser.add_argument('--associativity', choices=('Direct', 'Set-Associative', 'Fully-Associative'),
+                        default='Direct')
+    parser.add_argument('--ways', type=int, default=DEFAULT_WAYS, help='ways per set for Set-Associative')
+    parser.add_argument('--policy', choices=tuple(REPLACEMENT_POLICIES), default='LRU')
+    parser.add_argument('--write-policy', choices=WRITE_POLICIES, default='Write-Back')
+    parser.add_argument('--no-write-allocate', action='store_true', help='send store misses around the cache')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the Random policy')
+    parser.add_argument('--window', type=int, default=0,
+                        help='also record hit rates per window of this many accesses')
+    parser.add_argument('--classify', action='store_true',
+                        help='with --window, also split misses into compulsory, capacity and conflict (slower)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='split the cache sets across this many processes (same results, loads the whole trace)')
+    parser.add_argument('--sample-rate', type=float, default=0,
+                        help='estimate the hit rate from this share of the sets (or blocks, if fully '
+                             'associative), e.g. 0.01, with a standard error')
+    parser.add_argument('--checkpoint', help='save the cache state to this file at the end of the run')
+    parser.add_argument('--checkpoint-every', type=int, default=0, metavar='N',
+                        help='also save the checkpoint every N accesses')
+    parser.add_argument('--resume', metavar='CHECKPOINT',
+                        help='warm start: restore a checkpoint, with its configuration, and continue the trace '
+                             'after the access it was taken at')
+    parser.add_argument('--json', action='store_true', help='print the statistics as JSON')
+    add_profiling_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not args.resume and (args.cache_size is None or args.block_size is None):
+        parser.error('--cache-size and --block-size are required unless resuming from a checkpoint')
+    if not args.resume and min(args.cache_size, args.block_size, args.ways) <= 0:
+        parser.error('cache size, block size and ways must be positive integers')
+    if min(args.window, args.workers, args.checkpoint_every) < 0:
+        parser.error('window, workers and checkpoint interval must be positive integers')
+    if args.checkpoint_every and not args.checkpoint:
+        parser.error('--checkpoint-every needs --checkpoint')
+    if args.workers and (args.window or args.checkpoint or args.resume):
+        parser.error('--window, --checkpoint and --resume need a serial run; drop --workers')
+    if args.sample_rate and (args.workers or args.window or args.checkpoint or args.resume):
+        parser.error('--sample-rate cannot be combined with --workers, --window, --checkpoint or --resume')
+    if not 0 <= args.sample_rate <= 1:
+        parser.error('sample rate must be between 0 and 1')
+    try:
+        if args.sample_rate:
+            stats = simulate_sampled(args)
+        else:
+            stats = simulate_parallel(args) if args.workers else simulate(args)
+    except ValueError as e:
+        parser.error(str(e))
+    except OSError as e:
+        print(f"File error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        print()
+        return 0
+    if 'stderr' in stats:
+        print(f"{stats['accesses']} accesses, about {stats['hits']} hits and {stats['misses']} misses: "
+              f"hit rate {stats['hit_rate'] * 100:.2f}% +/- {stats['stderr'] * 100:.2f}% "
+              f"({stats['method']} of {stats['sampled_accesses']} accesses)")
+    else:
+        print(f"{stats['accesses']} accesses: {stats['hits']} hits, {stats['misses']} misses, "
+              f"hit rate {stats['hit_rate'] * 100:.2f}%")
+    if stats.get('writes') or stats.get('writebacks'):
+        print(f"{stats['writes']} writes, {stats['writebacks']} writebacks, "
+              f"{stats['bytes_transferred']} bytes to the next level")
+    if 'instrumentation' in stats:
+        windows = stats['instrumentation']
+        rates = [hits / (hits + misses) for hits, misses in zip(windows['window_hits'], windows['window_misses'])]
+        if rates:
+            print(f"{len(rates)} windows of {windows['window_size']} accesses: hit rate "
+                  f"{min(rates) * 100:.2f}% to {max(rates) * 100:.2f}%")
+        classes = windows.get('miss_classes')
+        if classes is not None:
+            print(f"Misses: {classes['compulsory']} compulsory, {classes['capacity']} capacity, "
+                  f"{classes['conflict']} conflict")
+        elif 'miss_classes' in windows:
+            print("Misses not classified: the run resumed from a checkpoint")
+    shards = f" over {stats['shards']} set partitions" if stats.get('shards', 1) > 1 else ''
+    print(f"Simulated in {stats['seconds']:.3f} s{shards}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
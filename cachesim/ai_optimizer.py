@@ -0,0 +1,242 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .local_optimizer import LocalOptimizer, collect_addresses
+from .profiling import stage
+from .recommendation_cache import RecommendationCache
+from .replacement_policies import REPLACEMENT_POLICIES
+from .trace_features import extract_features, format_features
+
+DEFAULT_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+
+# 'remote' asks the model; 'local' searches configurations with the simulator, offline
+OPTIMIZER_MODES = ('remote', 'local')
+
+class AIOptimizer:
+    def __init__(self, api_url=None, cache_path=None, timeout=(5, 60), max_retries=3, backoff_factor=0.5,
+                 mode='remote'):
+        """Create the optimizer
+
+        Args:
+            api_url (str): Model endpoint (defaults to Gemini; point it at a
+                local stub server for testing)
+            cache_path (str): Recommendation cache file (defaults to
+                recommendation_cache.json in the project directory)
+            timeout: requests timeout, as seconds or (connect, read)
+            max_retries (int): Retries for connection errors and 429/5xx responses
+            backoff_factor (float): Exponential backoff between retries in seconds
+            mode (str): 'remote' or 'local' (see set_mode)
+        """
+        # Default API key - should be replaced with user's key
+        self.api_key = ""
+        self.api_url = api_url or DEFAULT_API_URL
+        self.timeout = timeout
+        self.set_mode(mode)
+        self.local_optimizer = LocalOptimizer()
+        
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        # Created by the first remote request, so the local mode works without requests installed
+        self._session = None
+        
+        if cache_path is None:
+            cache_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                      "recommendation_cache.json")
+        self.cache = RecommendationCache(cache_path)
+        
+        # Single worker thread for non-blocking requests
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai-optimizer')
+        
+    @property
+    def session(self):
+        """Persistent session, so repeated calls reuse a keep-alive connection"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            retries = Retry(
+                total=self.max_retries,
+                backoff_factor=self.backoff_factor,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['POST']),
+                raise_on_status=False
+            )
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(max_retries=retries))
+            session.mount('http://', HTTPAdapter(max_retries=retries))
+            self._session = session
+        return self._session
+        
+    def set_api_key(self, api_key):
+        """Set the Google AI Studio API key"""
+        self.api_key = api_key
+        
+    def set_mode(self, mode):
+        """Choose where recommendations come from: the remote model or a local simulation search"""
+        if mode not in OPTIMIZER_MODES:
+            raise ValueError(f"Unknown optimizer mode {mode!r}")
+        self.mode = mode
+        
+    def get_cache_recommendation(self, access_pattern, current_config):
+        """Get cache configuration recommendations based on the access pattern
+        
+        Args:
+            access_pattern: The memory access pattern, as a string of space-separated
+                addresses, an address array or an iterable of address chunks
+            current_config (dict): Current cache configuration
+            
+        Returns:
+            dict: Recommended cache configuration or error message
+        """
+        with stage('ai'):
+            return self._recommend(access_pattern, current_config)
+    
+    def _recommend(self, access_pattern, current_config):
+        if self.mode == 'local':
+            return self.get_local_recommendation(access_pattern, current_config)
+        
+        if not self.api_key:
+            return {"error": "API key not set. Please set your Google AI Studio API key."}
+        
+        try:
+            # Summarize the trace once; the prompt and the cache key are built from the summary
+            features = self._pattern_features(access_pattern, current_config)
+        except ValueError:
+            return {"error": "The access pattern contains invalid memory addresses."}
+        except OSError as e:
+            return {"error": f"Failed to read trace file: {str(e)}"}
+        
+        # Repeated requests for the same pattern and configuration are answered from the cache
+        cache_key = RecommendationCache.make_key(features, current_config)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        # Prepare the prompt for the AI
+        prompt = self._prepare_prompt(features, current_config)
+        
+        try:
+            # Make API request
+            headers = {
+                'Content-Type': 'application/json'
+            }
+            
+            data = {
+                "contents": [{
+                    "parts":[{"text": prompt}]
+                }]
+            }
+            
+            url = f"{self.api_url}?key={self.api_key}"
+            response = self.session.post(url, headers=headers, data=json.dumps(data), timeout=self.timeout)
+            
+            if response.status_code == 200:
+                result = response.json()
+                # Extract the recommendation from the AI response
+                recommendation = self._parse_ai_response(result)
+                if 'error' not in recommendation and 'raw_response' not in recommendation:
+                    self.cache.put(cache_key, recommendation)
+                return recommendation
+            else:
+                return {"error": f"API request failed with status code {response.status_code}: {response.text}"}
+                
+        except Exception as e:
+            return {"error": f"Error communicating with AI API: {str(e)}"}
+    
+    def get_local_recommendation(self, access_pattern, current_config):
+        """Find the smallest configuration that comes close to the best hit rate, by simulation
+        
+        Candidates are simulated on the trace itself (sampled when it is
+        long), so no network access or API key is needed. The result has the
+        same keys as a remote recommendation, plus the measured hit_rate,
+        best_hit_rate and current_hit_rate (see LocalOptimizer.recommend).
+        """
+        try:
+            addresses = collect_addresses(access_pattern)
+        except ValueError:
+            return {"error": "The access pattern contains invalid memory addresses."}
+        except OSError as e:
+            return {"error": f"Failed to read trace file: {str(e)}"}
+        
+        try:
+            return self.local_optimizer.recommend(addresses, current_config)
+        except Exception as e:
+            return {"error": f"Error searching cache configurations: {str(e)}"}
+    
+    def get_cache_recommendation_async(self, access_pattern, current_config):
+        """Run get_cache_recommendation on the worker thread
+        
+        Returns:
+            concurrent.futures.Future: Resolves to the recommendation dict
+        """
+        return self.executor.submit(self.get_cache_recommendation, access_pattern, current_config)
+    
+    def _pattern_features(self, access_pattern, current_config):
+        """Bounded-size trace summary the prompt is built from, also used to key the cache"""
+        try:
+            block_size = int(current_config.get('block_size', 16))
+        except (TypeError, ValueError):
+            block_size = 16
+        return extract_features(access_pattern, max(block_size, 1))
+    
+    def _prepare_prompt(self, features, current_config):
+        """Prepare the prompt for the AI from the trace summary"""
+        policies = ', '.join(REPLACEMENT_POLICIES)
+        prompt = f"""As a cache optimization expert, analyze this memory access pattern and recommend the optimal cache configuration.
+
+Pattern analysis:
+{format_features(features)}
+
+Current cache configuration:
+- Cache Size: {current_config.get('cache_size', 'Not specified')}
+- Block Size: {current_config.get('block_size', 'Not specified')}
+- Associativity: {current_config.get('associativity', 'Not specified')}
+- Ways (Set-Associative only): {current_config.get('ways', 'Not specified')}
+- Replacement Policy: {current_config.get('replacement_policy', 'Not specified')}
+
+Based on this access pattern, what would be the optimal cache configuration to maximize hit rate? 
+Provide recommendations for:
+1. Cache Size (integer)
+2. Block Size (integer)
+3. Associativity (Direct, Set-Associative, or Fully-Associative)
+4. Ways per set (integer, used when Associativity is Set-Associative)
+5. Replacement Policy ({policies})
+
+Format your response as a JSON object with these exact keys: cache_size, block_size, associativity, ways, replacement_policy
+"""
+        return prompt
+    
+    def _parse_ai_response(self, response):
+        """Parse the AI response to extract the recommendation"""
+        try:
+            # Extract the text from the response
+            if 'candidates' in response and len(response['candidates']) > 0:
+                if 'content' in response['candidates'][0] and 'parts' in response['candidates'][0]['content']:
+                    text = response['candidates'][0]['content']['parts'][0]['text']
+                    
+                    # Try to find and parse JSON in the response
+                    import re
+                    json_match = re.search(r'\{[\s\S]*\}', text)
+                    if json_match:
+                        json_str = json_match.group(0)
+                        try:
+                            recommendation = json.loads(json_str)
+                            # Validate the recommendation format
+                            required_keys = ['cache_size', 'block_size', 'associativity', 'replacement_policy']
+                            if all(key in recommendation for key in required_keys):
+                                # Convert string numbers to integers
+                                if isinstance(recommendation['cache_size'], str) and recommendation['cache_size'].isdigit():
+                                    recommendation['cache_size'] = int(recommendation['cache_size'])
+                                if isinstance(recommendation['block_size'], str) and recommendation['block_size'].isdigit():
+                                    recommendation['block_size'] = int(recommendation['block_size'])
+                                if isinstance(recommendation.get('ways'), str) and recommendation['ways'].isdigit():
+                                    recommendation['ways'] = int(recommendation['ways'])
+                                return recommendation
+                        except json.JSONDecodeError:
+                            pass
+            
+            # If we couldn't parse JSON, return the raw text
+            return {"raw_response": text if 'text' in locals() else "No text found in response"}
+            
+        except Exception as e:
+            return {"error": f"Error parsing AI response: {str(e)}"}
\ No newline at end of file
@@ -0,0 +1,148 @@
+import argparse
+import os
+import shutil
+import struct
+import tempfile
+import numpy as np
+from .trace_loader import DEFAULT_CHUNK_SIZE, iter_trace_records
+
+# File layout (all little-endian):
+#   header  magic b'CTRC', version u16, address width u8 (4 or 8 bytes),
+#           flags u8 (bit 0: op column present), record count u64
+#   addresses  count x uint32/uint64
+#   ops        count x uint8 OP_* codes, when the op column is present
+BINARY_MAGIC = b'CTRC'
+BINARY_VERSION = 1
+HEADER_FORMAT = '<4sHBBQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+FLAG_OPS = 0x01
+
+# 64-bit addresses are mapped as int64 so the simulator can use them without a copy
+ADDRESS_DTYPES = {4: np.dtype('<u4'), 8: np.dtype('<i8')}
+
+class BinaryTrace:
+    """A binary trace file mapped into memory
+
+    Attributes:
+        addresses (np.memmap): Read-only view of the address column
+        ops (np.memmap): Read-only view of the op column, or None
+        count (int): Number of records
+        address_width (int): Bytes per address (4 or 8)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"{path} is too short to be a binary trace")
+        magic, version, width, flags, count = struct.unpack(HEADER_FORMAT, header)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary trace")
+        if version != BINARY_VERSION:
+            raise ValueError(f"Unsupported binary trace version {version}")
+        if width not in ADDRESS_DTYPES:
+            raise ValueError(f"Unsupported address width {width}")
+
+        self.count = count
+        self.address_width = width
+        if count == 0:
+            self.addresses = np.empty(0, dtype=ADDRESS_DTYPES[width])
+            self.ops = np.empty(0, dtype=np.uint8) if flags & FLAG_OPS else None
+            return
+        self.addresses = np.memmap(path, dtype=ADDRESS_DTYPES[width], mode='r',
+                                   offset=HEADER_SIZE, shape=(count,))
+        self.ops = None
+        if flags & FLAG_OPS:
+            self.ops = np.memmap(path, dtype=np.uint8, mode='r',
+                                 offset=HEADER_SIZE + count * width, shape=(count,))
+
+    def __len__(self):
+        return self.count
+
+def is_binary_trace(path):
+    with open(path, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def open_binary_trace(path):
+    """Memory-map a binary trace written by write_binary_trace()"""
+    return BinaryTrace(path)
+
+def write_binary_trace(path, records, address_width=8):
+    """Write (addresses, ops) chunks to a binary trace file
+
+    Args:
+        path (str): Destination file
+        records: Iterable of (addresses, ops) pairs; ops is None for chunks
+            without operation types, which are stored as reads if any
+            other chunk has them
+        address_width (int): 4 or 8 bytes per address
+
+    Returns:
+        int: Number of records written
+    """
+    if address_width not in ADDRESS_DTYPES:
+        raise ValueError("Address width must be 4 or 8 bytes")
+    dtype = ADDRESS_DTYPES[address_width]
+    limit = np.iinfo(dtype).max
+
+    count = 0
+    has_ops = False
+    # Ops go after the whole address column, so they are spooled to a side file
+    with open(path, 'wb') as f, tempfile.TemporaryFile() as ops_file:
+        f.write(struct.pack(HEADER_FORMAT, BINARY_MAGIC, BINARY_VERSION, address_width, 0, 0))
+        for addresses, ops in records:
+            addresses = np.asarray(addresses)
+            if len(addresses) and (addresses.min() < 0 or addresses.max() > limit):
+                raise ValueError(f"Address does not fit in {address_width} bytes")
+            if ops is not None and not has_ops:
+                # The first chunk with ops: earlier chunks were all reads
+                ops_file.write(bytes(count))
+                has_ops = True
+            f.write(addresses.astype(dtype, copy=False).tobytes())
+            if has_ops:
+                ops_file.write(bytes(len(addresses)) if ops is None else np.asarray(ops, dtype=np.uint8).tobytes())
+            count += len(addresses)
+
+        if has_ops:
+            ops_file.seek(0)
+            shutil.copyfileobj(ops_file, f)
+        f.seek(0)
+        f.write(struct.pack(HEADER_FORMAT, BINARY_MAGIC, BINARY_VERSION, address_width,
+                            FLAG_OPS if has_ops else 0, count))
+    return count
+
+def convert_trace(src, dst, address_width=8, trace_format=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Convert a text (decimal or hex), gzip or din trace to the binary format
+
+    Returns:
+        int: Number of records written
+    """
+    return write_binary_trace(dst, iter_trace_records(src, chunk_size, trace_format), address_width)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert and inspect binary cache traces')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help='convert a text, gzip or din trace to binary')
+    convert.add_argument('src', help='source trace file')
+    convert.add_argument('dst', help='binary trace to write')
+    convert.add_argument('--width', type=int, choices=(4, 8), default=8, help='bytes per address (default: 8)')
+    convert.add_argument('--format', choices=('text', 'hex', 'din'), default=None,
+                         help='source format (default: detect); hex reads bare hex addresses such as 7fff1a20')
+
+    info = commands.add_parser('info', help='print the header of a binary trace')
+    info.add_argument('path', help='binary trace file')
+
+    args = parser.parse_args(argv)
+    if args.command == 'convert':
+        count = convert_trace(args.src, args.dst, args.width, args.format)
+        print(f"Wrote {count} records to {args.dst} ({os.path.getsize(args.dst)} bytes)")
+    else:
+        trace = open_binary_trace(args.path)
+        print(f"Records: {trace.count}")
+        print(f"Address width: {trace.address_width} bytes")
+        print(f"Op column: {'yes' if trace.ops is not None else 'no'}")
+
+if __name__ == "__main__":
+    main()
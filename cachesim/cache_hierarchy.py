@@ -0,0 +1,293 @@
+import argparse
+import json
+import sys
+import numpy as np
+from .cache_simulator import CacheSimulator, TRACE_CHUNK_SIZE
+from .trace_loader import OP_READ, OP_WRITE, TRACE_FORMATS, load_trace_records, parse_records
+
+INCLUSION_POLICIES = ('inclusive', 'exclusive', 'NINE')
+
+class CacheHierarchy:
+    """Chain of cache levels (L1 first) in front of main memory
+
+    Each level is a CacheSimulator with its own size, block size, ways and
+    replacement policy, and misses propagate to the next level down.
+    Operation types only reach L1; lower levels see its misses as reads,
+    and writebacks are counted per level rather than sent down.
+
+    Inclusion:
+        NINE: non-inclusive non-exclusive. A level fills on its own misses and
+            never affects the others, so each level sees exactly the miss
+            stream of the level above and whole trace chunks are passed down
+            at once.
+        inclusive: every block in a level is also in the levels below. A
+            lower level evicting a block back-invalidates it above.
+        exclusive: a block lives in at most one level. Lower levels are
+            filled only by the victims of the level above, and a hit below
+            moves the block up to L1. A store that goes around a
+            no-write-allocate L1 is written where the block already is.
+            A dirty block keeps its dirty bit as it moves between levels, so
+            it is written back by the level it is finally evicted from.
+            All levels must share one block size.
+    """
+
+    def __init__(self, levels, latencies, memory_latency=100, inclusion='NINE'):
+        """Create the hierarchy
+
+        Args:
+            levels (list): Configured CacheSimulator instances, L1 first
+            latencies (list): Access latency of each level in cycles
+            memory_latency (int): Latency of main memory in cycles
+            inclusion (str): 'inclusive', 'exclusive' or 'NINE'
+        """
+        if not levels:
+            raise ValueError("A cache hierarchy needs at least one level")
+        if len(latencies) != len(levels):
+            raise ValueError("Give one latency per cache level")
+        if inclusion not in INCLUSION_POLICIES:
+            raise ValueError(f"Unknown inclusion policy {inclusion!r}")
+        block_sizes = [level.block_size for level in levels]
+        if inclusion == 'exclusive' and len(set(block_sizes)) > 1:
+            raise ValueError("Exclusive hierarchies need the same block size at every level")
+        if inclusion == 'inclusive' and block_sizes != sorted(block_sizes):
+            raise ValueError("Inclusive hierarchies need block sizes that do not shrink going down")
+        self.levels = list(levels)
+        self.latencies = list(latencies)
+        self.memory_latency = memory_latency
+        self.inclusion = inclusion
+        self.memory_accesses = 0
+        self.back_invalidations = 0
+
+    def reset(self):
+        for level in self.levels:
+            level.reset()
+        self.memory_accesses = 0
+        self.back_invalidations = 0
+
+    def access_memory(self, address, op=OP_READ):
+        """Simulate one access and return the index of the level that hit (len(levels) for memory)"""
+        if self.levels[0].access_memory(address, op):
+            return 0
+        return self._l1_miss(address, op)
+
+    def _l1_miss(self, address, op=OP_READ):
+        """Handle an access that missed (and was already placed, unless it went around) in L1"""
+        if self.inclusion == 'exclusive':
+            return self._miss_exclusive(address, op)
+        inclusive = self.inclusion == 'inclusive'
+        for depth in range(1, len(self.levels)):
+            level = self.levels[depth]
+            if level.access_memory(address):
+                return depth
+            if inclusive and level.state.evicted_block >= 0:
+                self._back_invalidate(depth, level.state.evicted_block)
+        self.memory_accesses += 1
+        return len(self.levels)
+
+    def _back_invalidate(self, depth, block):
+        """Drop every block above depth that overlaps a block evicted at depth"""
+        block_size = self.levels[depth].block_size
+        start = block * block_size
+        end = start + block_size
+        for level in self.levels[:depth]:
+            for address in range(start - start % level.block_size, end, level.block_size):
+                if level.invalidate(address):
+                    self.back_invalidations += 1
+
+    def _miss_exclusive(self, address, op):
+        levels = self.levels
+        first = levels[0]
+        if op == OP_WRITE and not first.write_allocate:
+            # The store went around L1, which filled and evicted nothing (its
+            # evicted_block is left from an earlier miss)
+            return self._write_around_exclusive(address)
+        state = first.state
+        victim = state.evicted_block
+        victim_dirty = state.evicted_dirty
+
+        # Find the block below and move it up (access_memory already placed it in L1),
+        # with its dirty bit: the block is not written back on the way
+        served = len(levels)
+        for depth in range(1, len(levels)):
+            level = levels[depth]
+            if level.invalidate(address, writeback=False):
+                level.hits += 1
+                served = depth
+                if level.state.evicted_dirty:
+                    block = address // first.block_size
+                    state.dirty[state.find(block, block % state.num_sets)] = 1
+                break
+            level.misses += 1
+        if served == len(levels):
+            self.memory_accesses += 1
+
+        # Each level keeps what the level above dropped, dirty or not
+        block_size = first.block_size
+        for level in levels[1:]:
+            if victim < 0:
+                break
+            victim = level.insert(victim * block_size, victim_dirty)
+            victim_dirty = level.state.evicted_dirty
+        return served
+
+    def _write_around_exclusive(self, address):
+        """Write a store that missed a no-write-allocate L1 to the level holding its block, or memory"""
+        levels = self.levels
+        block = address // levels[0].block_size
+        for depth in range(1, len(levels)):
+            level = levels[depth]
+            state = level.state
+            if state is None:
+                state = level._build_state()
+            set_index = block % state.num_sets
+            line = state.find(block, set_index)
+            if line >= 0:
+                level.hits += 1
+                level.writes += 1
+                state.touch(set_index, line)
+                level._write(state, line)
+                return depth
+            level.misses += 1
+        self.memory_accesses += 1
+        return len(levels)
+
+    def run_trace(self, addresses, ops=None):
+        """Simulate a whole trace and return the number of accesses served by a cache
+
+        ops optionally gives the OP_* code of every access (all reads when None).
+
+        NINE hierarchies simulate each level over the chunk's misses from the
+        level above, so the lower levels only see the accesses that reach
+        them. Inclusive and exclusive hierarchies go access by access, since
+        lower levels change the contents of upper ones.
+        """
+        addresses = np.asarray(addresses, dtype=np.int64)
+        if ops is not None:
+            ops = np.asarray(ops, dtype=np.uint8)
+        before = self.memory_accesses
+        if self.inclusion == 'NINE':
+            for start in range(0, len(addresses), TRACE_CHUNK_SIZE):
+                misses = addresses[start:start + TRACE_CHUNK_SIZE]
+                chunk_ops = ops[start:start + TRACE_CHUNK_SIZE] if ops is not None else None
+                for level in self.levels:
+                    if len(misses) == 0:
+                        break
+                    misses = misses[~level.run_trace_hits(misses, chunk_ops)]
+                    chunk_ops = None
+                self.memory_accesses += len(misses)
+        else:
+            # Most accesses stop at L1, so only misses pay for the walk down
+            first = self.levels[0].access_memory
+            l1_miss = self._l1_miss
+            if ops is None:
+                ops = np.zeros(len(addresses), dtype=np.uint8)
+            for address, op in zip(addresses.tolist(), ops.tolist()):
+                if not first(address, op):
+                    l1_miss(address, op)
+        return len(addresses) - (self.memory_accesses - before)
+
+    def get_amat(self):
+        """Average memory access time in cycles over the accesses simulated so far"""
+        total = self.levels[0].hits + self.levels[0].misses
+        if total == 0:
+            return 0
+        cycles = sum((level.hits + level.misses) * latency for level, latency in zip(self.levels, self.latencies))
+        cycles += self.memory_accesses * self.memory_latency
+        return cycles / total
+
+    def get_stats(self):
+        """Per-level hits, misses and hit rates plus memory traffic and AMAT"""
+        total = self.levels[0].hits + self.levels[0].misses
+        levels = []
+        for depth, level in enumerate(self.levels):
+            levels.append({
+                'level': f'L{depth + 1}',
+                'accesses': level.hits + level.misses,
+                'hits': level.hits,
+                'misses': level.misses,
+                'hit_rate': level.get_hit_rate(),
+                # Share of all accesses that missed here and every level above
+                'global_miss_rate': level.misses / total if total else 0,
+                'latency': self.latencies[depth],
+                **level.get_traffic(),
+            })
+        return {
+            'inclusion': self.inclusion,
+            'accesses': total,
+            'levels': levels,
+            'memory_accesses': self.memory_accesses,
+            'back_invalidations': self.back_invalidations,
+            'amat': self.get_amat(),
+        }
+
+
+def _parse_level(text):
+    """Parse "cache_size,block_size,ways,policy,latency"; ways may be 'full'"""
+    fields = [field.strip() for field in text.split(',')]
+    if len(fields) != 5:
+        raise argparse.ArgumentTypeError(f'expected cache_size,block_size,ways,policy,latency, got {text!r}')
+    try:
+        cache_size, block_size, latency = int(fields[0]), int(fields[1]), int(fields[4])
+        ways = cache_size if fields[2] == 'full' else int(fields[2])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid cache level {text!r}') from None
+    if min(cache_size, block_size, ways) <= 0 or latency < 0:
+        raise argparse.ArgumentTypeError(f'invalid cache level {text!r}')
+    level = CacheSimulator()
+    level.cache_size = cache_size
+    level.block_size = block_size
+    if ways == 1:
+        level.associativity = 'Direct'
+    elif ways >= cache_size:
+        level.associativity = 'Fully-Associative'
+    else:
+        level.associativity = 'Set-Associative'
+        level.ways = ways
+    level.replacement_policy = fields[3]
+    return level, latency
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate a multi-level cache hierarchy')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--trace', help='trace file (text addresses, gzip-compressed text, Dinero din or binary)')
+    source.add_argument('--pattern', help='space-separated memory addresses, as typed in the GUI')
+    parser.add_argument('--format', choices=TRACE_FORMATS, default=None,
+                        help='trace format (default: detect); hex reads bare hex addresses such as 7fff1a20')
+    parser.add_argument('--level', type=_parse_level, action='append', required=True,
+                        help='cache level as cache_size,block_size,ways,policy,latency (ways may be "full"); '
+                             'repeat for L1, L2, ...')
+    parser.add_argument('--inclusion', choices=INCLUSION_POLICIES, default='NINE')
+    parser.add_argument('--memory-latency', type=int, default=100, help='main memory latency in cycles')
+    parser.add_argument('--json', action='store_true', help='print the statistics as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.trace:
+            addresses, ops = load_trace_records(args.trace, trace_format=args.format)
+        else:
+            addresses, ops = parse_records(args.pattern.split(), 16 if args.format == 'hex' else 10)
+        hierarchy = CacheHierarchy([level for level, _ in args.level], [latency for _, latency in args.level],
+                                   args.memory_latency, args.inclusion)
+        hierarchy.run_trace(addresses, ops)
+    except ValueError as e:
+        parser.error(str(e))
+    except OSError as e:
+        print(f"File error: {e}", file=sys.stderr)
+        return 1
+
+    stats = hierarchy.get_stats()
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        print()
+        return
+    for level in stats['levels']:
+        print(f"{level['level']}: {level['hits']} hits, {level['misses']} misses, "
+              f"hit rate {level['hit_rate'] * 100:.2f}%, latency {level['latency']}, "
+              f"{level['writebacks']} writebacks, {level['bytes_transferred']} bytes to the next level")
+    print(f"Memory: {stats['memory_accesses']} accesses, latency {args.memory_latency}")
+    if stats['back_invalidations']:
+        print(f"Back-invalidations: {stats['back_invalidations']}")
+    print(f"AMAT: {stats['amat']:.2f} cycles")
+
+if __name__ == "__main__":
+    main()
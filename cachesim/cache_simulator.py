@@ -0,0 +1,434 @@
+import numpy as np
+from .cache_state import CacheState
+from .trace_loader import OP_READ, OP_WRITE
+
+# Accesses simulated per vectorized step of run_trace (bounds temporary memory)
+TRACE_CHUNK_SIZE = 1 << 22
+# Ways per set of a Set-Associative cache unless configured otherwise
+DEFAULT_WAYS = 2
+WRITE_POLICIES = ('Write-Back', 'Write-Through')
+# Bytes sent to the next level by one write-through or write-around store
+WORD_SIZE = 4
+
+class CacheSimulator:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.cache_size = 0
+        self.block_size = 0
+        self.associativity = 'Direct'
+        self.replacement_policy = 'LRU'
+        # Ways per set for Set-Associative; Direct is 1 way and Fully-Associative is cache_size ways
+        self.ways = DEFAULT_WAYS
+        # Seed for randomized replacement policies
+        self.seed = 0
+        # Write handling: write-back marks lines dirty and writes them out on
+        # eviction, write-through sends every store on; without write-allocate
+        # a store that misses goes around the cache
+        self.write_policy = 'Write-Back'
+        self.write_allocate = True
+        self.word_size = WORD_SIZE
+        self._reset_traffic()
+        # Windowed statistics, recorded only while enable_instrumentation() is in effect
+        self.instrumentation = None
+        # profiling.Profiler counting this simulator's accesses, set by enable_profiling()
+        self.profiler = None
+        # Packed cache contents, built lazily on the first access so the
+        # configuration can be set after reset()
+        self.state = None
+
+    def reset(self):
+        self.state = None
+        self.hits = 0
+        self.misses = 0
+        self._reset_traffic()
+        if self.instrumentation is not None:
+            self.instrumentation.reset()
+
+    def _reset_traffic(self):
+        self.writes = 0
+        self.writebacks = 0       # Dirty blocks written to the next level
+        self.write_throughs = 0   # Stores passed on by write-through
+        self.write_arounds = 0    # Store misses not allocated
+        self.clean_write_hits = 0 # Store hits on clean lines (coherence upgrades under MSI)
+
+    def get_ways(self):
+        """Return the ways per set: 1 for Direct, cache_size for Fully-Associative"""
+        if self.associativity == 'Direct':
+            return 1
+        if self.associativity == 'Set-Associative':
+            return max(1, min(int(self.ways), self.cache_size))
+        return self.cache_size
+
+    def get_geometry(self):
+        """Return (num_sets, ways) for the configured associativity
+
+        Lines left over when cache_size is not a multiple of the ways are unused.
+        """
+        ways = self.get_ways()
+        return self.cache_size // ways, ways
+
+    def _build_state(self):
+        if self.write_policy not in WRITE_POLICIES:
+            raise ValueError(f"Unknown write policy {self.write_policy!r}")
+        num_sets, ways = self.get_geometry()
+        self.state = CacheState(num_sets, ways, self.replacement_policy, self.seed)
+        if self.instrumentation is not None:
+            self.instrumentation.reset(num_sets, num_sets * ways)
+        return self.state
+
+    def enable_instrumentation(self, window_size=None, capacity=None, classify=False):
+        """Start recording windowed hit rates and per-set misses
+
+        Statistics restart from the current access. Until this is called no
+        access pays for them: the instrumented access_memory is only swapped
+        in here. Misses are split into 3C classes only when classify is set,
+        which costs a shadow cache update per access, and only from a cold
+        cache: after earlier accesses the recorder is marked warm instead.
+
+        Returns:
+            Instrumentation: The recorder, also kept as self.instrumentation
+        """
+        from .instrumentation import DEFAULT_WINDOW_CAPACITY, DEFAULT_WINDOW_SIZE, Instrumentation
+        self.instrumentation = Instrumentation(window_size or DEFAULT_WINDOW_SIZE,
+                                               capacity or DEFAULT_WINDOW_CAPACITY, classify)
+        if self.state is not None:
+            self.instrumentation.reset(self.state.num_sets, self.state.num_sets * self.state.ways)
+        self.instrumentation.warm = self.hits + self.misses > 0
+        self.access_memory = self._access_instrumented
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        self.instrumentation = None
+        self.__dict__.pop('access_memory', None)
+        if '_access' in self.__dict__:
+            self.access_memory = self._access
+
+    def enable_profiling(self, profiler=None):
+        """Count hits, misses, evictions, writebacks and set scan lengths into a profiling.Profiler
+
+        Uses the active profiler when none is given, and does nothing when
+        profiling is off. As with instrumentation, the counting access is
+        only swapped in here; the batch paths pick it up through _access.
+        """
+        from .profiling import active_profiler, count_accesses
+        profiler = profiler or active_profiler()
+        if profiler is None:
+            return
+        self.profiler = profiler
+        self._access = count_accesses(self, profiler)
+        if self.instrumentation is None:
+            self.access_memory = self._access
+
+    def disable_profiling(self):
+        self.profiler = None
+        self.__dict__.pop('_access', None)
+        if self.instrumentation is None:
+            self.__dict__.pop('access_memory', None)
+
+    def access_memory(self, address, op=OP_READ):
+        """Simulate one access and return True on a hit
+
+        op is one of the trace_loader OP_* codes; only OP_WRITE differs from a
+        read. The set is found directly from the block address and searched in
+        O(ways) (O(1) through the block index for wide sets), so the cost of an
+        access does not grow with the cache size.
+        """
+        state = self.state
+        if state is None:
+            state = self._build_state()
+
+        # Calculate block address and the set it maps to
+        block_address = address // self.block_size
+        set_index = block_address % state.num_sets
+        write = op == OP_WRITE
+        if write:
+            self.writes += 1
+
+        if state.ways == 1:
+            # Direct mapping: the set is the line
+            if state.valid[set_index] and state.tags[set_index] == block_address:
+                self.hits += 1
+                if write:
+                    if not state.dirty[set_index]:
+                        self.clean_write_hits += 1
+                    self._write(state, set_index)
+                return True
+            self.misses += 1
+            if write and not self.write_allocate:
+                self.write_arounds += 1
+                return False
+            if state.valid[set_index]:
+                state.evicted_block = state.tags[set_index]
+                state.evicted_dirty = state.dirty[set_index]
+                if state.evicted_dirty:
+                    self.writebacks += 1
+                    state.dirty[set_index] = 0
+            else:
+                state.evicted_block = -1
+                state.evicted_dirty = 0
+            state.tags[set_index] = block_address
+            state.valid[set_index] = 1
+            if write:
+                self._write(state, set_index)
+            return False
+
+        if state.index is not None:
+            line = state.index.find(block_address)
+        else:
+            # Scan the set's ways
+            tags = state.tags
+            valid = state.valid
+            base = set_index * state.ways
+            line = -1
+            for way_line in range(base, base + state.ways):
+                if tags[way_line] == block_address and valid[way_line]:
+                    line = way_line
+                    break
+        if line >= 0:
+            self.hits += 1
+            if state.on_hit is not None:
+                state.on_hit(set_index, line)
+            if write:
+                if not state.dirty[line]:
+                    self.clean_write_hits += 1
+                self._write(state, line)
+            return True
+
+        # Miss: fill a free line or evict the replacement policy's victim
+        self.misses += 1
+        if write and not self.write_allocate:
+            self.write_arounds += 1
+            return False
+        line = state.allocate(set_index, block_address)
+        if state.evicted_dirty:
+            self.writebacks += 1
+        if write:
+            self._write(state, line)
+        return False
+
+    # Uninstrumented access, used by the batch paths and by _access_instrumented
+    # (replaced per instance while profiling)
+    _access = access_memory
+
+    def _access_instrumented(self, address, op=OP_READ):
+        hit = self._access(address, op)
+        block_address = address // self.block_size
+        self.instrumentation.record_one(block_address, block_address % self.state.num_sets, hit)
+        return hit
+
+    def _write(self, state, line):
+        """Apply a store to a resident line"""
+        if self.write_policy == 'Write-Back':
+            state.dirty[line] = 1
+        else:
+            self.write_throughs += 1
+
+    def _read_only(self, state, ops):
+        """True when a chunk can take the vectorized direct-mapped path
+
+        That path only models reads of clean lines, so it is skipped for
+        chunks with stores and for caches holding dirty lines.
+        """
+        if state.ways != 1:
+            return False
+        if ops is not None and np.any(ops == OP_WRITE):
+            return False
+        return 1 not in state.dirty
+
+    def run_trace(self, addresses, ops=None):
+        """Simulate a whole trace of addresses and return the number of hits
+
+        ops optionally gives the OP_* code of every access (all reads when
+        None). Direct-mapped caches run reads with vectorized NumPy
+        operations in chunks; everything else falls back to access_memory().
+        """
+        addresses = np.asarray(addresses, dtype=np.int64)
+        state = self.state
+        if state is None:
+            state = self._build_state()
+        if ops is not None:
+            ops = np.asarray(ops, dtype=np.uint8)
+        if self.instrumentation is not None:
+            return int(np.count_nonzero(self.run_trace_hits(addresses, ops)))
+
+        hits = 0
+        if self._read_only(state, ops):
+            for start in range(0, len(addresses), TRACE_CHUNK_SIZE):
+                hits += self._run_direct_chunk(addresses[start:start + TRACE_CHUNK_SIZE], state)
+            self.hits += hits
+            self.misses += len(addresses) - hits
+            if self.profiler is not None:
+                self.profiler.counters['vectorized'] += len(addresses)
+        elif ops is None:
+            access_memory = self._access
+            for start in range(0, len(addresses), TRACE_CHUNK_SIZE):
+                for address in addresses[start:start + TRACE_CHUNK_SIZE].tolist():
+                    hits += access_memory(address)
+        else:
+            access_memory = self._access
+            for start in range(0, len(addresses), TRACE_CHUNK_SIZE):
+                end = start + TRACE_CHUNK_SIZE
+                for address, op in zip(addresses[start:end].tolist(), ops[start:end].tolist()):
+                    hits += access_memory(address, op)
+        return hits
+
+    def run_trace_hits(self, addresses, ops=None):
+        """Simulate a trace like run_trace() and return a bool array marking its hits
+
+        Used to pass only the misses on to the next cache level.
+        """
+        addresses = np.asarray(addresses, dtype=np.int64)
+        state = self.state
+        if state is None:
+            state = self._build_state()
+        if ops is not None:
+            ops = np.asarray(ops, dtype=np.uint8)
+
+        if self._read_only(state, ops):
+            hit_mask = np.empty(len(addresses), dtype=bool)
+            for start in range(0, len(addresses), TRACE_CHUNK_SIZE):
+                self._run_direct_chunk(addresses[start:start + TRACE_CHUNK_SIZE], state,
+                                       hit_mask[start:start + TRACE_CHUNK_SIZE])
+            hits = int(np.count_nonzero(hit_mask))
+            self.hits += hits
+            self.misses += len(addresses) - hits
+            if self.profiler is not None:
+                self.profiler.counters['vectorized'] += len(addresses)
+        else:
+            access_memory = self._access
+            hits = bytearray(len(addresses))
+            if ops is None:
+                ops = np.zeros(len(addresses), dtype=np.uint8)
+            for position, (address, op) in enumerate(zip(addresses.tolist(), ops.tolist())):
+                if access_memory(address, op):
+                    hits[position] = 1
+            hit_mask = np.frombuffer(hits, dtype=bool)
+        if self.instrumentation is not None:
+            self.instrumentation.record(addresses // self.block_size, hit_mask)
+        return hit_mask
+
+    def _run_direct_chunk(self, addresses, state, hit_mask=None):
+        """Vectorized direct-mapped simulation of one chunk; returns its hit count
+
+        An access hits when the previous access to the same line used the same
+        block, or, for the first access to a line in the chunk, when the line
+        already holds that block. When hit_mask is given it receives the hit
+        flag of every access in trace order.
+        """
+        if len(addresses) == 0:
+            return 0
+        blocks = addresses // self.block_size
+        lines = blocks % state.num_sets
+        # A stable sort groups the accesses by line while keeping trace order.
+        # NumPy radix-sorts 16-bit keys, so line numbers are sorted 16 bits at
+        # a time (least significant digit first) instead of as 64-bit values.
+        order = np.argsort((lines & 0xFFFF).astype(np.uint16), kind='stable')
+        if state.num_sets > 1 << 16:
+            high = (lines[order] >> 16).astype(np.uint16 if state.num_sets <= 1 << 32 else np.int64)
+            order = order[np.argsort(high, kind='stable')]
+        lines = lines[order]
+        blocks = blocks[order]
+
+        tags = np.frombuffer(state.tags, dtype=np.int64)
+        valid = np.frombuffer(state.valid, dtype=np.uint8)
+        first = np.empty(len(lines), dtype=bool)
+        first[0] = True
+        np.not_equal(lines[1:], lines[:-1], out=first[1:])
+
+        first_lines = lines[first]
+        if hit_mask is None:
+            hits = np.count_nonzero(~first[1:] & (blocks[1:] == blocks[:-1]))
+            hits += np.count_nonzero((valid[first_lines] != 0) & (tags[first_lines] == blocks[first]))
+        else:
+            sorted_hits = np.empty(len(lines), dtype=bool)
+            np.logical_and(~first[1:], blocks[1:] == blocks[:-1], out=sorted_hits[1:])
+            sorted_hits[first] = (valid[first_lines] != 0) & (tags[first_lines] == blocks[first])
+            hit_mask[order] = sorted_hits
+            hits = np.count_nonzero(sorted_hits)
+
+        # The last access to each line leaves its block resident
+        last = np.empty(len(lines), dtype=bool)
+        last[-1] = True
+        last[:-1] = first[1:]
+        tags[lines[last]] = blocks[last]
+        valid[lines[last]] = 1
+        return int(hits)
+
+    def invalidate(self, address, writeback=True):
+        """Drop the block holding address if it is resident; return True if it was
+
+        A dirty block is written back first, unless writeback is False because
+        the caller moves the block to another cache; its dirty bit is then
+        left in state.evicted_dirty for the caller to carry along.
+        """
+        state = self.state
+        if state is None:
+            return False
+        block_address = address // self.block_size
+        if state.invalidate(block_address, block_address % state.num_sets) < 0:
+            return False
+        if writeback and state.evicted_dirty:
+            self.writebacks += 1
+            if self.profiler is not None:
+                self.profiler.counters['writeback'] += 1
+        return True
+
+    def insert(self, address, dirty=False):
+        """Place the block holding address without counting an access
+
+        A dirty block (moved here from another cache) is marked dirty, so it
+        is written back when evicted.
+
+        Returns:
+            int: Block address evicted to make room, or -1; the evicted
+                block's dirty bit is left in state.evicted_dirty
+        """
+        state = self.state
+        if state is None:
+            state = self._build_state()
+        block_address = address // self.block_size
+        set_index = block_address % state.num_sets
+        line = state.find(block_address, set_index)
+        if line >= 0:
+            state.touch(set_index, line)
+            state.dirty[line] |= dirty
+            state.evicted_dirty = 0
+            return -1
+        line = state.allocate(set_index, block_address)
+        if dirty:
+            state.dirty[line] = 1
+        if state.evicted_dirty:
+            self.writebacks += 1
+            if self.profiler is not None:
+                self.profiler.counters['writeback'] += 1
+        return state.evicted_block
+
+    def cache_contents(self):
+        """Return the resident (cache line, block address) pairs ordered by line"""
+        if self.state is None:
+            return []
+        return list(self.state.resident_lines())
+
+    def get_hit_rate(self):
+        total = self.hits + self.misses
+        return (self.hits / total) if total > 0 else 0
+
+    def get_traffic(self):
+        """Return writeback counts and the bytes moved to and from the next level
+
+        Every allocated miss reads a block; writebacks write a block, and
+        write-through and write-around stores write one word each.
+        """
+        bytes_read = (self.misses - self.write_arounds) * self.block_size
+        bytes_written = (self.writebacks * self.block_size
+                         + (self.write_throughs + self.write_arounds) * self.word_size)
+        return {
+            'writes': self.writes,
+            'writebacks': self.writebacks,
+            'write_throughs': self.write_throughs,
+            'write_arounds': self.write_arounds,
+            'bytes_read': bytes_read,
+            'bytes_written': bytes_written,
+            'bytes_transferred': bytes_read + bytes_written,
+        }
@@ -0,0 +1,236 @@
+from array import array
+from .replacement_policies import make_policy
+
+# Sets wider than this are looked up through a hash index instead of a tag scan
+INDEX_MIN_WAYS = 16
+
+class BlockIndex:
+    """Open-addressing hash table from block address to cache line
+
+    Slots hold line numbers (-1 when empty) and keys are read back from the
+    shared tag array, so the table costs 4 bytes per slot and inserting or
+    removing a block never allocates.
+    """
+
+    def __init__(self, tags, num_lines):
+        self.tags = tags
+        size = 1
+        while size < 2 * num_lines:
+            size *= 2
+        self.mask = size - 1
+        self.table = array('i', [-1]) * size
+
+    def find(self, block):
+        """Return the line holding block, or -1"""
+        table = self.table
+        tags = self.tags
+        mask = self.mask
+        slot = (block * 0x9E3779B1 >> 16) & mask
+        line = table[slot]
+        while line >= 0:
+            if tags[line] == block:
+                return line
+            slot = (slot + 1) & mask
+            line = table[slot]
+        return -1
+
+    def insert(self, block, line):
+        table = self.table
+        mask = self.mask
+        slot = (block * 0x9E3779B1 >> 16) & mask
+        while table[slot] >= 0:
+            slot = (slot + 1) & mask
+        table[slot] = line
+
+    def remove(self, block):
+        table = self.table
+        tags = self.tags
+        mask = self.mask
+        slot = (block * 0x9E3779B1 >> 16) & mask
+        while tags[table[slot]] != block:
+            slot = (slot + 1) & mask
+        # Backward-shift deletion keeps every probe chain unbroken without tombstones
+        hole = slot
+        while True:
+            slot = (slot + 1) & mask
+            line = table[slot]
+            if line < 0:
+                break
+            home = (tags[line] * 0x9E3779B1 >> 16) & mask
+            if (hole < slot and hole < home <= slot) or (hole > slot and (home > hole or home <= slot)):
+                continue
+            table[hole] = line
+            hole = slot
+        table[hole] = -1
+
+
+class CacheState:
+    """Packed cache contents held in preallocated buffers sized from the cache geometry
+
+    Line ``set_index * ways + way`` stores its block address in ``tags`` and its
+    valid and dirty bits in ``valid`` and ``dirty``. Victim selection is delegated to a replacement
+    policy from replacement_policies, which keeps its own per-set state; a
+    direct-mapped cache has nothing to choose and needs none. A line costs 10
+    bytes plus the policy's share (8 for LRU and FIFO, 1/8 for tree-PLRU) and
+    8 for the hash index used by wide sets, so a 1M-line cache stays within
+    tens of megabytes.
+    """
+
+    def __init__(self, num_sets, ways, policy='LRU', seed=0):
+        self.num_sets = num_sets
+        self.ways = ways
+        self.num_lines = num_lines = num_sets * ways
+        self.tags = array('q', bytes(8 * num_lines))
+        self.valid = bytearray(num_lines)
+        self.dirty = bytearray(num_lines)
+        self.occupancy = array('i', bytes(4 * num_sets))
+        self.index = BlockIndex(self.tags, num_lines) if ways > INDEX_MIN_WAYS else None
+        self.policy = make_policy(policy, num_sets, ways, seed) if ways > 1 else None
+        # Bound policy hooks; on_hit is None when hits do not affect replacement
+        self.on_hit = self.policy.on_hit if self.policy is not None and self.policy.tracks_hits else None
+        self.on_fill = self.policy.on_fill if self.policy is not None else None
+        self.victim = self.policy.victim if self.policy is not None else None
+        self.evicted_block = -1
+        self.evicted_dirty = 0
+        # Per-set lists of invalidated lines, created by the first invalidate()
+        self.free_head = None
+        self.free_next = None
+
+    def find(self, block, set_index):
+        """Return the line holding block in its set, or -1 on a miss"""
+        if self.index is not None:
+            return self.index.find(block)
+        tags = self.tags
+        valid = self.valid
+        base = set_index * self.ways
+        for line in range(base, base + self.ways):
+            if valid[line] and tags[line] == block:
+                return line
+        return -1
+
+    def touch(self, set_index, line):
+        """Report a hit on line to the replacement policy"""
+        if self.on_hit is not None:
+            self.on_hit(set_index, line)
+
+    def allocate(self, set_index, block):
+        """Place block in its set and return the line used
+
+        Never-used lines are filled first, then invalidated ones; the policy's
+        victim is evicted when the set is full. The evicted block address is
+        left in ``evicted_block`` (-1 when a free line was used) and its dirty
+        bit in ``evicted_dirty``; the new line starts clean.
+        """
+        tags = self.tags
+        index = self.index
+        occupancy = self.occupancy[set_index]
+        # Direct-mapped lines are also filled in place by the simulator's fast
+        # paths, so their occupancy is not tracked and validity decides instead
+        if occupancy < self.ways and self.policy is not None:
+            line = set_index * self.ways + occupancy
+            self.occupancy[set_index] = occupancy + 1
+            self.valid[line] = 1
+            self.evicted_block = -1
+            self.evicted_dirty = 0
+        else:
+            if self.free_head is not None and self.free_head[set_index] >= 0:
+                line = self.free_head[set_index]
+                self.free_head[set_index] = self.free_next[line]
+            elif self.victim is not None:
+                line = self.victim(set_index)
+            else:
+                line = set_index
+            if self.valid[line]:
+                self.evicted_block = tags[line]
+                self.evicted_dirty = self.dirty[line]
+                self.dirty[line] = 0
+                if index is not None:
+                    index.remove(tags[line])
+            else:
+                self.evicted_block = -1
+                self.evicted_dirty = 0
+                self.valid[line] = 1
+        tags[line] = block
+        if index is not None:
+            index.insert(block, line)
+        if self.on_fill is not None:
+            self.on_fill(set_index, line)
+        return line
+
+    def invalidate(self, block, set_index):
+        """Drop block from its set without replacing it; return its line or -1 if absent
+
+        The line's dirty bit is moved to ``evicted_dirty``.
+        """
+        line = self.find(block, set_index)
+        if line < 0:
+            return -1
+        self.valid[line] = 0
+        self.evicted_dirty = self.dirty[line]
+        self.dirty[line] = 0
+        if self.index is not None:
+            self.index.remove(block)
+        if self.policy is not None:
+            self.policy.remove(set_index, line)
+            if self.free_head is None:
+                self.free_head = array('i', [-1]) * self.num_sets
+                self.free_next = array('i', [-1]) * self.num_lines
+            self.free_next[line] = self.free_head[set_index]
+            self.free_head[set_index] = line
+        return line
+
+    def resident_lines(self):
+        """Yield (line, block address) for every valid line in line order"""
+        tags = self.tags
+        valid = self.valid
+        for line in range(self.num_lines):
+            if valid[line]:
+                yield line, tags[line]
+
+    def buffers(self):
+        """Return every state buffer by name, for checkpoints
+
+        The policy's buffers are prefixed with 'policy.'.
+        """
+        buffers = {'tags': self.tags, 'valid': self.valid, 'dirty': self.dirty, 'occupancy': self.occupancy}
+        if self.index is not None:
+            buffers['index'] = self.index.table
+        if self.free_head is not None:
+            buffers['free_head'] = self.free_head
+            buffers['free_next'] = self.free_next
+        if self.policy is not None:
+            for name, buffer in self.policy.buffers().items():
+                buffers[f'policy.{name}'] = buffer
+        return buffers
+
+    def restore(self, buffers):
+        """Overwrite the state in place from {name: raw bytes} as written from buffers()"""
+        if 'free_head' in buffers and self.free_head is None:
+            self.free_head = array('i', [-1]) * self.num_sets
+            self.free_next = array('i', [-1]) * self.num_lines
+        own = self.buffers()
+        policy_buffers = {}
+        for name, data in buffers.items():
+            if name.startswith('policy.'):
+                policy_buffers[name[len('policy.'):]] = data
+                continue
+            target = own.get(name)
+            if target is None or memoryview(target).nbytes != len(data):
+                raise ValueError(f"Checkpoint buffer {name!r} does not match the cache geometry")
+            memoryview(target).cast('B')[:] = data
+        if policy_buffers:
+            if self.policy is None:
+                raise ValueError("Checkpoint has replacement state for a cache without a policy")
+            self.policy.restore(policy_buffers)
+
+    def nbytes(self):
+        """Return the memory held by the state buffers in bytes"""
+        total = sum(buf.itemsize * len(buf) for buf in (self.tags, self.occupancy))
+        total += len(self.valid) + len(self.dirty)
+        if self.index is not None:
+            total += self.index.table.itemsize * len(self.index.table)
+        if self.policy is not None:
+            total += self.policy.nbytes()
+        if self.free_head is not None:
+            total += self.free_head.itemsize * len(self.free_head) + self.free_next.itemsize * len(self.free_next)
+        return total
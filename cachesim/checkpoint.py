@@ -0,0 +1,136 @@
+import json
+import os
+import struct
+from .cache_simulator import CacheSimulator
+from .profiling import stage
+
+# File signature and format version
+MAGIC = b'CSIMCKPT'
+VERSION = 1
+# Signature, version and the length of the JSON header that follows
+PREAMBLE = struct.Struct('<8sII')
+CONFIG_FIELDS = ('cache_size', 'block_size', 'associativity', 'replacement_policy', 'ways', 'seed',
+                 'write_policy', 'write_allocate', 'word_size')
+COUNTER_FIELDS = ('hits', 'misses', 'writes', 'writebacks', 'write_throughs', 'write_arounds',
+                  'clean_write_hits')
+
+def save_checkpoint(simulator, path, position=None):
+    """Write the simulator's configuration, counters and packed cache state to path
+
+    The file is a short JSON header followed by the raw state buffers (cache
+    lines, block index, replacement metadata), so saving costs about one
+    memory copy of the state. It is written to a temporary file and renamed,
+    so an interrupted save leaves the previous checkpoint intact.
+
+    Args:
+        position (int): Accesses of the trace consumed so far (defaults to
+            hits + misses, right for a single trace simulated from cold)
+    """
+    state = simulator.state
+    if state is None:
+        state = simulator._build_state()
+    buffers = state.buffers()
+    header = {
+        'config': {name: getattr(simulator, name) for name in CONFIG_FIELDS},
+        'counters': {name: getattr(simulator, name) for name in COUNTER_FIELDS},
+        'position': simulator.hits + simulator.misses if position is None else position,
+        'buffers': [[name, memoryview(buffer).nbytes] for name, buffer in buffers.items()],
+    }
+    encoded = json.dumps(header).encode()
+
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+        f.write(encoded)
+        for buffer in buffers.values():
+            f.write(memoryview(buffer).cast('B'))
+    os.replace(temporary, path)
+
+def read_checkpoint(path):
+    """Parse a checkpoint file
+
+    Returns:
+        tuple: (header dict, {buffer name: memoryview of its bytes})
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < PREAMBLE.size:
+        raise ValueError(f"{path} is not a cache checkpoint")
+    magic, version, header_size = PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a cache checkpoint")
+    if version != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version}")
+    offset = PREAMBLE.size + header_size
+    header = json.loads(data[PREAMBLE.size:offset])
+    view = memoryview(data)
+    buffers = {}
+    for name, size in header['buffers']:
+        buffers[name] = view[offset:offset + size]
+        offset += size
+    if offset != len(data):
+        raise ValueError(f"{path} is truncated or corrupt")
+    return header, buffers
+
+def restore_checkpoint(simulator, path):
+    """Configure simulator from a checkpoint and restore its counters and cache state
+
+    Returns:
+        int: Trace position the checkpoint was taken at
+    """
+    header, buffers = read_checkpoint(path)
+    simulator.reset()
+    for name, value in header['config'].items():
+        setattr(simulator, name, value)
+    simulator._build_state().restore(buffers)
+    for name, value in header['counters'].items():
+        setattr(simulator, name, value)
+    if simulator.instrumentation is not None:
+        # The restored blocks' history is not in the checkpoint
+        simulator.instrumentation.warm = True
+    return header['position']
+
+def load_checkpoint(path):
+    """Return (new CacheSimulator restored from path, trace position)"""
+    simulator = CacheSimulator()
+    position = restore_checkpoint(simulator, path)
+    return simulator, position
+
+def skip_accesses(records, count):
+    """Drop the first count accesses from an iterator of (addresses, ops) chunks"""
+    for addresses, ops in records:
+        if count >= len(addresses):
+            count -= len(addresses)
+            continue
+        if count:
+            addresses = addresses[count:]
+            ops = ops[count:] if ops is not None else None
+            count = 0
+        yield addresses, ops
+
+def run_with_checkpoints(simulator, records, path, every, position=0):
+    """Simulate (addresses, ops) chunks, saving a checkpoint every `every` accesses and at the end
+
+    Args:
+        position (int): Trace position of the first access in records
+
+    Returns:
+        int: Trace position after the last access
+    """
+    due = (position // every + 1) * every if every else None
+    for addresses, ops in records:
+        start = 0
+        while due is not None and position + len(addresses) - start >= due:
+            end = start + due - position
+            with stage('simulate'):
+                simulator.run_trace(addresses[start:end], ops[start:end] if ops is not None else None)
+            position = due
+            start = end
+            save_checkpoint(simulator, path, position)
+            due += every
+        if start < len(addresses):
+            with stage('simulate'):
+                simulator.run_trace(addresses[start:], ops[start:] if ops is not None else None)
+            position += len(addresses) - start
+    save_checkpoint(simulator, path, position)
+    return position
@@ -0,0 +1,238 @@
+from collections import OrderedDict
+import numpy as np
+
+# Accesses per window unless configured otherwise
+DEFAULT_WINDOW_SIZE = 1024
+# Windows kept in the ring buffer; older ones are overwritten
+DEFAULT_WINDOW_CAPACITY = 4096
+# Bits of the filter of blocks seen so far (8 MiB), allocated only when classifying
+SEEN_FILTER_BITS = 1 << 26
+# Multiplicative hash spreading block addresses over the filter
+SEEN_HASH = 0x9E3779B97F4A7C15
+SEEN_SHIFT = 64 - SEEN_FILTER_BITS.bit_length() + 1
+
+class Instrumentation:
+    """Windowed hit/miss counts, per-set misses and 3C miss classification
+
+    Hits and misses are counted per window of window_size accesses into a
+    preallocated ring buffer holding the last `capacity` windows. Misses are
+    also counted per cache set. These counts are cheap and always kept.
+
+    When classify is set, misses are also split by the 3C model against a
+    shadow fully-associative LRU cache with the same number of lines:
+
+        compulsory: first access to the block
+        capacity: the shadow cache misses too
+        conflict: the shadow cache would have hit
+
+    The shadow cache is updated access by access, which makes a batch run
+    many times slower, so classification is opt-in. First accesses are
+    found with a fixed-size hashed bit filter rather than a set of every
+    block, so memory stays bounded; a new block whose bit is already taken
+    is counted as a capacity miss, which happens for about one in
+    SEEN_FILTER_BITS / distinct blocks (1.5% at a million blocks).
+
+    Classes need the whole history of the cache: when recording starts on a
+    warm cache (a restored checkpoint, or accesses made before), `warm` is
+    set and no classes are kept, since a block seen only before the start
+    would be taken for a compulsory miss.
+
+    CacheSimulator feeds whole hit masks through record() and single
+    accesses through record_one(); it only does either while instrumentation
+    is enabled.
+    """
+
+    def __init__(self, window_size=DEFAULT_WINDOW_SIZE, capacity=DEFAULT_WINDOW_CAPACITY, classify=False):
+        if window_size <= 0 or capacity <= 0:
+            raise ValueError("Window size and capacity must be positive integers")
+        self.window_size = window_size
+        self.capacity = capacity
+        self.classify = classify
+        self.window_hits = np.zeros(capacity, dtype=np.int64)
+        self.window_misses = np.zeros(capacity, dtype=np.int64)
+        self.reset()
+
+    def reset(self, num_sets=0, num_lines=0):
+        """Clear every count, sizing the per-set counters and shadow cache for a new geometry"""
+        self.window_hits[:] = 0
+        self.window_misses[:] = 0
+        self.windows = 0          # Completed windows, including overwritten ones
+        self.current_hits = 0
+        self.current_misses = 0
+        self.num_sets = num_sets
+        self.set_misses = np.zeros(num_sets, dtype=np.int64)
+        self.num_lines = num_lines
+        self.shadow = OrderedDict()
+        # Bit filter of the blocks accessed so far
+        self.seen = np.zeros(SEEN_FILTER_BITS // 8, dtype=np.uint8) if self.classify else None
+        self.compulsory = 0
+        self.capacity_misses = 0
+        self.conflict = 0
+        # Set when the cache already held blocks as recording started; cleared with it
+        self.warm = False
+
+    def record_one(self, block, set_index, hit):
+        """Record a single access"""
+        if hit:
+            self.current_hits += 1
+        else:
+            self.current_misses += 1
+            self.set_misses[set_index] += 1
+        if self.current_hits + self.current_misses == self.window_size:
+            self._close_window()
+        if self.classify and not self.warm:
+            self._classify(block, hit)
+
+    def record(self, blocks, hit_mask):
+        """Record a batch of accesses given their block addresses and hit flags"""
+        n = len(hit_mask)
+        if n == 0:
+            return
+        hit_mask = np.asarray(hit_mask, dtype=bool)
+        if self.num_sets:
+            misses = blocks[~hit_mask] % self.num_sets
+            self.set_misses += np.bincount(misses, minlength=self.num_sets)
+
+        # Top up the open window, then fill whole windows, then open the next one
+        position = 0
+        open_count = self.current_hits + self.current_misses
+        if open_count:
+            take = min(self.window_size - open_count, n)
+            hits = int(np.count_nonzero(hit_mask[:take]))
+            self.current_hits += hits
+            self.current_misses += take - hits
+            position = take
+            if self.current_hits + self.current_misses == self.window_size:
+                self._close_window()
+        whole = (n - position) // self.window_size
+        if whole:
+            end = position + whole * self.window_size
+            hits = np.count_nonzero(hit_mask[position:end].reshape(whole, self.window_size), axis=1)
+            self._close_windows(hits, self.window_size - hits)
+            position = end
+        if position < n:
+            hits = int(np.count_nonzero(hit_mask[position:]))
+            self.current_hits += hits
+            self.current_misses += n - position - hits
+
+        if self.classify and not self.warm:
+            self._classify_batch(blocks, hit_mask)
+
+    def _first_accesses(self, blocks):
+        """Flag the accesses whose filter bit was unset, in trace order, and set the bits"""
+        slots = (np.asarray(blocks).astype(np.uint64) * np.uint64(SEEN_HASH)) >> np.uint64(SEEN_SHIFT)
+        unique, first = np.unique(slots, return_index=True)
+        masks = np.left_shift(1, unique & 7).astype(np.uint8)
+        new = self.seen[unique >> 3] & masks == 0
+        flags = np.zeros(len(slots), dtype=bool)
+        flags[first[new]] = True
+        np.bitwise_or.at(self.seen, unique[new] >> 3, masks[new])
+        return flags
+
+    def _classify_batch(self, blocks, hit_mask):
+        # _classify() inlined, with the counters in locals; first accesses are found up front
+        first = self._first_accesses(blocks)
+        shadow = self.shadow
+        move_to_end = shadow.move_to_end
+        popitem = shadow.popitem
+        num_lines = self.num_lines
+        compulsory = capacity = conflict = 0
+        for block, hit, new in zip(blocks.tolist(), hit_mask.tolist(), first.tolist()):
+            if block in shadow:
+                move_to_end(block)
+                if not hit:
+                    conflict += 1
+                continue
+            shadow[block] = None
+            if len(shadow) > num_lines:
+                popitem(last=False)
+            if not hit:
+                if new:
+                    compulsory += 1
+                else:
+                    capacity += 1
+        self.compulsory += compulsory
+        self.capacity_misses += capacity
+        self.conflict += conflict
+
+    def _classify(self, block, hit):
+        slot = (block * SEEN_HASH & 0xFFFFFFFFFFFFFFFF) >> SEEN_SHIFT
+        seen = self.seen
+        new = not seen[slot >> 3] >> (slot & 7) & 1
+        if new:
+            seen[slot >> 3] |= 1 << (slot & 7)
+        shadow = self.shadow
+        if block in shadow:
+            shadow.move_to_end(block)
+            if not hit:
+                self.conflict += 1
+            return
+        shadow[block] = None
+        if len(shadow) > self.num_lines:
+            shadow.popitem(last=False)
+        if not hit:
+            if new:
+                self.compulsory += 1
+            else:
+                self.capacity_misses += 1
+
+    def _close_window(self):
+        slot = self.windows % self.capacity
+        self.window_hits[slot] = self.current_hits
+        self.window_misses[slot] = self.current_misses
+        self.windows += 1
+        self.current_hits = 0
+        self.current_misses = 0
+
+    def _close_windows(self, hits, misses):
+        # Only the last `capacity` of a long run of windows survive
+        count = len(hits)
+        keep = min(count, self.capacity)
+        slots = (self.windows + count - keep + np.arange(keep)) % self.capacity
+        self.window_hits[slots] = hits[count - keep:]
+        self.window_misses[slots] = misses[count - keep:]
+        self.windows += count
+
+    def series(self):
+        """Return the retained windows in trace order
+
+        Returns:
+            tuple: (index of the first access of each window, hits per
+                window, misses per window); the open window is included last
+                when it holds any accesses
+        """
+        kept = min(self.windows, self.capacity)
+        first = self.windows - kept
+        slots = (first + np.arange(kept)) % self.capacity
+        hits = self.window_hits[slots]
+        misses = self.window_misses[slots]
+        starts = (first + np.arange(kept)) * self.window_size
+        if self.current_hits + self.current_misses:
+            hits = np.append(hits, self.current_hits)
+            misses = np.append(misses, self.current_misses)
+            starts = np.append(starts, self.windows * self.window_size)
+        return starts, hits, misses
+
+    def hit_rates(self):
+        """Return (window start indices, hit rate of each window)"""
+        starts, hits, misses = self.series()
+        totals = hits + misses
+        return starts, np.divide(hits, totals, out=np.zeros(len(totals)), where=totals > 0)
+
+    def miss_classes(self):
+        return {'compulsory': self.compulsory, 'capacity': self.capacity_misses, 'conflict': self.conflict}
+
+    def summary(self):
+        """Counts as plain Python values, for JSON output"""
+        starts, hits, misses = self.series()
+        summary = {
+            'window_size': self.window_size,
+            'window_starts': starts.tolist(),
+            'window_hits': hits.tolist(),
+            'window_misses': misses.tolist(),
+            'set_misses': self.set_misses.tolist(),
+        }
+        if self.classify:
+            # None when the recording started warm
+            summary['miss_classes'] = None if self.warm else self.miss_classes()
+        return summary
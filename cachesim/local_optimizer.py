@@ -0,0 +1,221 @@
+import math
+import numpy as np
+from .cache_simulator import CacheSimulator
+from .parameter_sweep import ASSOCIATIVITIES, POLICIES, run_configs, simulate_config, sweep_grid
+from .trace_loader import parse_records
+
+# Search space; cache sizes stay within the GUI spinbox range
+DEFAULT_CACHE_SIZES = (1, 2, 4, 8, 16, 32, 64)
+DEFAULT_BLOCK_SIZES = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+WAYS_CHOICES = (2, 4, 8)
+# Policies searched by default; the rest are available through the policies argument
+DEFAULT_POLICIES = ('LRU', 'FIFO', 'PLRU')
+# One in HALVING_RATE candidates survives each round
+HALVING_RATE = 3
+# Shortest trace prefix a round is evaluated on
+MIN_PREFIX = 256
+# Simulated accesses allowed per round before the last; longer traces get shorter prefixes
+ROUND_BUDGET = 1 << 17
+# Simulated accesses per round above which the round is spread over worker processes
+PARALLEL_THRESHOLD = 1 << 20
+# Accesses the search holds in memory; longer traces are sampled down to this
+MAX_SEARCH_ACCESSES = 1 << 22
+# Consecutive accesses kept together by the sample, so reuse within a window is preserved
+SAMPLE_WINDOW = 1 << 14
+
+def collect_addresses(access_pattern, limit=MAX_SEARCH_ACCESSES):
+    """Collect an address string, array or iterable of chunks into one int64 array
+
+    Traces longer than limit accesses are sampled as evenly spread windows
+    of SAMPLE_WINDOW consecutive accesses. Chunks are consumed one at a
+    time, so no more than about limit accesses are held at once.
+    """
+    if isinstance(access_pattern, str):
+        access_pattern = parse_records(access_pattern.split())[0]
+    if isinstance(access_pattern, np.ndarray):
+        if len(access_pattern) <= limit:
+            return access_pattern
+        access_pattern = [access_pattern]
+
+    # Keep every stride-th window; when the kept windows outgrow the limit,
+    # drop every other one and double the stride
+    windows = []
+    kept = 0
+    stride = 1
+    index = 0
+    for chunk in access_pattern:
+        chunk = np.asarray(chunk, dtype=np.int64)
+        for start in range(0, len(chunk), SAMPLE_WINDOW):
+            if index % stride == 0:
+                window = chunk[start:start + SAMPLE_WINDOW].copy()
+                windows.append(window)
+                kept += len(window)
+                while kept > limit and len(windows) > 1:
+                    windows = windows[::2]
+                    kept = sum(len(window) for window in windows)
+                    stride *= 2
+            index += 1
+    if not windows:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(windows)
+
+def _capacity(row):
+    return row['cache_size'] * row['block_size']
+
+def _order(row):
+    # Ties go to the smaller, then the simpler configuration
+    return (-row['hit_rate'], _capacity(row), ASSOCIATIVITIES.index(row['associativity']), row['ways'],
+            POLICIES.index(row['replacement_policy']))
+
+def _config(row):
+    return (row['cache_size'], row['block_size'], row['associativity'], row['replacement_policy'], row['ways'])
+
+def pareto_front(rows):
+    """Rows not dominated in (smaller capacity, higher hit rate), smallest capacity first"""
+    front = []
+    for row in sorted(rows, key=lambda row: (_capacity(row),) + _order(row)):
+        if not front or row['hit_rate'] > front[-1]['hit_rate']:
+            front.append(row)
+    return front
+
+def candidate_configs(cache_sizes=DEFAULT_CACHE_SIZES, block_sizes=DEFAULT_BLOCK_SIZES,
+                      associativities=ASSOCIATIVITIES, policies=DEFAULT_POLICIES, ways=WAYS_CHOICES):
+    """Every distinct (cache_size, block_size, associativity, policy, ways) of the search space
+
+    Configurations that build the same cache are simulated once: a
+    direct-mapped cache ignores the replacement policy, and a set-associative
+    cache with a single set is fully associative.
+    """
+    simulator = CacheSimulator()
+    seen = set()
+    configs = []
+    for cache_size, block_size, associativity, policy, way_count in sweep_grid(
+            cache_sizes, block_sizes, associativities, policies, ways):
+        simulator.cache_size = cache_size
+        simulator.associativity = associativity
+        simulator.ways = way_count
+        num_sets, set_ways = simulator.get_geometry()
+        key = (cache_size, block_size, num_sets, set_ways, policy if set_ways > 1 else None)
+        if key not in seen:
+            seen.add(key)
+            configs.append((cache_size, block_size, associativity, policy, way_count))
+    return configs
+
+class LocalOptimizer:
+    """Searches cache configurations by simulating them on the trace itself
+
+    Successive halving: every candidate is simulated on a short prefix of the
+    trace, the dominated and worst ones are dropped, and the survivors are
+    simulated on a prefix HALVING_RATE times longer (within ROUND_BUDGET),
+    until the last round runs on the whole trace.
+
+    The recommendation is deliberately not the configuration with the best
+    hit rate: it is the smallest one (in bytes) whose full-trace hit rate is
+    within tolerance (in hit-rate points) of the best one measured, so a
+    much larger cache is not recommended for a negligible gain.
+    """
+
+    def __init__(self, cache_sizes=DEFAULT_CACHE_SIZES, block_sizes=DEFAULT_BLOCK_SIZES,
+                 associativities=ASSOCIATIVITIES, policies=DEFAULT_POLICIES, ways=WAYS_CHOICES, tolerance=0.01,
+                 max_workers=None):
+        self.configs = candidate_configs(cache_sizes, block_sizes, associativities, policies, ways)
+        self.tolerance = tolerance
+        self.max_workers = max_workers
+
+    def _evaluate(self, addresses, configs):
+        if len(addresses) * len(configs) > PARALLEL_THRESHOLD:
+            return run_configs(addresses, configs, self.max_workers)
+        return [simulate_config(addresses, *config) for config in configs]
+
+    def _select(self, rows, keep):
+        """Keep the best rows, taking whole Pareto layers first so the small configurations survive"""
+        rows = sorted(rows, key=_order)
+        kept = []
+        while rows and len(kept) < keep:
+            front = pareto_front(rows)
+            kept.extend(sorted(front, key=_order)[:keep - len(kept)])
+            front_ids = set(map(id, front))
+            rows = [row for row in rows if id(row) not in front_ids]
+        return kept
+
+    def search(self, addresses):
+        """Run the successive-halving search
+
+        Returns:
+            tuple: (full-trace result rows of the final round, number of simulations run)
+        """
+        total = len(addresses)
+        candidates = list(self.configs)
+        rounds = max(0, math.ceil(math.log(len(candidates), HALVING_RATE)))
+        evaluated = 0
+        for remaining in range(rounds, -1, -1):
+            prefix = total // HALVING_RATE ** remaining
+            if remaining:
+                prefix = min(prefix, ROUND_BUDGET // len(candidates))
+            prefix = min(total, max(MIN_PREFIX, prefix))
+            rows = self._evaluate(addresses[:prefix], candidates)
+            evaluated += len(rows)
+            if prefix == total:
+                return rows, evaluated
+            keep = max(1, math.ceil(len(candidates) / HALVING_RATE))
+            candidates = [_config(row) for row in self._select(rows, keep)]
+        return rows, evaluated
+
+    def recommend(self, access_pattern, current_config=None):
+        """Return the smallest configuration within tolerance of the best hit rate found
+
+        The dict has the keys of an AI recommendation (cache_size, block_size,
+        associativity, replacement_policy, explanations) plus hit_rate,
+        best_hit_rate, tolerance, current_hit_rate, pareto_front and
+        evaluated. The best configuration is the last of pareto_front.
+        """
+        addresses = collect_addresses(access_pattern)
+        if len(addresses) == 0:
+            return {"error": "The access pattern is empty."}
+
+        rows, evaluated = self.search(addresses)
+        front = pareto_front(rows)
+        best_rate = max(row['hit_rate'] for row in front)
+        choice = next(row for row in front if row['hit_rate'] >= best_rate - self.tolerance)
+
+        current = None
+        if current_config:
+            try:
+                current = simulate_config(addresses, int(current_config['cache_size']), int(current_config['block_size']),
+                                          current_config['associativity'], current_config['replacement_policy'],
+                                          int(current_config.get('ways', 2)))
+            except (KeyError, TypeError, ValueError, ZeroDivisionError):
+                current = None
+
+        recommendation = {key: choice[key] for key in ('cache_size', 'block_size', 'associativity', 'ways',
+                                                       'replacement_policy')}
+        recommendation['hit_rate'] = choice['hit_rate']
+        recommendation['best_hit_rate'] = best_rate
+        recommendation['tolerance'] = self.tolerance
+        recommendation['current_hit_rate'] = current['hit_rate'] if current else None
+        recommendation['pareto_front'] = [{key: row[key] for key in ('cache_size', 'block_size', 'associativity', 'ways',
+                                                                     'replacement_policy', 'hit_rate')} for row in front]
+        recommendation['evaluated'] = evaluated
+        recommendation['explanations'] = self._explain(choice, front, best_rate, current, len(addresses), evaluated)
+        return recommendation
+
+    def _explain(self, choice, front, best_rate, current, total, evaluated):
+        capacity = _capacity(choice)
+        measured = f"{choice['hit_rate'] * 100:.2f}% hit rate measured over {total} accesses"
+        if current is not None:
+            measured += f" (current configuration: {current['hit_rate'] * 100:.2f}%)"
+        larger = [row for row in front if _capacity(row) > capacity]
+        if larger:
+            size_reason = (f"Smallest cache within {self.tolerance * 100:g} points of the best hit rate found; "
+                           f"the best, {best_rate * 100:.2f}%, needs {_capacity(larger[-1])} bytes instead of {capacity}.")
+        else:
+            size_reason = f"No configuration searched measured a higher hit rate; {measured}."
+        return {
+            'cache_size': size_reason,
+            'block_size': f"{choice['block_size']}-byte blocks give {choice['cache_size']} lines a capacity of "
+                          f"{capacity} bytes; {measured}.",
+            'associativity': f"Chosen from {evaluated} simulations on growing trace prefixes "
+                             f"({len(self.configs)} distinct configurations, dominated ones dropped each round).",
+            'replacement_policy': ("Does not matter for a direct-mapped cache." if choice['associativity'] == 'Direct'
+                                   else "Measured best for this trace at this geometry."),
+        }
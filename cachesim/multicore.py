@@ -0,0 +1,385 @@
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .cache_simulator import CacheSimulator, DEFAULT_WAYS
+from .replacement_policies import REPLACEMENT_POLICIES
+from .trace_loader import OP_READ, OP_WRITE, load_core_trace, parse_core_records
+
+COHERENCE_PROTOCOLS = ('MSI', 'MESI')
+# Cores are tracked in bitmasks of this many bits
+MAX_CORES = 64
+# Pending private accesses below which flushing several cores is not worth a thread pool
+PARALLEL_MIN_ACCESSES = 1 << 16
+# Multi-core traces are core:[op:]address text; din and binary traces have no core IDs
+CORE_TRACE_FORMATS = ('text', 'hex')
+
+class MultiCoreSimulator:
+    """Private per-core caches kept coherent by a snooping MSI or MESI protocol
+
+    Line states are not stored separately: a resident dirty line is Modified,
+    a resident line a core holds alone after a MESI read miss is Exclusive,
+    any other resident line is Shared, and a line that is not resident is
+    Invalid. The caches are therefore write-back and write-allocate. The
+    Exclusive lines are the one state kept on the simulator (exclusive), so
+    it carries over between run_trace() calls like the caches themselves.
+
+    Only blocks touched by more than one core need the protocol. Accesses to
+    a core's private blocks are queued and simulated in batches through
+    run_trace() when something needs that core's cache: its own next access
+    to a shared block, or another core snooping it. These batches are the
+    synchronization-free stretches of the trace, and when several cores are
+    flushed at once they run on a thread pool. Batches that take the
+    vectorized NumPy path run in parallel; pure-Python batches are still
+    serialized by the GIL, but the results do not depend on either.
+
+    Coherence misses are misses to a block this core lost to another core's
+    write. One is a true-sharing miss if the word it accesses was written
+    since the invalidation and a false-sharing miss otherwise.
+    """
+
+    def __init__(self, caches, protocol='MESI', max_workers=None):
+        """Create the simulator
+
+        Args:
+            caches (list): One configured CacheSimulator per core
+            protocol (str): 'MSI' or 'MESI'
+            max_workers (int): Threads for flushing private batches (None for
+                one per core, 1 to stay on the calling thread)
+        """
+        if not caches:
+            raise ValueError("A multi-core simulation needs at least one core")
+        if len(caches) > MAX_CORES:
+            raise ValueError(f"At most {MAX_CORES} cores are supported")
+        if protocol not in COHERENCE_PROTOCOLS:
+            raise ValueError(f"Unknown coherence protocol {protocol!r}")
+        if len({cache.block_size for cache in caches}) > 1:
+            raise ValueError("Every core needs the same block size")
+        for cache in caches:
+            if cache.write_policy != 'Write-Back' or not cache.write_allocate:
+                raise ValueError("Coherent caches must be write-back and write-allocate")
+        self.caches = list(caches)
+        self.protocol = protocol
+        self.max_workers = max_workers or len(caches)
+        self.block_size = caches[0].block_size
+        self.words_per_block = max(1, self.block_size // caches[0].word_size)
+        self.word_size = caches[0].word_size
+        self.reset_coherence()
+
+    def reset(self):
+        for cache in self.caches:
+            cache.reset()
+        self.reset_coherence()
+
+    def reset_coherence(self):
+        num_cores = len(self.caches)
+        # Bitmask of the cores that have touched each block
+        self.touched = {}
+        # Blocks each core holds in the Exclusive state
+        self.exclusive = [set() for _ in range(num_cores)]
+        # block * num_cores + core -> write count when the core's copy was invalidated
+        self.invalidated_at = {}
+        # block * words_per_block + word -> write count of the last write to that word
+        self.last_write = {}
+        self.write_count = 0
+        # block -> [invalidations, coherence misses, false-sharing misses]
+        self.block_stats = {}
+        self.invalidations = [0] * num_cores
+        self.coherence_misses = [0] * num_cores
+        self.false_sharing_misses = [0] * num_cores
+        self.upgrades = 0
+        self.shared_clean_write_hits = 0
+        self.interventions = 0
+        # Accesses simulated through the protocol. Unlike the other counts this
+        # depends on how the trace is split: a run_trace() call sends every
+        # access to a block through it once a second core touches the block.
+        self.shared_accesses = 0
+
+    def run_trace(self, cores, addresses, ops=None):
+        """Simulate a multi-core trace and return the number of hits
+
+        Args:
+            cores: Core ID of every access
+            addresses: Address of every access
+            ops: Optional OP_* code of every access (all reads when None)
+        """
+        cores = np.asarray(cores, dtype=np.int64)
+        addresses = np.asarray(addresses, dtype=np.int64)
+        if ops is not None:
+            ops = np.asarray(ops, dtype=np.uint8)
+        if len(cores) != len(addresses) or (ops is not None and len(ops) != len(addresses)):
+            raise ValueError("Give one core ID and operation per address")
+        if len(addresses) == 0:
+            return 0
+        if cores.min() < 0 or cores.max() >= len(self.caches):
+            raise ValueError(f"Core IDs must be between 0 and {len(self.caches) - 1}")
+        hits_before = sum(cache.hits for cache in self.caches)
+
+        blocks = addresses // self.block_size
+        shared = self._shared_mask(blocks, cores)
+        self._trace = (addresses, ops)
+        self._pending = [0] * len(self.caches)
+        self._private = [np.flatnonzero((cores == core) & ~shared) for core in range(len(self.caches))]
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+        try:
+            positions = np.flatnonzero(shared)
+            shared_ops = ops[positions].tolist() if ops is not None else [OP_READ] * len(positions)
+            access = self._access_shared
+            for position, core, address, block, op in zip(positions.tolist(), cores[positions].tolist(),
+                                                          addresses[positions].tolist(),
+                                                          blocks[positions].tolist(), shared_ops):
+                access(position, core, address, block, op == OP_WRITE, executor)
+            self._flush(range(len(self.caches)), len(addresses), executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            self._trace = None
+        self.shared_accesses += len(positions)
+        return sum(cache.hits for cache in self.caches) - hits_before
+
+    def _shared_mask(self, blocks, cores):
+        """Mark the accesses to blocks touched by more than one core so far
+
+        A block that was private to one core until this call may be in that
+        core's cache from the private batches, which do not track MESI
+        states. Held clean, it is Exclusive: the core has been the only one
+        to touch it, just as if every access had gone through the protocol.
+        """
+        order = np.argsort(blocks, kind='stable')
+        sorted_blocks = blocks[order]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_blocks[1:] != sorted_blocks[:-1])))
+        masks = np.bitwise_or.reduceat(np.left_shift(1, cores[order]).astype(np.uint64), starts)
+        touched = self.touched
+        mesi = self.protocol == 'MESI'
+        is_shared = np.empty(len(starts), dtype=bool)
+        for i, (block, mask) in enumerate(zip(sorted_blocks[starts].tolist(), masks.tolist())):
+            before = touched.get(block, 0)
+            mask |= before
+            touched[block] = mask
+            is_shared[i] = shared = mask & (mask - 1) != 0
+            if shared and mesi and before and before & (before - 1) == 0:
+                owner = before.bit_length() - 1
+                line = self._line(owner, block)
+                if line >= 0 and not self.caches[owner].state.dirty[line]:
+                    self.exclusive[owner].add(block)
+        counts = np.diff(np.append(starts, len(blocks)))
+        shared = np.empty(len(blocks), dtype=bool)
+        shared[order] = np.repeat(is_shared, counts)
+        return shared
+
+    def _flush(self, cores, position, executor=None):
+        """Simulate the queued private accesses of cores that come before position"""
+        addresses, ops = self._trace
+        batches = []
+        for core in cores:
+            private = self._private[core]
+            start = self._pending[core]
+            end = int(np.searchsorted(private, position))
+            if end > start:
+                self._pending[core] = end
+                batch = private[start:end]
+                batches.append((self.caches[core], addresses[batch], ops[batch] if ops is not None else None))
+        if executor is not None and len(batches) > 1 and sum(len(batch[1]) for batch in batches) >= PARALLEL_MIN_ACCESSES:
+            for future in [executor.submit(cache.run_trace, batch, batch_ops) for cache, batch, batch_ops in batches]:
+                future.result()
+        else:
+            for cache, batch, batch_ops in batches:
+                cache.run_trace(batch, batch_ops)
+
+    def _line(self, core, block):
+        """Return the line holding block in a core's cache, or -1"""
+        state = self.caches[core].state
+        if state is None:
+            return -1
+        return state.find(block, block % state.num_sets)
+
+    def _block_stats(self, block):
+        stats = self.block_stats.get(block)
+        if stats is None:
+            stats = self.block_stats[block] = [0, 0, 0]
+        return stats
+
+    def _access_shared(self, position, core, address, block, write, executor):
+        """Apply one access to a shared block, snooping the other cores that may hold it"""
+        others = self.touched[block] & ~(1 << core)
+        snooped = [other for other in range(len(self.caches)) if others >> other & 1]
+        self._flush([core] + snooped, position, executor)
+        holders = [(other, line) for other in snooped for line in (self._line(other, block),) if line >= 0]
+        cache = self.caches[core]
+        exclusive = self.exclusive[core]
+        line = self._line(core, block)
+
+        if line < 0:
+            key = block * len(self.caches) + core
+            invalidated = self.invalidated_at.pop(key, None)
+            if invalidated is not None:
+                word = (address % self.block_size) // self.word_size
+                stats = self._block_stats(block)
+                stats[1] += 1
+                self.coherence_misses[core] += 1
+                if self.last_write.get(block * self.words_per_block + word, 0) <= invalidated:
+                    stats[2] += 1
+                    self.false_sharing_misses[core] += 1
+
+        if write:
+            if line >= 0 and not cache.state.dirty[line]:
+                self.shared_clean_write_hits += 1
+            if line >= 0 and holders:
+                self.upgrades += 1
+            elif line >= 0 and not cache.state.dirty[line] and block not in exclusive:
+                self.upgrades += 1  # Shared with no other copy left (always the case under MSI)
+            if holders:
+                stats = self._block_stats(block)
+                for other, _ in holders:
+                    self.caches[other].invalidate(address)
+                    self.exclusive[other].discard(block)
+                    self.invalidated_at[block * len(self.caches) + other] = self.write_count
+                    self.invalidations[other] += 1
+                    stats[0] += 1
+            exclusive.discard(block)
+            cache.access_memory(address, OP_WRITE)
+            self.write_count += 1
+            word = (address % self.block_size) // self.word_size
+            self.last_write[block * self.words_per_block + word] = self.write_count
+            return
+
+        if line < 0:
+            for other, other_line in holders:
+                # A Modified or Exclusive copy supplies the block and drops to Shared
+                other_state = self.caches[other].state
+                if other_state.dirty[other_line]:
+                    other_state.dirty[other_line] = 0
+                    self.caches[other].writebacks += 1
+                    self.interventions += 1
+                self.exclusive[other].discard(block)
+            if self.protocol == 'MESI' and not holders:
+                exclusive.add(block)
+            else:
+                exclusive.discard(block)
+        cache.access_memory(address, OP_READ)
+
+    def get_upgrades(self):
+        """Return the Shared to Modified upgrades
+
+        Under MSI every store hit on a clean line is an upgrade, including
+        those to private blocks, which the caches count while batched.
+        """
+        if self.protocol == 'MESI':
+            return self.upgrades
+        private = sum(cache.clean_write_hits for cache in self.caches) - self.shared_clean_write_hits
+        return self.upgrades + private
+
+    def hot_blocks(self, count=10):
+        """Return the blocks with the most false-sharing misses, then invalidations
+
+        Returns:
+            list: (block address, invalidations, coherence misses, false-sharing misses)
+        """
+        ranked = sorted(self.block_stats.items(), key=lambda item: (-item[1][2], -item[1][0], item[0]))
+        return [(block, *stats) for block, stats in ranked[:count]]
+
+    def get_stats(self, top=10):
+        """Per-core cache and coherence counts, protocol totals and the false-sharing hot spots"""
+        cores = []
+        for core, cache in enumerate(self.caches):
+            cores.append({
+                'core': core,
+                'accesses': cache.hits + cache.misses,
+                'hits': cache.hits,
+                'misses': cache.misses,
+                'hit_rate': cache.get_hit_rate(),
+                'coherence_misses': self.coherence_misses[core],
+                'false_sharing_misses': self.false_sharing_misses[core],
+                'invalidations_received': self.invalidations[core],
+                'writebacks': cache.writebacks,
+            })
+        return {
+            'protocol': self.protocol,
+            'cores': cores,
+            'shared_accesses': self.shared_accesses,
+            'invalidations': sum(self.invalidations),
+            'coherence_misses': sum(self.coherence_misses),
+            'false_sharing_misses': sum(self.false_sharing_misses),
+            'upgrades': self.get_upgrades(),
+            'interventions': self.interventions,
+            'hot_blocks': [{'block': block, 'address': block * self.block_size, 'invalidations': invalidations,
+                            'coherence_misses': coherence_misses, 'false_sharing_misses': false_sharing}
+                           for block, invalidations, coherence_misses, false_sharing in self.hot_blocks(top)],
+        }
+
+
+def make_caches(num_cores, cache_size, block_size, associativity='Set-Associative', replacement_policy='LRU',
+                ways=DEFAULT_WAYS):
+    """Create num_cores identically configured private caches"""
+    caches = []
+    for core in range(num_cores):
+        cache = CacheSimulator()
+        cache.cache_size = cache_size
+        cache.block_size = block_size
+        cache.associativity = associativity
+        cache.replacement_policy = replacement_policy
+        cache.ways = ways
+        cache.seed = core
+        caches.append(cache)
+    return caches
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate private per-core caches kept coherent by MSI or MESI')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--trace', help='text trace of core:[op:]address tokens, optionally gzip-compressed')
+    source.add_argument('--pattern', help='space-separated core:[op:]address tokens, e.g. "0:0 1:W:4"')
+    parser.add_argument('--format', choices=CORE_TRACE_FORMATS, default='text',
+                        help='address format; hex reads bare hex addresses such as 1:W:7fff1a20')
+    parser.add_argument('--cores', type=int, default=None, help='number of cores (default: highest core ID + 1)')
+    parser.add_argument('--cache-size', type=int, required=True, help='cache size of each core in lines')
+    parser.add_argument('--block-size', type=int, required=True)
+    parser.add_argument('--associativity', choices=('Direct', 'Set-Associative', 'Fully-Associative'),
+                        default='Set-Associative')
+    parser.add_argument('--ways', type=int, default=DEFAULT_WAYS)
+    parser.add_argument('--policy', choices=tuple(REPLACEMENT_POLICIES), default='LRU')
+    parser.add_argument('--protocol', choices=COHERENCE_PROTOCOLS, default='MESI')
+    parser.add_argument('--workers', type=int, default=None, help='threads for private batches (default: one per core)')
+    parser.add_argument('--top', type=int, default=10, help='false-sharing hot spots to list')
+    parser.add_argument('--json', action='store_true', help='print the statistics as JSON')
+    args = parser.parse_args(argv)
+
+    if min(args.cache_size, args.block_size, args.ways) <= 0:
+        parser.error('cache size, block size and ways must be positive integers')
+
+    base = 16 if args.format == 'hex' else 10
+    try:
+        if args.trace:
+            cores, addresses, ops = load_core_trace(args.trace, base)
+        else:
+            cores, addresses, ops = parse_core_records(args.pattern.split(), base)
+        num_cores = args.cores if args.cores is not None else (int(cores.max()) + 1 if len(cores) else 1)
+        simulator = MultiCoreSimulator(make_caches(num_cores, args.cache_size, args.block_size, args.associativity,
+                                                   args.policy, args.ways), args.protocol, args.workers)
+        simulator.run_trace(cores, addresses, ops)
+    except ValueError as e:
+        parser.error(str(e))
+    except OSError as e:
+        print(f"File error: {e}", file=sys.stderr)
+        return 1
+
+    stats = simulator.get_stats(args.top)
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        print()
+        return
+    for core in stats['cores']:
+        print(f"Core {core['core']}: {core['hits']} hits, {core['misses']} misses, "
+              f"hit rate {core['hit_rate'] * 100:.2f}%, {core['coherence_misses']} coherence misses "
+              f"({core['false_sharing_misses']} false sharing), {core['invalidations_received']} invalidations")
+    print(f"{stats['protocol']}: {stats['invalidations']} invalidations, {stats['upgrades']} upgrades, "
+          f"{stats['interventions']} interventions over {stats['shared_accesses']} shared accesses")
+    if stats['hot_blocks']:
+        print("False-sharing hot spots:")
+        for block in stats['hot_blocks']:
+            print(f"  0x{block['address']:x}: {block['false_sharing_misses']} false-sharing misses, "
+                  f"{block['coherence_misses']} coherence misses, {block['invalidations']} invalidations")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import argparse
+import itertools
+import json
+import mmap
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .cache_simulator import CacheSimulator, DEFAULT_WAYS, WRITE_POLICIES
+from .replacement_policies import REPLACEMENT_POLICIES
+from .trace_loader import TRACE_FORMATS, load_trace_records, parse_records
+
+ASSOCIATIVITIES = ('Direct', 'Set-Associative', 'Fully-Associative')
+POLICIES = tuple(REPLACEMENT_POLICIES)
+TABLE_COLUMNS = ('cache_size', 'block_size', 'associativity', 'ways', 'replacement_policy',
+                 'hits', 'misses', 'hit_rate', 'writebacks', 'bytes_transferred', 'seconds')
+
+class SharedTrace:
+    """An address trace written once to a memory-mapped file
+
+    Worker processes map the same file read-only, so the trace is shared
+    through the page cache instead of being pickled to every worker. A trace
+    that is already memory-mapped (such as a binary trace) is mapped again
+    in place instead of being copied.
+    """
+
+    def __init__(self, addresses, dtype=np.int64):
+        # Only a whole mapping can be reopened; slices report the parent's offset
+        if isinstance(addresses, np.memmap) and isinstance(addresses.base, mmap.mmap):
+            self.path = addresses.filename
+            self.offset = addresses.offset
+            self.dtype = addresses.dtype
+            self.length = len(addresses)
+            self.temporary = False
+            return
+        addresses = np.asarray(addresses, dtype=dtype)
+        self.offset = 0
+        self.dtype = addresses.dtype
+        self.length = len(addresses)
+        self.temporary = True
+        fd, self.path = tempfile.mkstemp(prefix='cache_trace_', suffix='.bin')
+        with os.fdopen(fd, 'wb') as f:
+            addresses.tofile(f)
+
+    def open(self):
+        """Map the trace read-only"""
+        if self.length == 0:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode='r', offset=self.offset, shape=(self.length,))
+
+    def close(self):
+        if not self.temporary:
+            return
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Trace mapped once per worker process by _init_worker, with its ops and write options
+_worker_trace = None
+_worker_ops = None
+_worker_options = {}
+
+def _init_worker(shared_trace, shared_ops=None, options=None):
+    global _worker_trace, _worker_ops, _worker_options
+    _worker_trace = shared_trace.open()
+    _worker_ops = shared_ops.open() if shared_ops is not None else None
+    _worker_options = options or {}
+
+def simulate_config(addresses, cache_size, block_size, associativity, replacement_policy, ways=DEFAULT_WAYS,
+                    ops=None, write_policy='Write-Back', write_allocate=True):
+    """Run one configuration over a trace and return its result row
+
+    ways only applies to Set-Associative caches; the row reports the ways
+    actually simulated. ops optionally gives the OP_* code of every access.
+    """
+    simulator = CacheSimulator()
+    simulator.cache_size = cache_size
+    simulator.block_size = block_size
+    simulator.associativity = associativity
+    simulator.replacement_policy = replacement_policy
+    simulator.ways = ways
+    simulator.write_policy = write_policy
+    simulator.write_allocate = write_allocate
+
+    start = time.perf_counter()
+    simulator.run_trace(addresses, ops)
+    traffic = simulator.get_traffic()
+    return {
+        'cache_size': cache_size,
+        'block_size': block_size,
+        'associativity': associativity,
+        'ways': simulator.get_ways(),
+        'replacement_policy': replacement_policy,
+        'hits': simulator.hits,
+        'misses': simulator.misses,
+        'hit_rate': simulator.get_hit_rate(),
+        'writebacks': traffic['writebacks'],
+        'bytes_transferred': traffic['bytes_transferred'],
+        'seconds': time.perf_counter() - start,
+    }
+
+def _simulate_point(config):
+    return simulate_config(_worker_trace, *config, ops=_worker_ops, **_worker_options)
+
+def sweep_grid(cache_sizes, block_sizes, associativities=ASSOCIATIVITIES, policies=POLICIES,
+               ways=(DEFAULT_WAYS,)):
+    """Return every (cache_size, block_size, associativity, policy, ways) combination
+
+    The ways axis only multiplies the Set-Associative points.
+    """
+    grid = []
+    for cache_size, block_size, associativity, policy in itertools.product(
+            cache_sizes, block_sizes, associativities, policies):
+        for way_count in (ways if associativity == 'Set-Associative' else ways[:1]):
+            grid.append((cache_size, block_size, associativity, policy, way_count))
+    return grid
+
+def run_sweep(addresses, cache_sizes, block_sizes, associativities=ASSOCIATIVITIES,
+              policies=POLICIES, max_workers=None, ways=(DEFAULT_WAYS,), ops=None, **write_options):
+    """Simulate every point of the configuration grid in parallel
+
+    Args:
+        addresses: Address trace (NumPy array or sequence of ints)
+        cache_sizes, block_sizes, associativities, policies, ways: Grid axes
+        max_workers (int): Worker processes (defaults to the CPU count)
+        ops: Optional OP_* code of every access
+        write_options: write_policy and write_allocate for every point
+
+    Returns:
+        list: One result dict per grid point, in grid order
+    """
+    grid = sweep_grid(cache_sizes, block_sizes, associativities, policies, ways)
+    return run_configs(addresses, grid, max_workers, ops, **write_options)
+
+def run_configs(addresses, configs, max_workers=None, ops=None, **write_options):
+    """Simulate a list of (cache_size, block_size, associativity, policy[, ways]) tuples in parallel
+
+    Returns:
+        list: One result dict per configuration, in the same order
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(configs)))
+
+    if max_workers == 1:
+        addresses = np.asarray(addresses, dtype=np.int64)
+        return [simulate_config(addresses, *config, ops=ops, **write_options) for config in configs]
+
+    shared_ops = SharedTrace(ops, dtype=np.uint8) if ops is not None else None
+    try:
+        with SharedTrace(addresses) as shared_trace:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(shared_trace, shared_ops, write_options)) as executor:
+                return list(executor.map(_simulate_point, configs))
+    finally:
+        if shared_ops is not None:
+            shared_ops.close()
+
+def format_table(rows, columns=TABLE_COLUMNS):
+    """Format result rows as a fixed-width text table"""
+    def cell(row, column):
+        value = row[column]
+        if column == 'hit_rate':
+            return f'{value * 100:.2f}%'
+        if column == 'seconds':
+            return f'{value:.3f}'
+        return str(value)
+
+    cells = [[cell(row, column) for column in columns] for row in rows]
+    widths = [max([len(column)] + [len(line[i]) for line in cells]) for i, column in enumerate(columns)]
+    lines = ['  '.join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines.append('  '.join('-' * width for width in widths))
+    for line in cells:
+        lines.append('  '.join(value.ljust(width) for value, width in zip(line, widths)))
+    return '\n'.join(lines)
+
+def _int_list(text):
+    return [int(value) for value in text.split(',') if value]
+
+def _name_list(text):
+    return [value.strip() for value in text.split(',') if value.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate a grid of cache configurations in parallel')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--trace', help='trace file (text addresses, gzip-compressed text, Dinero din or binary)')
+    source.add_argument('--pattern', help='space-separated memory addresses, as typed in the GUI')
+    parser.add_argument('--format', choices=TRACE_FORMATS, default=None,
+                        help='trace format (default: detect); hex reads bare hex addresses such as 7fff1a20')
+    parser.add_argument('--cache-sizes', type=_int_list, required=True, help='comma-separated cache sizes in lines')
+    parser.add_argument('--block-sizes', type=_int_list, required=True, help='comma-separated block sizes')
+    parser.add_argument('--associativity', type=_name_list, default=list(ASSOCIATIVITIES),
+                        help='comma-separated associativities (default: all)')
+    parser.add_argument('--policy', type=_name_list, default=list(POLICIES),
+                        help='comma-separated replacement policies (default: all)')
+    parser.add_argument('--ways', type=_int_list, default=[DEFAULT_WAYS],
+                        help=f'comma-separated ways per set for Set-Associative (default: {DEFAULT_WAYS})')
+    parser.add_argument('--write-policy', choices=WRITE_POLICIES, default='Write-Back')
+    parser.add_argument('--no-write-allocate', action='store_true', help='send store misses around the cache')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args(argv)
+
+    for name in args.associativity:
+        if name not in ASSOCIATIVITIES:
+            parser.error(f'unknown associativity {name!r}')
+    for name in args.policy:
+        if name not in POLICIES:
+            parser.error(f'unknown replacement policy {name!r}')
+    if not args.cache_sizes or not args.block_sizes or min(args.cache_sizes + args.block_sizes) <= 0:
+        parser.error('cache and block sizes must be positive integers')
+    if not args.ways or min(args.ways) <= 0:
+        parser.error('ways must be positive integers')
+
+    try:
+        if args.trace:
+            addresses, ops = load_trace_records(args.trace, trace_format=args.format)
+        else:
+            addresses, ops = parse_records(args.pattern.split(), 16 if args.format == 'hex' else 10)
+        rows = run_sweep(addresses, args.cache_sizes, args.block_sizes, args.associativity,
+                         args.policy, max_workers=args.workers, ways=args.ways, ops=ops,
+                         write_policy=args.write_policy, write_allocate=not args.no_write_allocate)
+    except ValueError as e:
+        parser.error(str(e))
+    except OSError as e:
+        print(f"File error: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_table(rows))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Environment variables that turn profiling on without code or flag changes:
+# CACHESIM_PROFILE names the JSON report ('-' for stderr), CACHESIM_PROFILE_OPTIONS
+# lists extras ("cprofile", "tracemalloc") separated by commas
+PROFILE_ENV = 'CACHESIM_PROFILE'
+PROFILE_OPTIONS_ENV = 'CACHESIM_PROFILE_OPTIONS'
+# Functions and allocation sites listed in the report
+REPORT_TOP = 25
+
+# The profiler stage() and count_accesses() report to; None when profiling is off
+_active = None
+_NO_STAGE = nullcontext()
+
+class Profiler:
+    """Stage timers, access branch counters and optional cProfile/tracemalloc captures
+
+    Stages are timed with perf_counter and may be entered from any thread.
+    Branch counts come from simulators passed to CacheSimulator.enable_profiling().
+    cProfile only sees the threads that run inside capture().
+    """
+
+    def __init__(self, cprofile=False, tracemalloc=False):
+        self.cprofile = cprofile
+        self.tracemalloc = tracemalloc
+        self.lock = threading.Lock()
+        self.stages = {}        # name -> [calls, seconds]
+        # Vectorized direct-mapped chunks bypass the per-access path; their accesses are
+        # counted as 'vectorized' and not split into hits and misses
+        self.counters = dict.fromkeys(('hit', 'miss', 'eviction', 'writeback', 'write_around',
+                                       'index_lookup', 'vectorized'), 0)
+        self.scan_lengths = {}  # ways compared by a set scan -> accesses
+        self.profiles = []
+        self.started = time.perf_counter()
+        if tracemalloc:
+            import tracemalloc as tracer
+            tracer.start()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the block as one call of stage name (load, parse, simulate, render, ai)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                totals = self.stages.setdefault(name, [0, 0.0])
+                totals[0] += 1
+                totals[1] += seconds
+
+    @contextmanager
+    def capture(self):
+        """Run the block under cProfile when it was requested"""
+        if not self.cprofile:
+            yield
+            return
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self.lock:
+                self.profiles.append(profile)
+
+    def report(self):
+        """Return everything recorded so far as a JSON-serializable dict"""
+        counters = dict(self.counters)
+        report = {
+            'wall_seconds': time.perf_counter() - self.started,
+            'stages': {name: {'calls': calls, 'seconds': seconds}
+                       for name, (calls, seconds) in self.stages.items()},
+            'counters': counters,
+            'scan_lengths': {str(length): count for length, count in sorted(self.scan_lengths.items())},
+        }
+        if self.profiles:
+            report['cprofile'] = self._cprofile_report()
+        if self.tracemalloc:
+            report['tracemalloc'] = self._tracemalloc_report()
+        return report
+
+    def _cprofile_report(self):
+        import pstats
+        stats = pstats.Stats(*self.profiles)
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({'function': f'{filename}:{line}({function})', 'calls': calls,
+                         'seconds': own, 'cumulative_seconds': cumulative})
+        rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+        return rows[:REPORT_TOP]
+
+    def _tracemalloc_report(self):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return {}
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:REPORT_TOP]
+        return {
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top': [{'location': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+                     'bytes': stat.size, 'blocks': stat.count} for stat in top],
+        }
+
+    def write_report(self, path):
+        """Write report() as JSON to path, or to stderr for '-'"""
+        report = self.report()
+        if path == '-':
+            json.dump(report, sys.stderr, indent=2)
+            print(file=sys.stderr)
+            return
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    def stop(self):
+        if self.tracemalloc:
+            import tracemalloc
+            tracemalloc.stop()
+
+
+def start_profiling(cprofile=False, tracemalloc=False):
+    """Make a new Profiler the active one and return it"""
+    global _active
+    if _active is not None:
+        _active.stop()
+    _active = Profiler(cprofile, tracemalloc)
+    return _active
+
+def stop_profiling():
+    """Deactivate profiling and return the profiler that was active, if any"""
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+def active_profiler():
+    return _active
+
+def profiling_from_environment():
+    """Start profiling if CACHESIM_PROFILE is set
+
+    Returns:
+        tuple: (Profiler, report path), or (None, None) when the variable is unset
+    """
+    path = os.environ.get(PROFILE_ENV)
+    if not path:
+        return None, None
+    options = {option.strip().lower() for option in os.environ.get(PROFILE_OPTIONS_ENV, '').split(',')}
+    return start_profiling('cprofile' in options, 'tracemalloc' in options), path
+
+def stage(name):
+    """Context manager timing a pipeline stage; does nothing when profiling is off"""
+    if _active is None:
+        return _NO_STAGE
+    return _active.stage(name)
+
+def count_accesses(simulator, profiler):
+    """Return an access_memory replacement that also counts its branches into profiler
+
+    The counts are read from the simulator's counters and cache state around
+    the plain access, so the uninstrumented path is unchanged.
+    """
+    access = type(simulator).access_memory.__get__(simulator)
+    counters = profiler.counters
+    scan_lengths = profiler.scan_lengths
+
+    def access_profiled(address, *op):
+        writebacks = simulator.writebacks
+        write_arounds = simulator.write_arounds
+        hit = access(address, *op)
+        state = simulator.state
+        if state.ways == 1:
+            length = 1
+        elif state.index is not None:
+            counters['index_lookup'] += 1
+            length = None
+        elif hit:
+            # Position of the matching way: how far the scan went
+            block = address // simulator.block_size
+            base = block % state.num_sets * state.ways
+            tags = state.tags
+            length = 1
+            while tags[base + length - 1] != block or not state.valid[base + length - 1]:
+                length += 1
+        else:
+            length = state.ways
+        if length is not None:
+            scan_lengths[length] = scan_lengths.get(length, 0) + 1
+        if hit:
+            counters['hit'] += 1
+        else:
+            counters['miss'] += 1
+            if simulator.write_arounds != write_arounds:
+                counters['write_around'] += 1
+            elif state.evicted_block >= 0:
+                counters['eviction'] += 1
+        counters['writeback'] += simulator.writebacks - writebacks
+        return hit
+
+    return access_profiled
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+class RecommendationCache:
+    """Small on-disk LRU cache of AI recommendations
+
+    Entries are kept in a JSON file, least recently used first, and the
+    oldest entry is dropped once max_entries is exceeded.
+    """
+
+    def __init__(self, path, max_entries=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def make_key(features, config):
+        """Hash the pattern features and cache configuration into a cache key"""
+        payload = json.dumps({'features': features, 'config': config}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def load(self):
+        """Load cached entries from disk if the file exists"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    self.entries = OrderedDict(json.load(f))
+        except Exception as e:
+            print(f"Error loading recommendation cache: {e}")
+            self.entries = OrderedDict()
+
+    def get(self, key):
+        """Return the cached recommendation for key, or None"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._save()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self._save()
+
+    def _save(self):
+        # Write to a temporary file and rename it so a crash never leaves a torn cache
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Error saving recommendation cache: {e}")
+
+    def __len__(self):
+        return len(self.entries)
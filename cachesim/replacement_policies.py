@@ -0,0 +1,371 @@
+from array import array
+
+class ReplacementPolicy:
+    """Victim selection for the sets of a cache
+
+    Lines are numbered ``set_index * ways + way`` as in CacheState. The state
+    calls on_fill() after placing a block in a line, on_hit() when a resident
+    line is accessed (only if tracks_hits is set) and victim() to pick the
+    line to evict from a full set. victim() forgets the line it returns; the
+    following on_fill() brings it back with its new block. remove() forgets a
+    line that was invalidated without being replaced.
+    """
+
+    name = None
+    # False when hits never change the victim order, so callers can skip on_hit()
+    tracks_hits = True
+
+    def __init__(self, num_sets, ways, seed=0):
+        self.num_sets = num_sets
+        self.ways = ways
+
+    def on_hit(self, set_index, line):
+        pass
+
+    def on_fill(self, set_index, line):
+        pass
+
+    def victim(self, set_index):
+        raise NotImplementedError
+
+    def remove(self, set_index, line):
+        pass
+
+    def nbytes(self):
+        """Return the memory held by the policy state in bytes"""
+        return 0
+
+    def buffers(self):
+        """Return the policy state as {name: array or bytearray}, for checkpoints"""
+        return {name: value for name, value in vars(self).items() if isinstance(value, (array, bytearray))}
+
+    def restore(self, buffers):
+        """Overwrite the state with the raw bytes of each buffer named by buffers()"""
+        for name, data in buffers.items():
+            target = self.buffers().get(name)
+            if target is None or memoryview(target).nbytes != len(data):
+                raise ValueError(f"Checkpoint buffer {name!r} does not match the {self.name} policy")
+            memoryview(target).cast('B')[:] = data
+
+
+class LRUPolicy(ReplacementPolicy):
+    """Least recently used, as a doubly linked list per set
+
+    The oldest line is at ``head`` and the newest at ``tail``, so hits,
+    fills and victim selection are all O(1).
+    """
+
+    name = 'LRU'
+
+    def __init__(self, num_sets, ways, seed=0):
+        super().__init__(num_sets, ways)
+        num_lines = num_sets * ways
+        self.prev = array('i', [-1]) * num_lines
+        self.next = array('i', [-1]) * num_lines
+        self.head = array('i', [-1]) * num_sets
+        self.tail = array('i', [-1]) * num_sets
+
+    def on_hit(self, set_index, line):
+        """Move line to the tail of its set's list"""
+        tail = self.tail[set_index]
+        if line == tail:
+            return
+        prev = self.prev
+        nxt = self.next
+        before = prev[line]
+        after = nxt[line]
+        if before >= 0:
+            nxt[before] = after
+        else:
+            self.head[set_index] = after
+        prev[after] = before
+        prev[line] = tail
+        nxt[line] = -1
+        nxt[tail] = line
+        self.tail[set_index] = line
+
+    def on_fill(self, set_index, line):
+        # Link as the newest line at the tail
+        tail = self.tail[set_index]
+        self.prev[line] = tail
+        self.next[line] = -1
+        if tail >= 0:
+            self.next[tail] = line
+        else:
+            self.head[set_index] = line
+        self.tail[set_index] = line
+
+    def victim(self, set_index):
+        # Unlink the oldest line from the head of the set's list
+        line = self.head[set_index]
+        after = self.next[line]
+        self.head[set_index] = after
+        if after >= 0:
+            self.prev[after] = -1
+        else:
+            self.tail[set_index] = -1
+        return line
+
+    def remove(self, set_index, line):
+        before = self.prev[line]
+        after = self.next[line]
+        if before >= 0:
+            self.next[before] = after
+        else:
+            self.head[set_index] = after
+        if after >= 0:
+            self.prev[after] = before
+        else:
+            self.tail[set_index] = before
+
+    def nbytes(self):
+        return sum(buf.itemsize * len(buf) for buf in (self.prev, self.next, self.head, self.tail))
+
+
+class FIFOPolicy(LRUPolicy):
+    """First in, first out: the LRU list without reordering on hits"""
+
+    name = 'FIFO'
+    tracks_hits = False
+
+    def on_hit(self, set_index, line):
+        pass
+
+
+class RandomPolicy(ReplacementPolicy):
+    """Uniformly random victim from a per-set xorshift32 generator
+
+    Each set draws from its own generator, so the victims chosen in one set
+    do not depend on how accesses to other sets are interleaved.
+    """
+
+    name = 'Random'
+    tracks_hits = False
+
+    def __init__(self, num_sets, ways, seed=0):
+        super().__init__(num_sets, ways)
+        # Spread the seeds with a Weyl sequence; xorshift needs a non-zero state
+        self.state = array('I', [((seed + set_index + 1) * 0x9E3779B9 & 0xFFFFFFFF) or 1
+                                 for set_index in range(num_sets)])
+
+    def victim(self, set_index):
+        x = self.state[set_index]
+        x ^= (x << 13) & 0xFFFFFFFF
+        x ^= x >> 17
+        x ^= (x << 5) & 0xFFFFFFFF
+        self.state[set_index] = x
+        return set_index * self.ways + x % self.ways
+
+    def nbytes(self):
+        return self.state.itemsize * len(self.state)
+
+
+class TreePLRUPolicy(ReplacementPolicy):
+    """Tree pseudo-LRU with one bit per internal node, packed 8 to a byte
+
+    Each set owns a binary tree over its ways (rounded up to a power of
+    two). A node's bit points to the half holding the next victim; every
+    access flips the bits on its path to point away from the accessed way,
+    so hits, fills and victims all cost O(log ways).
+    """
+
+    name = 'PLRU'
+
+    def __init__(self, num_sets, ways, seed=0):
+        super().__init__(num_sets, ways)
+        self.levels = max(ways - 1, 0).bit_length()
+        self.leaves = 1 << self.levels
+        # Nodes 1..leaves-1 in heap order; node 0 of each set is unused
+        self.bits = bytearray((num_sets * self.leaves + 7) // 8)
+
+    def on_hit(self, set_index, line):
+        way = line - set_index * self.ways
+        bits = self.bits
+        base = set_index * self.leaves
+        node = 1
+        for shift in range(self.levels - 1, -1, -1):
+            right = (way >> shift) & 1
+            position = base + node
+            if right:
+                bits[position >> 3] &= ~(1 << (position & 7))
+            else:
+                bits[position >> 3] |= 1 << (position & 7)
+            node = 2 * node + right
+
+    on_fill = on_hit
+
+    def victim(self, set_index):
+        bits = self.bits
+        base = set_index * self.leaves
+        node = 1
+        way = 0
+        for shift in range(self.levels - 1, -1, -1):
+            position = base + node
+            right = (bits[position >> 3] >> (position & 7)) & 1
+            if right and (way | (1 << shift)) >= self.ways:
+                right = 0  # Padding leaves past the last way never hold a line
+            way |= right << shift
+            node = 2 * node + right
+        return set_index * self.ways + way
+
+    def nbytes(self):
+        return len(self.bits)
+
+
+class LFUPolicy(ReplacementPolicy):
+    """Least frequently used with O(1) frequency buckets
+
+    Lines with the same access count in a set form a doubly linked bucket,
+    oldest first, and each set remembers its smallest non-empty count. A hit
+    moves the line to the next bucket, and the victim is the oldest line of
+    the smallest bucket, so every operation is O(1).
+    """
+
+    name = 'LFU'
+
+    def __init__(self, num_sets, ways, seed=0):
+        super().__init__(num_sets, ways)
+        num_lines = num_sets * ways
+        self.count = array('q', bytes(8 * num_lines))
+        self.prev = array('i', [-1]) * num_lines
+        self.next = array('i', [-1]) * num_lines
+        self.min_count = array('q', bytes(8 * num_sets))
+        # count * num_sets + set_index -> [head line, tail line] of that bucket
+        self.buckets = {}
+
+    def _unlink(self, set_index, line):
+        key = self.count[line] * self.num_sets + set_index
+        bucket = self.buckets[key]
+        before = self.prev[line]
+        after = self.next[line]
+        if before >= 0:
+            self.next[before] = after
+        else:
+            bucket[0] = after
+        if after >= 0:
+            self.prev[after] = before
+        else:
+            bucket[1] = before
+        if bucket[0] < 0:
+            del self.buckets[key]
+            return True
+        return False
+
+    def _append(self, set_index, line):
+        key = self.count[line] * self.num_sets + set_index
+        bucket = self.buckets.get(key)
+        self.next[line] = -1
+        if bucket is None:
+            self.prev[line] = -1
+            self.buckets[key] = [line, line]
+        else:
+            self.prev[line] = bucket[1]
+            self.next[bucket[1]] = line
+            bucket[1] = line
+
+    def on_hit(self, set_index, line):
+        emptied = self._unlink(set_index, line)
+        if emptied and self.min_count[set_index] == self.count[line]:
+            self.min_count[set_index] += 1
+        self.count[line] += 1
+        self._append(set_index, line)
+
+    def on_fill(self, set_index, line):
+        self.count[line] = 1
+        self.min_count[set_index] = 1
+        self._append(set_index, line)
+
+    def victim(self, set_index):
+        line = self.buckets[self.min_count[set_index] * self.num_sets + set_index][0]
+        self._unlink(set_index, line)
+        return line
+
+    def remove(self, set_index, line):
+        emptied = self._unlink(set_index, line)
+        count = self.count[line]
+        self.count[line] = 0
+        if emptied and self.min_count[set_index] == count:
+            # Rare: rescan the set for the new smallest count
+            base = set_index * self.ways
+            counts = [c for c in self.count[base:base + self.ways] if c]
+            self.min_count[set_index] = min(counts) if counts else 0
+
+    def buffers(self):
+        # The bucket dict is flattened to (key, head, tail) triples
+        buffers = super().buffers()
+        buffers['buckets'] = array('q', [value for key, (head, tail) in self.buckets.items()
+                                         for value in (key, head, tail)])
+        return buffers
+
+    def restore(self, buffers):
+        buffers = dict(buffers)
+        triples = array('q', bytes(buffers.pop('buckets', b'')))
+        super().restore(buffers)
+        self.buckets = {triples[i]: [triples[i + 1], triples[i + 2]] for i in range(0, len(triples), 3)}
+
+    def nbytes(self):
+        # The bucket dict holds at most one entry per line
+        return (sum(buf.itemsize * len(buf) for buf in (self.count, self.prev, self.next, self.min_count))
+                + 100 * len(self.buckets))
+
+
+class SRRIPPolicy(ReplacementPolicy):
+    """Static re-reference interval prediction with 2-bit RRPVs, packed 4 to a byte
+
+    New lines are predicted to be re-referenced in the distant future
+    (RRPV 2) and hits reset the prediction to near-immediate (RRPV 0). The
+    victim is the first line with RRPV 3; when there is none, every line of
+    the set is aged by the same amount until one reaches 3.
+    """
+
+    name = 'SRRIP'
+    MAX_RRPV = 3
+
+    def __init__(self, num_sets, ways, seed=0):
+        super().__init__(num_sets, ways)
+        self.rrpv = bytearray((num_sets * ways + 3) // 4)
+
+    def _set(self, line, value):
+        shift = (line & 3) * 2
+        self.rrpv[line >> 2] = (self.rrpv[line >> 2] & ~(3 << shift)) | (value << shift)
+
+    def on_hit(self, set_index, line):
+        self._set(line, 0)
+
+    def on_fill(self, set_index, line):
+        self._set(line, self.MAX_RRPV - 1)
+
+    def victim(self, set_index):
+        rrpv = self.rrpv
+        base = set_index * self.ways
+        oldest = -1
+        line = base
+        for candidate in range(base, base + self.ways):
+            value = (rrpv[candidate >> 2] >> ((candidate & 3) * 2)) & 3
+            if value > oldest:
+                oldest = value
+                line = candidate
+                if value == self.MAX_RRPV:
+                    return line
+        # Age the whole set so the first line with the largest RRPV reaches the maximum
+        age = self.MAX_RRPV - oldest
+        for candidate in range(base, base + self.ways):
+            shift = (candidate & 3) * 2
+            value = ((rrpv[candidate >> 2] >> shift) & 3) + age
+            rrpv[candidate >> 2] = (rrpv[candidate >> 2] & ~(3 << shift)) | (value << shift)
+        return line
+
+    def nbytes(self):
+        return len(self.rrpv)
+
+
+REPLACEMENT_POLICIES = {policy.name: policy for policy in
+                        (LRUPolicy, FIFOPolicy, RandomPolicy, TreePLRUPolicy, LFUPolicy, SRRIPPolicy)}
+
+def make_policy(name, num_sets, ways, seed=0):
+    """Create the named replacement policy for a cache of num_sets x ways lines"""
+    try:
+        policy = REPLACEMENT_POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown replacement policy {name!r}") from None
+    return policy(num_sets, ways, seed)
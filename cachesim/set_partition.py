@@ -0,0 +1,132 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .cache_simulator import CacheSimulator, DEFAULT_WAYS, TRACE_CHUNK_SIZE
+from .parameter_sweep import SharedTrace
+
+# Counters summed over the shards
+COUNTERS = ('hits', 'misses', 'writes', 'writebacks', 'write_throughs', 'write_arounds', 'clean_write_hits')
+
+# Trace mapped once per worker process by _init_worker, with its ops and the configuration
+_worker_trace = None
+_worker_ops = None
+_worker_config = {}
+
+def _init_worker(shared_trace, shared_ops, config):
+    global _worker_trace, _worker_ops, _worker_config
+    _worker_trace = shared_trace.open()
+    _worker_ops = shared_ops.open() if shared_ops is not None else None
+    _worker_config = config
+
+def _make_simulator(cache_size, block_size, associativity, replacement_policy, ways=DEFAULT_WAYS,
+                    write_policy='Write-Back', write_allocate=True, seed=0):
+    simulator = CacheSimulator()
+    simulator.cache_size = cache_size
+    simulator.block_size = block_size
+    simulator.associativity = associativity
+    simulator.replacement_policy = replacement_policy
+    simulator.ways = ways
+    simulator.write_policy = write_policy
+    simulator.write_allocate = write_allocate
+    simulator.seed = seed
+    return simulator
+
+def simulate_shard(addresses, ops, shard, shards, config):
+    """Simulate the accesses of one shard and return its counters
+
+    The trace is filtered a chunk at a time, so the shard's stream is never
+    held in full.
+    """
+    simulator = _make_simulator(**config)
+    num_sets, _ = simulator.get_geometry()
+    block_size = simulator.block_size
+    for start in range(0, len(addresses), TRACE_CHUNK_SIZE):
+        chunk = np.asarray(addresses[start:start + TRACE_CHUNK_SIZE], dtype=np.int64)
+        mine = (chunk // block_size) % num_sets % shards == shard
+        chunk_ops = ops[start:start + TRACE_CHUNK_SIZE][mine] if ops is not None else None
+        simulator.run_trace(chunk[mine], chunk_ops)
+    return {name: getattr(simulator, name) for name in COUNTERS}
+
+def _simulate_shard(task):
+    return simulate_shard(_worker_trace, _worker_ops, *task, _worker_config)
+
+def simulate_partitioned(addresses, cache_size, block_size, associativity, replacement_policy,
+                         ways=DEFAULT_WAYS, ops=None, write_policy='Write-Back', write_allocate=True, seed=0,
+                         shards=None, max_workers=None):
+    """Run one configuration over a trace split by set across worker processes
+
+    Sets never interact: an access only touches its own set and every
+    replacement policy keeps per-set state (Random draws from a per-set
+    generator). Shard k simulates the accesses whose set index is k modulo
+    the shard count on a cache of the full geometry, so the shards' counters
+    add up to exactly those of a serial run.
+
+    Args:
+        addresses: Address trace (NumPy array, memory map or sequence of ints)
+        ops: Optional OP_* code of every access
+        shards (int): Set partitions (defaults to max_workers); a cache with
+            fewer sets gets one shard per set, so Fully-Associative caches
+            run serially
+        max_workers (int): Worker processes (defaults to the CPU count)
+
+    Returns:
+        dict: The result row of parameter_sweep.simulate_config with the
+            full get_traffic() counts and the shard count added; hits,
+            misses and traffic equal a serial run's
+    """
+    config = {
+        'cache_size': cache_size,
+        'block_size': block_size,
+        'associativity': associativity,
+        'replacement_policy': replacement_policy,
+        'ways': ways,
+        'write_policy': write_policy,
+        'write_allocate': write_allocate,
+        'seed': seed,
+    }
+    simulator = _make_simulator(**config)
+    num_sets, _ = simulator.get_geometry()
+    if not isinstance(addresses, np.ndarray):
+        addresses = np.asarray(addresses, dtype=np.int64)
+    if ops is not None and not isinstance(ops, np.ndarray):
+        ops = np.asarray(ops, dtype=np.uint8)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    shards = max(1, min(shards or max_workers, num_sets))
+    max_workers = max(1, min(max_workers, shards))
+
+    start = time.perf_counter()
+    if shards == 1:
+        simulator.run_trace(addresses, ops)
+    elif max_workers == 1:
+        for shard in range(shards):
+            counts = simulate_shard(addresses, ops, shard, shards, config)
+            for name in COUNTERS:
+                setattr(simulator, name, getattr(simulator, name) + counts[name])
+    else:
+        shared_ops = SharedTrace(ops, dtype=np.uint8) if ops is not None else None
+        try:
+            with SharedTrace(addresses) as shared_trace:
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                         initargs=(shared_trace, shared_ops, config)) as executor:
+                    for counts in executor.map(_simulate_shard, [(shard, shards) for shard in range(shards)]):
+                        for name in COUNTERS:
+                            setattr(simulator, name, getattr(simulator, name) + counts[name])
+        finally:
+            if shared_ops is not None:
+                shared_ops.close()
+
+    return {
+        'cache_size': cache_size,
+        'block_size': block_size,
+        'associativity': associativity,
+        'ways': simulator.get_ways(),
+        'replacement_policy': replacement_policy,
+        'hits': simulator.hits,
+        'misses': simulator.misses,
+        'hit_rate': simulator.get_hit_rate(),
+        **simulator.get_traffic(),
+        'seconds': time.perf_counter() - start,
+        'shards': shards,
+    }
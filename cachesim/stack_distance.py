@@ -0,0 +1,129 @@
+from array import array
+import numpy as np
+
+class StackDistanceAnalyzer:
+    """Single-pass LRU stack-distance (Mattson) analysis of an address stream
+
+    The stack distance of an access is the number of distinct blocks touched
+    since the previous access to the same block. A fully-associative LRU cache
+    of C lines hits exactly the accesses with distance < C, so one pass gives
+    the hit rate of every cache size at once.
+
+    Each resident block keeps one mark in a Fenwick tree indexed by the time
+    of its last access; the distance is the number of marks after that time.
+    The tree is compacted to the live blocks whenever it fills up, so every
+    access costs O(log M) for M distinct blocks.
+    """
+
+    def __init__(self, block_size=1):
+        self.block_size = block_size
+        self.reset()
+
+    def reset(self):
+        self.last_access = {}  # block address -> position of its mark in the tree
+        self.tree = array('i', bytes(4 * 1025))  # 1-based Fenwick tree
+        self.capacity = 1024
+        self.time = 0
+        self.histogram = array('q')  # histogram[d] = accesses with stack distance d
+        self.cold_misses = 0
+        self.total = 0
+
+    def process(self, addresses):
+        """Feed a chunk of addresses (any iterable of ints or a NumPy array)"""
+        if isinstance(addresses, np.ndarray):
+            blocks = (addresses // self.block_size).tolist()
+        else:
+            blocks = [address // self.block_size for address in addresses]
+
+        last_access = self.last_access
+        histogram = self.histogram
+        for block in blocks:
+            if self.time == self.capacity:
+                self._compact()
+            tree = self.tree
+            capacity = self.capacity
+            time = self.time + 1
+
+            previous = last_access.get(block)
+            if previous is None:
+                self.cold_misses += 1
+            else:
+                # Marks after the previous access = distinct blocks seen since
+                distance = len(last_access)
+                i = previous
+                while i > 0:
+                    distance -= tree[i]
+                    i &= i - 1
+                while len(histogram) <= distance:
+                    histogram.append(0)
+                histogram[distance] += 1
+                i = previous
+                while i <= capacity:
+                    tree[i] -= 1
+                    i += i & -i
+
+            i = time
+            while i <= capacity:
+                tree[i] += 1
+                i += i & -i
+            last_access[block] = time
+            self.time = time
+        self.total += len(blocks)
+
+    def forget(self, block):
+        """Drop a block from the stack as if it had never been accessed
+
+        Later distances no longer count it; used by sampled analysis to stay
+        within a fixed number of tracked blocks.
+        """
+        position = self.last_access.pop(block)
+        tree = self.tree
+        while position <= self.capacity:
+            tree[position] -= 1
+            position += position & -position
+
+    def _compact(self):
+        """Renumber the live marks 1..M and rebuild the tree with room to grow"""
+        live = sorted(self.last_access, key=self.last_access.get)
+        self.capacity = max(1024, 2 * len(live))
+        tree = array('i', bytes(4 * (self.capacity + 1)))
+        for position, block in enumerate(live, 1):
+            self.last_access[block] = position
+            tree[position] = 1
+        # Linear-time Fenwick construction: push each node into its parent
+        for position in range(1, self.capacity + 1):
+            parent = position + (position & -position)
+            if parent <= self.capacity:
+                tree[parent] += tree[position]
+        self.tree = tree
+        self.time = len(live)
+
+    def hit_counts(self, max_size=None):
+        """Return hits[c] for fully-associative LRU caches of c = 0..max_size lines"""
+        if max_size is None:
+            max_size = len(self.histogram)
+        counts = np.zeros(max_size + 1, dtype=np.int64)
+        histogram = np.frombuffer(self.histogram, dtype=np.int64)[:max_size]
+        np.cumsum(histogram, out=counts[1:len(histogram) + 1])
+        counts[len(histogram) + 1:] = counts[len(histogram)]
+        return counts
+
+    def miss_ratio_curve(self, max_size=None):
+        """Return (cache sizes, miss ratios) for sizes 1..max_size lines
+
+        max_size defaults to the number of distinct blocks, past which the
+        curve only contains cold misses.
+        """
+        if max_size is None:
+            max_size = max(len(self.last_access), 1)
+        sizes = np.arange(1, max_size + 1)
+        hits = self.hit_counts(max_size)[1:]
+        if self.total == 0:
+            return sizes, np.zeros(max_size)
+        return sizes, 1.0 - hits / self.total
+
+    def get_hit_rate(self, cache_size):
+        """Hit rate of a fully-associative LRU cache with cache_size lines"""
+        if self.total == 0:
+            return 0
+        return int(self.hit_counts(cache_size)[cache_size]) / self.total
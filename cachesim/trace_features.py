@@ -0,0 +1,261 @@
+import numpy as np
+from .stack_distance import StackDistanceAnalyzer
+from .trace_loader import parse_records
+
+# Block sizes whose unique-block counts are reported
+CANDIDATE_BLOCK_SIZES = (1, 4, 16, 64, 256, 1024)
+# Values kept by each distinct-count sketch (exact below this many distinct blocks)
+SKETCH_SIZE = 1024
+# Accesses per working-set window
+WINDOW_SIZE = 4096
+# Longest working-set series kept; older samples are thinned when it fills up
+MAX_SERIES = 32
+# Accesses whose reuse distances are measured
+REUSE_PREFIX = 1 << 18
+# Most common strides reported
+TOP_STRIDES = 8
+MAX_TRACKED_STRIDES = 1024
+
+def _mix64(values):
+    """splitmix64 finalizer, used to hash block addresses uniformly"""
+    x = np.asarray(values).astype(np.uint64)
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return x
+
+class DistinctCounter:
+    """K-minimum-values sketch of the number of distinct values seen
+
+    Exact below k distinct values; above that the relative error is about
+    1/sqrt(k) while memory stays at k hashes.
+    """
+
+    def __init__(self, k=SKETCH_SIZE):
+        self.k = k
+        self.minimums = np.empty(0, dtype=np.uint64)
+
+    def add(self, values):
+        hashes = _mix64(values)
+        if len(self.minimums) == self.k:
+            hashes = hashes[hashes < self.minimums[-1]]
+        # Only the k smallest distinct hashes can enter the sketch. Take the m
+        # smallest values and widen m until duplicates leave at least k of them.
+        m = self.k
+        while m < len(hashes):
+            smallest = np.unique(np.partition(hashes, m - 1)[:m])
+            if len(smallest) >= self.k:
+                hashes = smallest
+                break
+            m *= 4
+        if len(hashes):
+            self.minimums = np.union1d(self.minimums, hashes)[:self.k]
+
+    def estimate(self):
+        if len(self.minimums) < self.k:
+            return len(self.minimums)
+        return int((self.k - 1) / (float(self.minimums[-1]) / 2.0 ** 64))
+
+class TraceFeatureExtractor:
+    """Bounded-size summary of an address trace, built in one streaming pass
+
+    Feed address chunks to process() and read summary(). The summary has the
+    same size whatever the trace length, so prompts built from it do too.
+    Distance-based features use block_size as the reference block size.
+    """
+
+    def __init__(self, block_size=16, block_sizes=CANDIDATE_BLOCK_SIZES):
+        self.block_size = block_size
+        self.block_sizes = tuple(block_sizes)
+        self.total = 0
+        self.distinct = {size: DistinctCounter() for size in self.block_sizes}
+        self.reuse = StackDistanceAnalyzer(block_size)
+
+        # Strides between consecutive addresses
+        self.last_address = None
+        self.stride_counts = {}
+
+        # Working-set size per window of WINDOW_SIZE accesses
+        self.pending_blocks = np.empty(0, dtype=np.int64)
+        self.window_count = 0
+        self.window_sum = 0
+        self.window_min = None
+        self.window_max = 0
+        self.series = []
+        self.series_step = 1
+
+        # Sequential runs: consecutive accesses moving forward by at most one block
+        self.current_run = 0
+        self.run_count = 0
+        self.run_accesses = 0
+        self.longest_run = 0
+
+    def process(self, addresses):
+        """Feed the next chunk of the trace"""
+        addresses = np.asarray(addresses, dtype=np.int64)
+        if len(addresses) == 0:
+            return
+
+        for size, counter in self.distinct.items():
+            counter.add(addresses // size)
+
+        if self.reuse.total < REUSE_PREFIX:
+            self.reuse.process(addresses[:REUSE_PREFIX - self.reuse.total])
+
+        if self.last_address is None:
+            strides = np.diff(addresses)
+        else:
+            strides = np.diff(addresses, prepend=self.last_address)
+        self.last_address = int(addresses[-1])
+        self._count_strides(strides)
+        self._count_runs(strides)
+        self._count_windows(addresses // self.block_size)
+        self.total += len(addresses)
+
+    def _count_strides(self, strides):
+        values, counts = np.unique(strides, return_counts=True)
+        if len(values) > MAX_TRACKED_STRIDES:
+            top = np.argpartition(counts, -MAX_TRACKED_STRIDES)[-MAX_TRACKED_STRIDES:]
+            values, counts = values[top], counts[top]
+        for value, count in zip(values.tolist(), counts.tolist()):
+            self.stride_counts[value] = self.stride_counts.get(value, 0) + count
+        if len(self.stride_counts) > MAX_TRACKED_STRIDES:
+            # Keep the heavy hitters only so the table stays bounded
+            kept = sorted(self.stride_counts.items(), key=lambda item: item[1], reverse=True)
+            self.stride_counts = dict(kept[:MAX_TRACKED_STRIDES // 2])
+
+    def _count_runs(self, strides):
+        if len(strides) == 0:
+            return
+        sequential = ((strides > 0) & (strides <= self.block_size)).astype(np.int8)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], sequential, [0]))))
+        starts, ends = edges[::2], edges[1::2]
+        if len(starts) == 0 or starts[0] > 0:
+            # The run left open by the previous chunk ends here
+            if self.current_run:
+                self._add_run(self.current_run)
+            self.current_run = 0
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            steps = end - start
+            if start == 0:
+                steps += self.current_run
+                self.current_run = 0
+            if end == len(sequential):
+                self.current_run = steps  # May continue into the next chunk
+            else:
+                self._add_run(steps)
+
+    def _add_run(self, steps):
+        # A run of n sequential steps covers n + 1 accesses
+        self.run_count += 1
+        self.run_accesses += steps + 1
+        self.longest_run = max(self.longest_run, steps + 1)
+
+    def _count_windows(self, blocks):
+        blocks = np.concatenate((self.pending_blocks, blocks))
+        full = len(blocks) // WINDOW_SIZE
+        self.pending_blocks = blocks[full * WINDOW_SIZE:]
+        if full == 0:
+            return
+        windows = np.sort(blocks[:full * WINDOW_SIZE].reshape(full, WINDOW_SIZE), axis=1)
+        sizes = (np.count_nonzero(np.diff(windows, axis=1), axis=1) + 1).tolist()
+        for size in sizes:
+            self._add_window(size)
+
+    def _add_window(self, size):
+        if self.window_count % self.series_step == 0:
+            self.series.append(size)
+            if len(self.series) > MAX_SERIES:
+                # Halve the sampling rate to keep the series bounded
+                self.series = self.series[::2]
+                self.series_step *= 2
+        self.window_count += 1
+        self.window_sum += size
+        self.window_min = size if self.window_min is None else min(self.window_min, size)
+        self.window_max = max(self.window_max, size)
+
+    def _reuse_histogram(self):
+        """Reuse distances grouped into power-of-two buckets"""
+        histogram = np.frombuffer(self.reuse.histogram, dtype=np.int64)
+        buckets = {}
+        for bucket in range(int(len(histogram)).bit_length() + 1):
+            low = 0 if bucket == 0 else 1 << (bucket - 1)
+            high = 1 if bucket == 0 else 1 << bucket
+            count = int(histogram[low:high].sum())
+            if count:
+                buckets[str(low) if high - low == 1 else f'{low}-{high - 1}'] = count
+        buckets['cold'] = self.reuse.cold_misses
+        return buckets
+
+    def summary(self):
+        """Return the bounded-size feature dict"""
+        if self.window_count:
+            working_set = {
+                'min': self.window_min,
+                'mean': round(self.window_sum / self.window_count, 1),
+                'max': self.window_max,
+                'series': list(self.series),
+            }
+        else:
+            # Shorter than one window: report the partial window
+            size = len(np.unique(self.pending_blocks))
+            working_set = {'min': size, 'mean': size, 'max': size, 'series': [size] if size else []}
+
+        # Close the trailing run without disturbing the streaming state
+        run_count = self.run_count
+        run_accesses = self.run_accesses
+        longest_run = self.longest_run
+        if self.current_run:
+            run_count += 1
+            run_accesses += self.current_run + 1
+            longest_run = max(longest_run, self.current_run + 1)
+
+        top_strides = sorted(self.stride_counts.items(), key=lambda item: item[1], reverse=True)[:TOP_STRIDES]
+        strides_total = max(self.total - 1, 1)
+        return {
+            'total_accesses': self.total,
+            'reference_block_size': self.block_size,
+            'unique_blocks': {size: counter.estimate() for size, counter in self.distinct.items()},
+            'reuse_distance_histogram': self._reuse_histogram(),
+            'reuse_distance_accesses': self.reuse.total,
+            'top_strides': [[stride, round(count / strides_total, 4)] for stride, count in top_strides],
+            'working_set': dict(window=WINDOW_SIZE, windows=self.window_count, **working_set),
+            'sequential_runs': {
+                'count': run_count,
+                'mean_length': round(run_accesses / run_count, 1) if run_count else 0,
+                'longest': longest_run,
+                'fraction_of_accesses': round(run_accesses / self.total, 4) if self.total else 0,
+            },
+        }
+
+def extract_features(chunks, block_size=16):
+    """Summarize an address string, array or iterable of address chunks in one pass"""
+    extractor = TraceFeatureExtractor(block_size)
+    if isinstance(chunks, str):
+        chunks = [parse_records(chunks.split())[0]]
+    elif isinstance(chunks, np.ndarray):
+        chunks = [chunks]
+    for chunk in chunks:
+        extractor.process(chunk)
+    return extractor.summary()
+
+def format_features(features):
+    """Render a feature summary as prompt text"""
+    ws = features['working_set']
+    runs = features['sequential_runs']
+    unique = ', '.join(f"{count} at block size {size}" for size, count in features['unique_blocks'].items())
+    reuse = ', '.join(f"{bucket}: {count}" for bucket, count in features['reuse_distance_histogram'].items())
+    strides = ', '.join(f"{stride} ({fraction * 100:.1f}%)" for stride, fraction in features['top_strides']) or 'none'
+    return (
+        f"- Total accesses: {features['total_accesses']}\n"
+        f"- Unique blocks: {unique}\n"
+        f"- Reuse-distance histogram (distinct blocks between reuses, block size "
+        f"{features['reference_block_size']}, first {features['reuse_distance_accesses']} accesses): {reuse}\n"
+        f"- Most common address strides: {strides}\n"
+        f"- Working set per {ws['window']}-access window: min {ws['min']}, mean {ws['mean']}, max {ws['max']} blocks; "
+        f"sampled series: {ws['series']}\n"
+        f"- Sequential runs: {runs['count']} runs, mean length {runs['mean_length']}, longest {runs['longest']}, "
+        f"covering {runs['fraction_of_accesses'] * 100:.1f}% of accesses"
+    )
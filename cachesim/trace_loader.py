@@ -0,0 +1,278 @@
+import gzip
+import itertools
+import numpy as np
+from .profiling import stage
+
+# Lines parsed per chunk when streaming a trace file
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# 'hex' is a text trace whose addresses are all hexadecimal, with or without a 0x prefix
+TRACE_FORMATS = ('text', 'hex', 'din', 'binary')
+
+# Operation codes; they match the Dinero "din" record labels
+OP_READ = 0
+OP_WRITE = 1
+OP_IFETCH = 2
+
+# din labels 3 (escape) and 4 (flush) are not memory accesses
+DIN_ACCESS_LABELS = ('0', '1', '2')
+
+# Records checked by detect_format() before a trace is taken for din
+DETECT_LINES = 8
+
+# Optional operation prefixes of text trace tokens, e.g. "W:0x40"
+OP_PREFIXES = {'R': OP_READ, 'W': OP_WRITE, 'I': OP_IFETCH}
+
+def open_trace_file(path):
+    """Open a trace for reading as text, transparently decompressing gzip files"""
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    if compressed:
+        return gzip.open(path, 'rt')
+    return open(path, 'r')
+
+def detect_format(path):
+    """Guess the trace format from its first records
+
+    Binary traces start with their magic number. Dinero din records are
+    "<label> <hex address> [size]" with a label from 0 to 4; a trace is only
+    taken for din when each of its first DETECT_LINES records has that shape,
+    so text lines of several small addresses are not. Text whose first
+    address is only valid as bare hex (e.g. 7fff1a20) is a hex trace;
+    anything else is treated as plain text addresses, so hex traces that
+    start with an all-digit address need trace_format='hex'.
+    """
+    from .binary_trace import is_binary_trace
+    if is_binary_trace(path):
+        return 'binary'
+    records = []
+    with open_trace_file(path) as f:
+        for line in f:
+            fields = line.split()
+            if fields and not fields[0].startswith('#'):
+                records.append(fields)
+                if len(records) == DETECT_LINES:
+                    break
+    if not records:
+        return 'text'
+    if all(_is_din_record(fields) for fields in records):
+        return 'din'
+    return 'hex' if _is_bare_hex(records[0][0].rpartition(':')[2]) else 'text'
+
+def _is_din_record(fields):
+    if not 2 <= len(fields) <= 3 or fields[0] not in ('0', '1', '2', '3', '4'):
+        return False
+    try:
+        int(fields[1], 16)
+        return True
+    except ValueError:
+        return False
+
+def _is_bare_hex(token):
+    if token[:2] in ('0x', '0X'):
+        return False
+    try:
+        int(token)
+        return False
+    except ValueError:
+        pass
+    try:
+        int(token, 16)
+        return True
+    except ValueError:
+        return False
+
+def parse_addresses(tokens, base=10):
+    """Convert address tokens to an int64 array
+
+    With base 10 tokens are decimal, or hex with a 0x prefix; with base 16
+    every token is hex and the prefix is optional.
+    """
+    if base == 10:
+        try:
+            return np.array(tokens, dtype=np.int64)
+        except ValueError:
+            pass
+    # Slow path for hex tokens; int() still rejects anything malformed
+    return np.array([_parse_address(token, base) for token in tokens], dtype=np.int64)
+
+def _parse_address(token, base=10):
+    return int(token, 16) if base == 16 or token[:2] in ('0x', '0X') else int(token)
+
+def parse_records(tokens, base=10):
+    """Parse address tokens that may carry an R:, W: or I: operation prefix
+
+    Args:
+        base (int): 10 for decimal addresses (hex needs a 0x prefix), 16 for
+            hex addresses with or without the prefix
+
+    Returns:
+        tuple: (int64 addresses, uint8 OP_* codes), with ops None when no
+            token has a prefix (every access is a read)
+    """
+    if base == 10:
+        try:
+            return np.array(tokens, dtype=np.int64), None
+        except ValueError:
+            pass
+    if not any(':' in token for token in tokens):
+        return parse_addresses(tokens, base), None
+    addresses = []
+    ops = bytearray()
+    for token in tokens:
+        prefix, _, value = token.rpartition(':')
+        if prefix:
+            op = OP_PREFIXES.get(prefix.upper())
+            if op is None:
+                raise ValueError(f"Unknown operation prefix in {token!r}")
+            ops.append(op)
+        else:
+            ops.append(OP_READ)
+        addresses.append(_parse_address(value, base))
+    return np.array(addresses, dtype=np.int64), np.frombuffer(ops, dtype=np.uint8)
+
+def parse_core_records(tokens, base=10):
+    """Parse "core:[op:]address" tokens of a multi-core trace
+
+    The core ID is a decimal number and may be left out (core 0); the
+    operation prefix and base are as for parse_records(), e.g. "1:W:0x40".
+
+    Returns:
+        tuple: (int32 core IDs, int64 addresses, uint8 OP_* codes or None)
+    """
+    cores = []
+    records = []
+    for token in tokens:
+        core, _, rest = token.partition(':')
+        if rest and core.isdigit():
+            cores.append(int(core))
+            records.append(rest)
+        else:
+            cores.append(0)
+            records.append(token)
+    addresses, ops = parse_records(records, base)
+    return np.array(cores, dtype=np.int32), addresses, ops
+
+def load_core_trace(path, base=10):
+    """Read a whole multi-core text trace (optionally gzip-compressed) into (cores, addresses, ops)"""
+    tokens = []
+    with open_trace_file(path) as f:
+        for line in f:
+            if not line.startswith('#'):
+                tokens.extend(line.split())
+    return parse_core_records(tokens, base)
+
+def _parse_text_lines(lines, base=10):
+    tokens = []
+    for line in lines:
+        if line.startswith('#'):
+            continue
+        tokens.extend(line.split())
+    return parse_records(tokens, base)
+
+def _parse_din_lines(lines):
+    addresses = []
+    ops = bytearray()
+    for line in lines:
+        fields = line.split()
+        if len(fields) >= 2 and fields[0] in DIN_ACCESS_LABELS:
+            addresses.append(int(fields[1], 16))
+            ops.append(int(fields[0]))
+    return np.array(addresses, dtype=np.int64), np.frombuffer(ops, dtype=np.uint8)
+
+def iter_trace_records(path, chunk_size=DEFAULT_CHUNK_SIZE, trace_format=None):
+    """Stream a trace file as (addresses, ops) chunks
+
+    ops is a uint8 array of OP_* codes for traces that carry an operation
+    type per access (din and binary traces, and text tokens with an R:, W:
+    or I: prefix), and None for plain address chunks. trace_format is one
+    of TRACE_FORMATS, detected from the file when None.
+    """
+    if trace_format is None:
+        trace_format = detect_format(path)
+    if trace_format not in TRACE_FORMATS:
+        raise ValueError(f"Unknown trace format {trace_format!r}")
+
+    if trace_format == 'binary':
+        from .binary_trace import open_binary_trace
+        trace = open_binary_trace(path)
+        for start in range(0, trace.count, chunk_size):
+            with stage('load'):
+                ops = trace.ops[start:start + chunk_size] if trace.ops is not None else None
+                # 64-bit addresses are mapped as int64 and passed through without copying
+                addresses = np.asarray(trace.addresses[start:start + chunk_size], dtype=np.int64)
+            yield addresses, ops
+        return
+
+    with open_trace_file(path) as f:
+        while True:
+            with stage('load'):
+                lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                break
+            with stage('parse'):
+                if trace_format == 'din':
+                    addresses, ops = _parse_din_lines(lines)
+                else:
+                    addresses, ops = _parse_text_lines(lines, 16 if trace_format == 'hex' else 10)
+            if len(addresses):
+                yield addresses, ops
+
+def iter_trace_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, trace_format=None):
+    """Stream a trace file as int64 address arrays of about chunk_size entries
+
+    Args:
+        path (str): Text trace (one or more addresses per line), optionally
+            gzip-compressed, a Dinero din trace or a binary trace
+        chunk_size (int): Records per chunk, which bounds memory use
+        trace_format (str): 'text', 'hex', 'din' or 'binary'; detected from
+            the file when None
+
+    Yields:
+        np.ndarray: The next chunk of addresses
+    """
+    for addresses, _ in iter_trace_records(path, chunk_size, trace_format):
+        yield addresses
+
+def load_trace(path, trace_format=None):
+    """Read a whole trace file into one int64 address array
+
+    Binary traces are returned as a read-only memory map without parsing.
+    """
+    if trace_format == 'binary' or (trace_format is None and detect_format(path) == 'binary'):
+        from .binary_trace import open_binary_trace
+        return open_binary_trace(path).addresses
+    chunks = list(iter_trace_chunks(path, trace_format=trace_format))
+    if not chunks:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(chunks)
+
+def load_trace_records(path, trace_format=None):
+    """Read a whole trace file into (addresses, ops)
+
+    ops is None when the trace has no operation types. Binary traces are
+    returned as read-only memory maps without parsing.
+    """
+    if trace_format == 'binary' or (trace_format is None and detect_format(path) == 'binary'):
+        from .binary_trace import open_binary_trace
+        trace = open_binary_trace(path)
+        return trace.addresses, trace.ops
+    records = list(iter_trace_records(path, trace_format=trace_format))
+    if not records:
+        return np.empty(0, dtype=np.int64), None
+    addresses = np.concatenate([chunk for chunk, _ in records])
+    if all(ops is None for _, ops in records):
+        return addresses, None
+    ops = np.concatenate([np.zeros(len(chunk), dtype=np.uint8) if ops is None else ops for chunk, ops in records])
+    return addresses, ops
+
+def simulate_trace_file(simulator, path, chunk_size=DEFAULT_CHUNK_SIZE, trace_format=None):
+    """Feed a trace file through simulator.run_trace() chunk by chunk, with its operation types
+
+    Returns:
+        int: Number of hits in the trace
+    """
+    hits = 0
+    for addresses, ops in iter_trace_records(path, chunk_size, trace_format):
+        hits += simulator.run_trace(addresses, ops)
+    return hits
@@ -0,0 +1,211 @@
+import argparse
+import os
+import numpy as np
+from .trace_loader import DEFAULT_CHUNK_SIZE
+
+# Trace lengths offered in the GUI
+GENERATOR_SIZES = {'10': 10, '1K': 10 ** 3, '100K': 10 ** 5, '1M': 10 ** 6, '10M': 10 ** 7, '100M': 10 ** 8}
+
+def _indexed(count, chunk_size, address_of):
+    """Yield address_of(indices) for consecutive index ranges; endless when count is None"""
+    start = 0
+    while count is None or start < count:
+        end = start + chunk_size if count is None else min(start + chunk_size, count)
+        yield address_of(np.arange(start, end, dtype=np.int64))
+        start = end
+
+def sequential(count=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=0, start=0, stride=1, footprint=None):
+    """Scan upwards from start in steps of stride, wrapping after footprint bytes if given"""
+    if stride <= 0:
+        raise ValueError("Stride must be a positive integer")
+    if footprint is None:
+        return _indexed(count, chunk_size, lambda i: start + i * stride)
+    steps = max(1, footprint // stride)
+    return _indexed(count, chunk_size, lambda i: start + i % steps * stride)
+
+def loop(count=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=0, working_set=4096, stride=4, start=0):
+    """Sweep the same working_set bytes over and over, stride bytes at a time"""
+    return sequential(count, chunk_size, seed, start, stride, working_set)
+
+def zipf(count=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=0, num_blocks=4096, alpha=1.0, block_size=64, start=0):
+    """Hot set of num_blocks blocks with Zipf(alpha)-distributed popularity
+
+    Popularity ranks are scattered over the blocks by a seeded permutation,
+    so the hottest blocks are not neighbours.
+    """
+    if num_blocks <= 0:
+        raise ValueError("The hot set needs at least one block")
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, num_blocks + 1) ** alpha
+    cdf = np.cumsum(weights / weights.sum())
+    blocks = rng.permutation(num_blocks).astype(np.int64)
+
+    def generate():
+        produced = 0
+        while count is None or produced < count:
+            n = chunk_size if count is None else min(chunk_size, count - produced)
+            ranks = np.minimum(np.searchsorted(cdf, rng.random(n), side='right'), num_blocks - 1)
+            yield start + blocks[ranks] * block_size
+            produced += n
+    return generate()
+
+def pointer_chase(count=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=0, nodes=4096, node_size=64, start=0):
+    """Follow a linked list whose nodes sit in random order in memory
+
+    The list is one cycle through every node, so each node is visited once
+    per lap and consecutive nodes are rarely adjacent.
+    """
+    if nodes <= 0:
+        raise ValueError("The list needs at least one node")
+    order = np.random.default_rng(seed).permutation(nodes).astype(np.int64)
+    return _indexed(count, chunk_size, lambda i: start + order[i % nodes] * node_size)
+
+def matrix_multiply(count=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=0, n=64, tile=16, element_size=8, start=0):
+    """Tiled C += A * B over row-major n x n matrices, repeated until count accesses
+
+    The ii, jj, kk tile loops enclose the i, j, k element loops, and every
+    innermost iteration reads A[i][k] and B[k][j] and updates C[i][j].
+    """
+    if n <= 0 or tile <= 0 or n % tile:
+        raise ValueError("The tile size must divide the matrix size")
+    tiles = n // tile
+    matrix_bytes = n * n * element_size
+
+    def address_of(index):
+        operand = index % 3
+        rest = index // 3
+        k = rest % tile
+        rest //= tile
+        j = rest % tile
+        rest //= tile
+        i = rest % tile
+        rest //= tile
+        kk = rest % tiles
+        rest //= tiles
+        jj = rest % tiles
+        ii = rest // tiles % tiles
+        row = ii * tile + i
+        col = jj * tile + j
+        inner = kk * tile + k
+        element = np.where(operand == 0, row * n + inner, np.where(operand == 1, inner * n + col, row * n + col))
+        return start + operand * matrix_bytes + element * element_size
+    return _indexed(count, chunk_size, address_of)
+
+class _Stream:
+    """Hands out an endless chunk generator's addresses in arbitrary amounts"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buffer = np.empty(0, dtype=np.int64)
+
+    def take(self, n):
+        parts = []
+        while n > 0:
+            if len(self.buffer) == 0:
+                self.buffer = next(self.chunks)
+            part = self.buffer[:n]
+            self.buffer = self.buffer[n:]
+            parts.append(part)
+            n -= len(part)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+def mixture(count=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=0, components=None, burst=64):
+    """Interleave other workloads in bursts
+
+    Args:
+        components: (weight, workload name, params) triples; each burst of
+            burst accesses comes from one component, picked by weight
+        burst (int): Accesses per burst
+    """
+    components = components if components is not None else DEFAULT_MIXTURE
+    if not components or burst <= 0:
+        raise ValueError("A mixture needs components and a positive burst length")
+    seeds = np.random.SeedSequence(seed).spawn(len(components) + 1)
+    rng = np.random.default_rng(seeds[0])
+    weights = np.array([weight for weight, _, _ in components], dtype=float)
+    cdf = np.cumsum(weights / weights.sum())
+    streams = [_Stream(generate(name, None, int(child.generate_state(1)[0]), chunk_size, **params))
+               for (_, name, params), child in zip(components, seeds[1:])]
+
+    def interleave():
+        produced = 0
+        current = 0
+        burst_left = 0
+        while count is None or produced < count:
+            n = chunk_size if count is None else min(chunk_size, count - produced)
+            # Component of every access in the chunk; bursts may continue into the next chunk
+            labels = np.empty(n, dtype=np.int64)
+            filled = min(burst_left, n)
+            labels[:filled] = current
+            burst_left -= filled
+            if filled < n:
+                bursts = -(-(n - filled) // burst)
+                picks = np.minimum(np.searchsorted(cdf, rng.random(bursts), side='right'), len(components) - 1)
+                labels[filled:] = np.repeat(picks, burst)[:n - filled]
+                current = int(picks[-1])
+                burst_left = bursts * burst - (n - filled)
+            chunk = np.empty(n, dtype=np.int64)
+            for component, stream in enumerate(streams):
+                positions = np.flatnonzero(labels == component)
+                if len(positions):
+                    chunk[positions] = stream.take(len(positions))
+            yield chunk
+            produced += n
+    return interleave()
+
+# Components are placed in separate address ranges so they compete for the cache, not share blocks
+DEFAULT_MIXTURE = (
+    (0.5, 'Zipf Hot Set', {}),
+    (0.3, 'Sequential', {'start': 1 << 32, 'stride': 4}),
+    (0.2, 'Pointer Chase', {'start': 1 << 33}),
+)
+
+# Name -> (generator, default parameters)
+WORKLOADS = {
+    'Sequential': (sequential, {}),
+    'Strided': (sequential, {'stride': 64}),
+    'Zipf Hot Set': (zipf, {}),
+    'Loop': (loop, {}),
+    'Pointer Chase': (pointer_chase, {}),
+    'Matrix Multiply': (matrix_multiply, {}),
+    'Mixed': (mixture, {}),
+}
+
+def generate(name, count=None, seed=0, chunk_size=DEFAULT_CHUNK_SIZE, **params):
+    """Return an iterator over the named workload's addresses as int64 chunks
+
+    Chunks are generated lazily, so count can be far larger than memory
+    (None runs forever). The same name, seed and parameters always give the
+    same addresses, whatever the chunk size.
+    """
+    try:
+        generator, defaults = WORKLOADS[name]
+    except KeyError:
+        raise ValueError(f"Unknown workload {name!r}") from None
+    if count is not None and count < 0:
+        raise ValueError("The access count cannot be negative")
+    return generator(count, chunk_size, seed, **{**defaults, **params})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic address trace')
+    parser.add_argument('workload', choices=tuple(WORKLOADS))
+    parser.add_argument('output', help='trace file to write (binary if it ends in .ctr, text otherwise)')
+    parser.add_argument('--count', type=lambda text: int(float(text)), required=True,
+                        help='number of accesses, e.g. 1e8')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    chunks = generate(args.workload, args.count, args.seed)
+    if args.output.endswith('.ctr'):
+        from .binary_trace import write_binary_trace
+        count = write_binary_trace(args.output, ((chunk, None) for chunk in chunks))
+    else:
+        count = 0
+        with open(args.output, 'w') as f:
+            for chunk in chunks:
+                np.savetxt(f, chunk, fmt='%d')
+                count += len(chunk)
+    print(f"Wrote {count} accesses to {args.output} ({os.path.getsize(args.output)} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import time
+import numpy as np
+
+# Shortest interval between live redraws (30 fps)
+FRAME_INTERVAL = 1 / 30
+# Live redraws may use at most this share of the Tk thread's time
+MAX_RENDER_SHARE = 0.1
+# Headroom left above the data when an axis has to grow, so it rarely grows again
+AXIS_GROWTH = 1.5
+HIT_COLOR = '#4CAF50'
+MISS_COLOR = '#F44336'
+RATE_COLOR = '#2196F3'
+INFO_BOX = dict(facecolor='#E0E0E0', alpha=0.5)
+
+def hit_rate_series(simulator):
+    """Snapshot of the simulator's windowed hit rates for the live chart
+
+    Returns:
+        tuple: (window size, window start indices, hit rate of each window,
+            overall hit rate up to the end of each window); None until the
+            trace spans more than one window
+    """
+    instrumentation = simulator.instrumentation
+    if instrumentation is None:
+        return None
+    starts, hits, misses = instrumentation.series()
+    if len(starts) < 2:
+        return None
+    totals = hits + misses
+    rates = np.divide(hits, totals, out=np.zeros(len(totals)), where=totals > 0)
+    # Accesses before the first retained window (earlier windows or a warm start) count toward the overall rate
+    hits_before = simulator.hits - hits.sum()
+    total_before = simulator.hits + simulator.misses - totals.sum()
+    running = (hits_before + np.cumsum(hits)) / np.maximum(total_before + np.cumsum(totals), 1)
+    return instrumentation.window_size, starts, rates, running
+
+class LiveChart:
+    """Results chart whose artists are created once and then updated in place
+
+    It has two layouts: the hit/miss bar chart, and the hit rate per window
+    over the trace. Bars, lines and labels are animated artists. A full draw
+    caches everything else (axes, ticks, grid, legend) with copy_from_bbox.
+    A live update then restores that background and redraws only the
+    animated artists. A full draw happens only when the layout changes or an
+    axis has to grow.
+
+    Live updates are throttled to FRAME_INTERVAL, and further when a frame is
+    slow to draw, so rendering keeps to MAX_RENDER_SHARE of the time.
+    """
+
+    def __init__(self, fig, ax, canvas):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.layout = None
+        self.artists = []
+        self.background = None
+        self.limit = 0
+        self.last_frame = 0.0
+        self.frame_cost = 0.0
+        canvas.mpl_connect('draw_event', self._capture_background)
+
+    def clear(self):
+        """Hand the axes over to a one-off plot; the next update rebuilds the live artists"""
+        self.ax.clear()
+        self.layout = None
+        self.artists = []
+        self.background = None
+        self.limit = 0
+        return self.ax
+
+    def _due(self, force):
+        if force:
+            return True
+        interval = max(FRAME_INTERVAL, self.frame_cost / MAX_RENDER_SHARE)
+        return time.perf_counter() - self.last_frame >= interval
+
+    def _capture_background(self, event):
+        # Animated artists are left out of full draws: save what was drawn, then add them on top
+        if self.layout is None:
+            return
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    def _render(self, full):
+        start = time.perf_counter()
+        if full or self.background is None:
+            self.fig.tight_layout()
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            for artist in self.artists:
+                self.ax.draw_artist(artist)
+            self.canvas.blit(self.fig.bbox)
+        self.last_frame = time.perf_counter()
+        self.frame_cost = self.last_frame - start
+
+    def _build_counts(self):
+        ax = self.clear()
+        self.bars = ax.bar(['Hits', 'Misses'], [0, 0], color=[HIT_COLOR, MISS_COLOR], animated=True)
+        self.bar_labels = [ax.text(bar.get_x() + bar.get_width() / 2, 0, '', ha='center', va='bottom',
+                                   animated=True)
+                           for bar in self.bars]
+        self.info = ax.text(0.5, 0.95, '', ha='center', va='top', transform=ax.transAxes, bbox=INFO_BOX,
+                            animated=True)
+        ax.set_title('Cache Performance')
+        ax.set_ylabel('Count')
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        self.artists = [*self.bars, *self.bar_labels, self.info]
+        self.layout = 'counts'
+
+    def show_counts(self, hits, misses, lines=(), force=False):
+        """Bar chart of hits and misses, with extra text lines under the hit rate
+
+        Args:
+            force (bool): Draw now and fit the axis to the data (for final
+                results); otherwise the update may be skipped to keep to
+                the frame budget
+        """
+        if not self._due(force):
+            return
+        full = force or self.layout != 'counts'
+        if full:
+            self._build_counts()
+        top = max(hits, misses, 1)
+        if force or top > self.limit:
+            # The info box covers the top of the axes, so leave room for it
+            self.limit = top * (1.4 if force else AXIS_GROWTH * 1.4)
+            self.ax.set_ylim(0, self.limit)
+            full = True
+
+        for bar, label, count in zip(self.bars, self.bar_labels, (hits, misses)):
+            bar.set_height(count)
+            label.set_y(count)
+            label.set_text(f'{count:,}')
+        total = hits + misses
+        text = [f'Hit Rate: {hits / total * 100:.1f}%'] if total else []
+        self.info.set_text('\n'.join([*text, *lines]))
+        self.info.set_visible(bool(text or lines))
+        self._render(full)
+
+    def _build_series(self, window_size):
+        ax = self.clear()
+        self.window_line, = ax.plot([], [], drawstyle='steps-post', color=HIT_COLOR, linewidth=1,
+                                    label='Window', animated=True)
+        self.running_line, = ax.plot([], [], color=RATE_COLOR, linestyle='--', label='Overall', animated=True)
+        self.info = ax.text(0.5, 0.03, '', ha='center', va='bottom', transform=ax.transAxes, fontsize=8,
+                            bbox=INFO_BOX, animated=True)
+        ax.legend(loc='upper right')
+        ax.set_title(f'Hit Rate per {window_size:,} Accesses')
+        ax.set_xlabel('Access')
+        ax.set_ylabel('Hit Rate (%)')
+        ax.set_ylim(0, 105)
+        ax.grid(linestyle='--', alpha=0.7)
+        self.artists = [self.window_line, self.running_line, self.info]
+        self.layout = ('series', window_size)
+
+    def show_series(self, series, lines=(), end=None, force=False):
+        """Hit rate per window and overall, from a hit_rate_series() snapshot
+
+        Args:
+            lines: Text shown in a box at the bottom
+            end (int): Accesses the run will reach, if known, so the x axis
+                never has to grow
+            force (bool): Draw now and fit the axis to the data
+        """
+        if not self._due(force):
+            return
+        window_size, starts, rates, running = series
+        full = force or self.layout != ('series', window_size)
+        if full:
+            self._build_series(window_size)
+        last = starts[-1] + window_size
+        if force or last > self.limit:
+            if force:
+                self.limit = last
+            else:
+                self.limit = end if end and end >= last else last * AXIS_GROWTH
+            self.ax.set_xlim(starts[0], self.limit)
+            full = True
+
+        # A final point at the end of the open window so its step is drawn
+        x = np.append(starts, last)
+        self.window_line.set_data(x, np.append(rates, rates[-1]) * 100)
+        self.running_line.set_data(x, np.append(running, running[-1]) * 100)
+        self.info.set_text('\n'.join(lines))
+        self.info.set_visible(bool(lines))
+        self._render(full)
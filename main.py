@@ -1,93 +1,42 @@
+import os
+import queue
+import threading
+from contextlib import nullcontext
 import tkinter as tk
-from tkinter import ttk, messagebox 
+from tkinter import ttk, messagebox, filedialog
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from collections import OrderedDict
 import numpy as np 
+from cachesim.cache_simulator import CacheSimulator, DEFAULT_WAYS, WRITE_POLICIES
+from cachesim.replacement_policies import REPLACEMENT_POLICIES
+from cachesim.stack_distance import StackDistanceAnalyzer
+from cachesim.sampling import ShardsMRC
+from cachesim.trace_loader import iter_trace_records, parse_records, detect_format
+from cachesim.binary_trace import open_binary_trace
+from cachesim.checkpoint import read_checkpoint, restore_checkpoint, save_checkpoint, skip_accesses
+from cachesim.profiling import active_profiler, profiling_from_environment, stage, start_profiling, stop_profiling
+from cachesim.workload_generators import GENERATOR_SIZES
+from cache_view import CacheView
+from live_chart import LiveChart, hit_rate_series
 from mock_data_loader import MockDataLoader
-from ai_optimizer import AIOptimizer
 from api_key_manager import APIKeyManager
 
-class CacheSimulator:
-    def __init__(self):
-        self.cache = OrderedDict() #track insertion order
-        self.hits = 0
-        self.misses = 0
-        self.cache_size = 0
-        self.block_size = 0
-        self.associativity = 'Direct'
-        self.replacement_policy = 'LRU'
-
-    def reset(self):
-        self.cache.clear()
-        self.hits = 0
-        self.misses = 0
-
-    def access_memory(self, address):
-        # Calculate block address
-        block_address = address // self.block_size
-        
-        # Handle different associativity types
-        if self.associativity == 'Direct':
-            # Direct mapping: one fixed location for each block
-            cache_line = block_address % self.cache_size
-            if cache_line in self.cache and self.cache[cache_line]['block'] == block_address:
-                self.hits += 1
-                if self.replacement_policy == 'LRU':
-                    self.cache.move_to_end(cache_line)
-            else:
-                self.misses += 1
-                if len(self.cache) >= self.cache_size:
-                    self.cache.popitem(last=False)
-                self.cache[cache_line] = {'block': block_address, 'data': True}
-                
-        elif self.associativity == 'Set-Associative':
-            # Set-associative: multiple blocks per set
-            set_size = 2  # 2-way set associative
-            set_index = block_address % (self.cache_size // set_size)
-            set_found = False
-            
-            # Check if block exists in the set
-            for cache_line in list(self.cache.keys()):
-                if cache_line // (self.cache_size // set_size) == set_index:
-                    if self.cache[cache_line]['block'] == block_address:
-                        self.hits += 1
-                        if self.replacement_policy == 'LRU':
-                            self.cache.move_to_end(cache_line)
-                        set_found = True
-                        break
-            
-            if not set_found:
-                self.misses += 1
-                # Find or create space in the set
-                set_lines = [line for line in self.cache.keys() 
-                           if line // (self.cache_size // set_size) == set_index]
-                if len(set_lines) >= set_size:
-                    self.cache.pop(set_lines[0])
-                new_line = set_index * set_size + (len(set_lines) % set_size)
-                self.cache[new_line] = {'block': block_address, 'data': True}
-                
-        else:  # Fully-Associative
-            # Can place block anywhere in cache
-            block_found = False
-            for cache_line, entry in self.cache.items():
-                if entry['block'] == block_address:
-                    self.hits += 1
-                    if self.replacement_policy == 'LRU':
-                        self.cache.move_to_end(cache_line)
-                    block_found = True
-                    break
-                    
-            if not block_found:
-                self.misses += 1
-                if len(self.cache) >= self.cache_size:
-                    self.cache.popitem(last=False)
-                # Use the block address as the cache line for simplicity
-                self.cache[len(self.cache)] = {'block': block_address, 'data': True}
-
-    def get_hit_rate(self):
-        total = self.hits + self.misses
-        return (self.hits / total) if total > 0 else 0
+# Accesses simulated between progress reports and cancellation checks
+SIMULATION_STEP = 1 << 16
+# Interval for polling the simulation worker's queue (about 60 fps)
+POLL_INTERVAL_MS = 16
+# Optimizer combobox entries and the AIOptimizer mode each selects
+OPTIMIZER_CHOICES = {'Gemini AI': 'remote', 'Local Simulation': 'local'}
+# Interval for checking whether an AI recommendation has arrived
+AI_POLL_INTERVAL_MS = 50
+# Windows in the hit-rate time series when the trace length is known up front
+TIME_SERIES_WINDOWS = 500
+# Smallest time-series window; shorter traces keep the hit/miss bar chart
+MIN_TIME_SERIES_WINDOW = 16
+# Accesses per time-series window when it is not (the newest windows are kept)
+DEFAULT_TIME_SERIES_WINDOW = 4096
+# Miss-ratio curve choices and the share of blocks each samples (None: exact)
+MRC_SAMPLE_RATES = {'Exact': None, '10% of blocks': 0.1, '1% of blocks': 0.01, '0.1% of blocks': 0.001}
 
 class CacheSimulatorGUI:
     def __init__(self, root):
@@ -97,10 +46,9 @@ class CacheSimulatorGUI:
         self.root.minsize(800, 600)     # Set minimum window size
         self.simulator = CacheSimulator()
         
-        # Initialize AI components
-        self.ai_optimizer = AIOptimizer()
+        # Initialize AI components; the optimizer itself is created on first use
+        self._ai_optimizer = None
         self.api_key_manager = APIKeyManager(root)
-        self.ai_optimizer.set_api_key(self.api_key_manager.get_api_key())
         
         # Configure grid weights for responsive layout
         self.root.columnconfigure(0, weight=1)
@@ -155,13 +103,68 @@ class CacheSimulatorGUI:
         associativity_combo = ttk.Combobox(config_frame, textvariable=self.associativity_var, width=15, state='readonly')
         associativity_combo['values'] = ('Direct', 'Set-Associative', 'Fully-Associative')
         associativity_combo.grid(row=2, column=1, padx=5, pady=8, sticky='w')
+        associativity_combo.bind('<<ComboboxSelected>>', self.update_ways_state)
+        
+        # Ways per set; Direct is always 1 way and Fully-Associative uses every line
+        ttk.Label(config_frame, text='Ways:').grid(row=3, column=0, padx=5, pady=8, sticky='w')
+        self.ways_var = tk.StringVar(value=str(DEFAULT_WAYS))
+        self.ways_spinbox = ttk.Spinbox(config_frame, from_=1, to=100, textvariable=self.ways_var, width=10)
+        self.ways_spinbox.grid(row=3, column=1, padx=5, pady=8, sticky='w')
         
         # Replacement Policy with improved dropdown
-        ttk.Label(config_frame, text='Replacement Policy:').grid(row=3, column=0, padx=5, pady=8, sticky='w')
+        ttk.Label(config_frame, text='Replacement Policy:').grid(row=4, column=0, padx=5, pady=8, sticky='w')
         self.policy_var = tk.StringVar(value='LRU')
         policy_combo = ttk.Combobox(config_frame, textvariable=self.policy_var, width=15, state='readonly')
-        policy_combo['values'] = ('LRU', 'FIFO')
-        policy_combo.grid(row=3, column=1, padx=5, pady=8, sticky='w')
+        policy_combo['values'] = tuple(REPLACEMENT_POLICIES)
+        policy_combo.grid(row=4, column=1, padx=5, pady=8, sticky='w')
+        
+        # How stores (W: accesses) are handled
+        ttk.Label(config_frame, text='Write Policy:').grid(row=5, column=0, padx=5, pady=8, sticky='w')
+        self.write_policy_var = tk.StringVar(value='Write-Back')
+        write_policy_combo = ttk.Combobox(config_frame, textvariable=self.write_policy_var, width=15, state='readonly')
+        write_policy_combo['values'] = WRITE_POLICIES
+        write_policy_combo.grid(row=5, column=1, padx=5, pady=8, sticky='w')
+        
+        self.write_allocate_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(config_frame, text='Write-Allocate', variable=self.write_allocate_var).grid(
+            row=6, column=1, padx=5, pady=8, sticky='w')
+        
+        # Where "Auto Customize" gets its recommendation from
+        ttk.Label(config_frame, text='Optimizer:').grid(row=7, column=0, padx=5, pady=8, sticky='w')
+        self.optimizer_var = tk.StringVar(value='Gemini AI')
+        optimizer_combo = ttk.Combobox(config_frame, textvariable=self.optimizer_var, width=15, state='readonly')
+        optimizer_combo['values'] = tuple(OPTIMIZER_CHOICES)
+        optimizer_combo.grid(row=7, column=1, padx=5, pady=8, sticky='w')
+        self.update_ways_state()
+        
+        # Save the cache state, or warm-start the next run from a saved one
+        ttk.Label(config_frame, text='Checkpoint:').grid(row=8, column=0, padx=5, pady=8, sticky='w')
+        checkpoint_frame = ttk.Frame(config_frame)
+        checkpoint_frame.grid(row=8, column=1, padx=5, pady=8, sticky='w')
+        ttk.Button(checkpoint_frame, text='Save...', command=self.save_checkpoint_file, width=8).pack(side=tk.LEFT)
+        ttk.Button(checkpoint_frame, text='Warm Start...', command=self.load_warm_start, width=12).pack(
+            side=tk.LEFT, padx=5)
+        ttk.Button(checkpoint_frame, text='Clear', command=self.clear_warm_start, width=6).pack(side=tk.LEFT)
+        self.warm_start_path = None
+        self.warm_start_label = ttk.Label(config_frame, text='Starting cold', foreground='gray')
+        self.warm_start_label.grid(row=9, column=1, padx=5, sticky='w')
+        # Accesses of the current source that the simulator's state reflects
+        self.simulation_position = 0
+        
+        # Stage timings and access counters of the following runs (off unless asked for)
+        ttk.Label(config_frame, text='Profiling:').grid(row=10, column=0, padx=5, pady=8, sticky='w')
+        profiling_frame = ttk.Frame(config_frame)
+        profiling_frame.grid(row=10, column=1, padx=5, pady=8, sticky='w')
+        self.profiling_var = tk.BooleanVar(value=active_profiler() is not None)
+        ttk.Checkbutton(profiling_frame, text='Record', variable=self.profiling_var,
+                        command=self.toggle_profiling).pack(side=tk.LEFT)
+        ttk.Button(profiling_frame, text='Save Report...', command=self.save_profile_report, width=14).pack(
+            side=tk.LEFT, padx=5)
+        
+        # 3C miss classes run a shadow cache per access, so they are off unless asked for
+        self.classify_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(config_frame, text='Classify Misses (3C, slower)', variable=self.classify_var).grid(
+            row=11, column=1, padx=5, pady=8, sticky='w')
         
         # Memory Access Pattern Frame (right side of config tab)
         pattern_frame = ttk.LabelFrame(config_tab, text='Memory Access Pattern', padding='10')
@@ -174,26 +177,49 @@ class CacheSimulatorGUI:
         access_pattern_entry.grid(row=0, column=0, columnspan=2, padx=5, pady=8, sticky='ew')
         
         # Help text for access pattern
-        help_text = ttk.Label(pattern_frame, text='Enter space-separated memory addresses (e.g., "0 1 2 3")', 
+        help_text = ttk.Label(pattern_frame, text='Enter space-separated memory addresses, W: for stores (e.g., "0 W:1 2 3")', 
                              font=('Arial', 9, 'italic'), foreground='gray')
         help_text.grid(row=1, column=0, columnspan=2, padx=5, pady=2, sticky='w')
         
+        # Trace file streamed from disk instead of the pattern entry
+        trace_frame = ttk.Frame(pattern_frame)
+        trace_frame.grid(row=2, column=0, columnspan=2, padx=5, pady=5, sticky='ew')
+        self.trace_path_var = tk.StringVar()
+        ttk.Label(trace_frame, text='Trace File:').pack(side=tk.LEFT)
+        ttk.Button(trace_frame, text='Browse...', command=self.load_trace_file, width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Button(trace_frame, text='Clear', command=self.clear_trace_file, width=6).pack(side=tk.LEFT)
+        self.trace_file_label = ttk.Label(trace_frame, text='(none)', foreground='gray')
+        self.trace_file_label.pack(side=tk.LEFT, padx=5)
+        
         # Create and add the mock data loader with better layout
         self.mock_loader = MockDataLoader(self.root, self.access_pattern_var)
-        mock_frame = ttk.LabelFrame(pattern_frame, text='Predefined Patterns', padding='5')
-        mock_frame.grid(row=2, column=0, columnspan=2, padx=5, pady=10, sticky='ew')
+        mock_frame = ttk.LabelFrame(pattern_frame, text='Synthetic Workloads', padding='5')
+        mock_frame.grid(row=3, column=0, columnspan=2, padx=5, pady=10, sticky='ew')
         
         # Custom implementation of mock data loader UI for better layout
-        patterns = self.mock_loader.patterns
-        for i, (pattern_name, pattern) in enumerate(patterns.items()):
-            row, col = i // 2, i % 2
+        generators = self.mock_loader.generators
+        for i, name in enumerate(generators):
+            row, col = i // 3, i % 3
             ttk.Button(
                 mock_frame,
-                text=pattern_name,
-                command=lambda p=pattern: self.mock_loader.load_pattern(p),
-                width=12
+                text=name,
+                command=lambda n=name: self.select_workload(n),
+                width=14
             ).grid(row=row, column=col, padx=5, pady=5, sticky='ew')
         
+        # Size and seed used by the next generator selected
+        workload_frame = ttk.Frame(mock_frame)
+        workload_frame.grid(row=(len(generators) + 2) // 3, column=0, columnspan=3, pady=5, sticky='ew')
+        ttk.Label(workload_frame, text='Size:').pack(side=tk.LEFT)
+        ttk.Combobox(workload_frame, textvariable=self.mock_loader.size_var, values=tuple(GENERATOR_SIZES),
+                     width=6, state='readonly').pack(side=tk.LEFT, padx=5)
+        ttk.Label(workload_frame, text='Seed:').pack(side=tk.LEFT)
+        ttk.Spinbox(workload_frame, from_=0, to=2 ** 31 - 1, textvariable=self.mock_loader.seed_var,
+                    width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Button(workload_frame, text='Clear', command=self.mock_loader.clear_generator, width=6).pack(side=tk.LEFT)
+        ttk.Label(mock_frame, textvariable=self.mock_loader.selection_var, foreground='gray').grid(
+            row=(len(generators) + 2) // 3 + 1, column=0, columnspan=3, padx=5, sticky='w')
+        
         # Control buttons with better styling
         control_frame = ttk.Frame(main_container)
         control_frame.grid(row=1, column=0, padx=10, pady=5, sticky='ew')
@@ -202,8 +228,8 @@ class CacheSimulatorGUI:
         button_frame = ttk.Frame(control_frame)
         button_frame.grid(row=0, column=0, pady=10)
         
-        start_button = ttk.Button(button_frame, text='Start Simulation', command=self.start_simulation, width=20)
-        start_button.pack(side=tk.LEFT, padx=10)
+        self.start_button = ttk.Button(button_frame, text='Start Simulation', command=self.start_simulation, width=20)
+        self.start_button.pack(side=tk.LEFT, padx=10)
         
         reset_button = ttk.Button(button_frame, text='Reset', command=self.reset_simulation, width=15)
         reset_button.pack(side=tk.LEFT, padx=10)
@@ -216,6 +242,27 @@ class CacheSimulatorGUI:
         api_key_button = ttk.Button(button_frame, text='Set API Key', command=self.configure_api_key, width=15)
         api_key_button.pack(side=tk.LEFT, padx=10)
         
+        # Progress of a running simulation
+        progress_frame = ttk.Frame(control_frame)
+        progress_frame.grid(row=1, column=0, sticky='ew')
+        progress_frame.columnconfigure(0, weight=1)
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate', maximum=1.0)
+        self.progress_bar.grid(row=0, column=0, padx=10, sticky='ew')
+        
+        self.cancel_button = ttk.Button(progress_frame, text='Cancel', command=self.cancel_simulation, width=10, state='disabled')
+        self.cancel_button.grid(row=0, column=1, padx=10)
+        
+        self.progress_label = ttk.Label(progress_frame, text='Ready', font=('Arial', 9), foreground='gray')
+        self.progress_label.grid(row=1, column=0, columnspan=2, padx=10, sticky='w')
+        
+        # Background simulation state (simulations and miss-ratio curves share the one worker)
+        self.simulation_thread = None
+        self.cancel_event = threading.Event()
+        self.progress_queue = queue.Queue()
+        self.simulation_total = None
+        self.worker_finish = None
+        
         # Results Tab
         results_tab = ttk.Frame(self.notebook)
         self.notebook.add(results_tab, text='Results')
@@ -227,13 +274,9 @@ class CacheSimulatorGUI:
         cache_frame = ttk.LabelFrame(results_tab, text='Cache State', padding='10')
         cache_frame.grid(row=0, column=0, padx=10, pady=10, sticky='nsew')
         
-        # Scrollable cache display with better formatting
-        cache_scroll = ttk.Scrollbar(cache_frame)
-        cache_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        self.cache_text = tk.Text(cache_frame, width=30, height=15, yscrollcommand=cache_scroll.set)
-        self.cache_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
-        cache_scroll.config(command=self.cache_text.yview)
+        # Virtualized line table and per-set heat map
+        self.cache_view = CacheView(self.root)
+        self.cache_view.create_view_ui(cache_frame)
         
         # Statistics Frame with improved visualization
         stats_frame = ttk.LabelFrame(results_tab, text='Cache Performance', padding='10')
@@ -243,108 +286,521 @@ class CacheSimulatorGUI:
         self.fig, self.ax = plt.subplots(figsize=(5, 4), dpi=100)
         self.canvas = FigureCanvasTkAgg(self.fig, master=stats_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.chart = LiveChart(self.fig, self.ax, self.canvas)
+        
+        # Miss-ratio curve over every cache size from a single stack-distance pass, or from a block sample
+        mrc_frame = ttk.Frame(stats_frame)
+        mrc_frame.pack(pady=(5, 0))
+        self.mrc_button = ttk.Button(mrc_frame, text='Miss-Ratio Curve', command=self.show_miss_ratio_curve, width=18)
+        self.mrc_button.pack(side=tk.LEFT)
+        self.mrc_sampling_var = tk.StringVar(value='Exact')
+        ttk.Combobox(mrc_frame, textvariable=self.mrc_sampling_var, values=list(MRC_SAMPLE_RATES),
+                     state='readonly', width=14).pack(side=tk.LEFT, padx=(5, 0))
         
         # Initialize statistics display
         self.update_statistics()
 
     def update_cache_display(self):
-        self.cache_text.delete('1.0', tk.END)
-        self.cache_text.tag_configure('header', font=('Arial', 10, 'bold'))
-        self.cache_text.tag_configure('address', foreground='blue')
-        
-        if not self.simulator.cache:
-            self.cache_text.insert(tk.END, "Cache is empty. Run a simulation to see results.\n", 'header')
+        with stage('render'):
+            self.cache_view.update(self.simulator)
+
+    def update_statistics(self):
+        """Draw the final statistics: the hit-rate time series once the trace spans several windows"""
+        lines = []
+        instrumentation = self.simulator.instrumentation
+        series = hit_rate_series(self.simulator)
+        if series is not None:
+            lines.append(f'Hits: {self.simulator.hits:,}  Misses: {self.simulator.misses:,}  '
+                         f'Hit Rate: {self.simulator.get_hit_rate() * 100:.1f}%')
+            if instrumentation.classify and instrumentation.warm:
+                lines.append('Miss classes unavailable after a warm start')
+            elif instrumentation.classify:
+                classes = instrumentation.miss_classes()
+                lines.append(f"Compulsory: {classes['compulsory']:,}  Capacity: {classes['capacity']:,}  "
+                             f"Conflict: {classes['conflict']:,}")
+            if instrumentation.set_misses.size > 1 and self.simulator.misses:
+                worst = int(np.argmax(instrumentation.set_misses))
+                lines.append(f'Most misses: set {worst} ({instrumentation.set_misses[worst]:,})')
+        
+        # Traffic to the next level, once the trace has stores
+        traffic = self.simulator.get_traffic()
+        if self.simulator.writes or traffic['writebacks']:
+            lines.append(f"Writebacks: {traffic['writebacks']}  Traffic: {traffic['bytes_transferred']:,} bytes")
+        
+        with stage('render'):
+            if series is not None:
+                self.chart.show_series(series, lines, force=True)
+            else:
+                self.chart.show_counts(self.simulator.hits, self.simulator.misses, lines, force=True)
+
+    def show_live_statistics(self, hits, misses, series):
+        """Update the chart in place while a simulation runs (skipped when over the frame budget)"""
+        with stage('render'):
+            if series is not None:
+                hit_rate = hits / (hits + misses) * 100 if hits + misses else 0
+                self.chart.show_series(series, [f'Hits: {hits:,}  Misses: {misses:,}  Hit Rate: {hit_rate:.1f}%'],
+                                       end=self.simulation_total)
+            else:
+                self.chart.show_counts(hits, misses)
+
+    def update_ways_state(self, event=None):
+        """Only Set-Associative caches take their ways from the spinbox"""
+        state = 'normal' if self.associativity_var.get() == 'Set-Associative' else 'disabled'
+        self.ways_spinbox.config(state=state)
+
+    def load_trace_file(self):
+        """Choose a trace file (text, gzip or Dinero din) to simulate from disk"""
+        path = filedialog.askopenfilename(
+            title='Open Trace File',
+            filetypes=[('Trace files', '*.txt *.trace *.din *.gz'), ('All files', '*.*')]
+        )
+        if path:
+            self.mock_loader.clear_generator()
+            self.trace_path_var.set(path)
+            self.trace_file_label.config(text=os.path.basename(path), foreground='black')
+
+    def clear_trace_file(self):
+        self.trace_path_var.set('')
+        self.trace_file_label.config(text='(none)', foreground='gray')
+
+    def select_workload(self, name):
+        """Simulate a synthetic workload at the chosen size instead of a trace file or the entry"""
+        try:
+            self.mock_loader.select_generator(name)
+        except ValueError:
+            messagebox.showerror('Error', 'Please enter a valid integer seed')
             return
+        self.clear_trace_file()
+
+    def save_checkpoint_file(self):
+        """Save the simulator's cache state and counters after the last run"""
+        if self.simulation_thread is not None:
+            return
+        if self.simulator.state is None:
+            messagebox.showwarning('Warning', 'Run a simulation before saving a checkpoint')
+            return
+        path = filedialog.asksaveasfilename(
+            title='Save Checkpoint',
+            defaultextension='.ckpt',
+            filetypes=[('Checkpoints', '*.ckpt'), ('All files', '*.*')]
+        )
+        if not path:
+            return
+        try:
+            save_checkpoint(self.simulator, path, self.simulation_position)
+        except OSError as e:
+            messagebox.showerror('Error', f"Failed to save checkpoint: {str(e)}")
+    
+    def load_warm_start(self):
+        """Choose a checkpoint to start the next simulation from instead of a cold cache
+
+        The checkpoint's configuration is shown in the configuration fields,
+        and the run skips the accesses the checkpoint has already simulated.
+        """
+        path = filedialog.askopenfilename(
+            title='Warm Start from Checkpoint',
+            filetypes=[('Checkpoints', '*.ckpt'), ('All files', '*.*')]
+        )
+        if not path:
+            return
+        try:
+            header, _ = read_checkpoint(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror('Error', f"Failed to read checkpoint: {str(e)}")
+            return
+        self.show_configuration(header['config'])
+        self.warm_start_path = path
+        self.warm_start_label.config(text=f"{os.path.basename(path)} at access {header['position']:,}",
+                                     foreground='black')
+    
+    def clear_warm_start(self):
+        self.warm_start_path = None
+        self.warm_start_label.config(text='Starting cold', foreground='gray')
+    
+    def show_configuration(self, config):
+        """Fill the configuration fields from a dict of CacheSimulator settings"""
+        self.cache_size_var.set(str(config['cache_size']))
+        self.block_size_var.set(str(config['block_size']))
+        self.associativity_var.set(config['associativity'])
+        self.ways_var.set(str(config['ways']))
+        self.policy_var.set(config['replacement_policy'])
+        self.write_policy_var.set(config['write_policy'])
+        self.write_allocate_var.set(config['write_allocate'])
+        self.update_ways_state()
+
+    def toggle_profiling(self):
+        """Start a fresh profile for the next runs, or stop profiling"""
+        if self.profiling_var.get():
+            start_profiling()
+        else:
+            stop_profiling()
+    
+    def save_profile_report(self):
+        """Write the current profile as a JSON report"""
+        profiler = active_profiler()
+        if profiler is None:
+            messagebox.showwarning('Warning', 'Turn on profiling and run a simulation first')
+            return
+        path = filedialog.asksaveasfilename(
+            title='Save Profile Report',
+            defaultextension='.json',
+            filetypes=[('JSON reports', '*.json'), ('All files', '*.*')]
+        )
+        if not path:
+            return
+        try:
+            profiler.write_report(path)
+        except OSError as e:
+            messagebox.showerror('Error', f"Failed to save profile report: {str(e)}")
+    
+    def has_access_pattern(self):
+        return bool(self.trace_path_var.get() or self.mock_loader.selection
+                    or self.access_pattern_var.get().strip())
+
+    def iter_access_records(self):
+        """Return an iterator over the (addresses, ops) chunks to simulate
+
+        A selected trace file is streamed in chunks, as is a selected
+        synthetic workload; otherwise the pattern entry is parsed as one
+        chunk. ops is None when every access is a read. The Tk variables are
+        read here, so the iterator itself can be consumed off the main thread.
+        """
+        trace_path = self.trace_path_var.get()
+        if trace_path:
+            return iter_trace_records(trace_path)
+        if self.mock_loader.selection:
+            return ((chunk, None) for chunk in self.mock_loader.iter_chunks())
+        with stage('parse'):
+            return iter([parse_records(self.access_pattern_var.get().split())])
+
+    def iter_access_chunks(self):
+        """Return an iterator over the addresses to simulate as int64 arrays"""
+        return (addresses for addresses, _ in self.iter_access_records())
+
+    def count_accesses(self):
+        """Number of accesses to simulate, or None when it is only known after reading the file"""
+        trace_path = self.trace_path_var.get()
+        if not trace_path and self.mock_loader.selection:
+            return self.mock_loader.selection[1]
+        if not trace_path:
+            return len(self.access_pattern_var.get().split())
+        if detect_format(trace_path) == 'binary':
+            return open_binary_trace(trace_path).count
+        return None
+
+    def show_miss_ratio_curve(self):
+        """Plot the fully-associative LRU miss ratio for every cache size
+
+        The trace is analyzed on the worker thread, with the same progress
+        reports and cancellation as a simulation.
+        """
+        try:
+            block_size = int(self.block_size_var.get())
+            if block_size <= 0:
+                raise ValueError("Block size must be a positive integer")
+                
+            if not self.has_access_pattern():
+                messagebox.showwarning('Warning', 'Please enter a memory access pattern or select a workload')
+                return
+            
+            if self.simulation_thread is not None:
+                return
             
-        self.cache_text.insert(tk.END, f"Cache contains {len(self.simulator.cache)} blocks\n\n", 'header')
+            rate = MRC_SAMPLE_RATES[self.mrc_sampling_var.get()]
+            if rate is None:
+                analyzer = StackDistanceAnalyzer(block_size)
+            else:
+                analyzer = ShardsMRC(block_size, rate)
+            chunks = self.iter_access_chunks()
+            self.simulation_total = self.count_accesses()
+        except ValueError:
+            messagebox.showerror('Error', 'Please enter valid numeric values for block size and memory addresses')
+            return
+        except OSError as e:
+            messagebox.showerror('Error', f"Failed to read trace file: {str(e)}")
+            return
         
-        for i, addr in enumerate(self.simulator.cache):
-            self.cache_text.insert(tk.END, f"Block {i}: ", 'header')
-            self.cache_text.insert(tk.END, f"Address {addr}\n", 'address')
+        self._start_worker(self._miss_ratio_worker, (analyzer, chunks), 'Analyzing reuse distances...',
+                           lambda message: self._finish_miss_ratio_curve(message, analyzer, rate))
 
-    def update_statistics(self):
-        self.ax.clear()
-        
-        # Get statistics
-        hits = self.simulator.hits
-        misses = self.simulator.misses
-        total = hits + misses
-        hit_rate = self.simulator.get_hit_rate() * 100 if total > 0 else 0
-        
-        # Create bar chart with better styling
-        stats = [hits, misses]
-        labels = ['Hits', 'Misses']
-        colors = ['#4CAF50', '#F44336']  # Green for hits, red for misses
-        
-        bars = self.ax.bar(labels, stats, color=colors)
-        
-        # Add data labels on top of bars
-        for bar in bars:
-            height = bar.get_height()
-            self.ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                        f'{height}', ha='center', va='bottom')
-        
-        # Add hit rate as text
-        if total > 0:
-            self.ax.text(0.5, 0.9, f'Hit Rate: {hit_rate:.1f}%', 
-                        horizontalalignment='center',
-                        transform=self.ax.transAxes,
-                        bbox=dict(facecolor='#E0E0E0', alpha=0.5))
-        
-        # Improve chart appearance
-        self.ax.set_title('Cache Performance')
-        self.ax.set_ylabel('Count')
-        self.ax.grid(axis='y', linestyle='--', alpha=0.7)
-        
-        # Update canvas
-        self.fig.tight_layout()
-        self.canvas.draw()
+    def _miss_ratio_worker(self, analyzer, chunks, cancel_event, progress_queue):
+        """Feed the trace to the analyzer in steps and return the final message with the curve (worker thread)"""
+        processed = 0
+        for chunk in chunks:
+            for start in range(0, len(chunk), SIMULATION_STEP):
+                if cancel_event.is_set():
+                    return ('cancelled', processed)
+                step = chunk[start:start + SIMULATION_STEP]
+                with stage('simulate'):
+                    analyzer.process(step)
+                processed += len(step)
+                progress_queue.put(('progress', processed))
+        with stage('simulate'):
+            curve = analyzer.miss_ratio_curve()
+        return ('done', processed, curve)
+
+    def _finish_miss_ratio_curve(self, message, analyzer, rate):
+        if message[0] == 'cancelled':
+            self.progress_label.config(text=f'Miss-ratio curve cancelled after {message[1]:,} accesses')
+            return
+        self.progress_bar.config(mode='determinate', value=1.0)
+        self.progress_label.config(text=f'Miss-ratio curve over {message[1]:,} accesses')
+        
+        self.chart.clear()
+        if rate is None:
+            sizes, miss_ratios = message[2]
+            self.ax.step(sizes, miss_ratios * 100, where='post', color='#2196F3')
+            title = 'Miss-Ratio Curve (Fully-Associative LRU)'
+        else:
+            sizes, miss_ratios, errors = message[2]
+            self.ax.plot(sizes, miss_ratios * 100, color='#2196F3')
+            # Two standard errors either side, from the spread of the sample's replicas
+            self.ax.fill_between(sizes, np.clip(miss_ratios - 2 * errors, 0, 1) * 100,
+                                 np.clip(miss_ratios + 2 * errors, 0, 1) * 100, color='#2196F3', alpha=0.2)
+            title = f'Sampled Miss-Ratio Curve ({analyzer.rate() * 100:.3g}% of blocks)'
+        
+        # Mark the currently configured cache size
+        try:
+            cache_size = int(self.cache_size_var.get())
+            self.ax.axvline(cache_size, color='#F44336', linestyle='--', label=f'Cache Size: {cache_size}')
+            self.ax.legend()
+        except ValueError:
+            pass
+        
+        self.ax.set_title(title)
+        self.ax.set_xlabel('Cache Size (lines)')
+        self.ax.set_ylabel('Miss Ratio (%)')
+        self.ax.set_ylim(0, 105)
+        self.ax.grid(linestyle='--', alpha=0.7)
+        
+        with stage('render'):
+            self.fig.tight_layout()
+            self.canvas.draw()
+        
+        # Switch to results tab
+        self.notebook.select(1)
 
     def start_simulation(self):
         try:
             # Validate inputs
             cache_size = int(self.cache_size_var.get())
             block_size = int(self.block_size_var.get())
+            ways = int(self.ways_var.get())
             
-            if cache_size <= 0 or block_size <= 0:
-                raise ValueError("Cache size and block size must be positive integers")
+            if cache_size <= 0 or block_size <= 0 or ways <= 0:
+                raise ValueError("Cache size, block size and ways must be positive integers")
                 
             # Get access pattern
-            access_pattern = self.access_pattern_var.get().strip()
-            if not access_pattern:
-                tk.messagebox.showwarning('Warning', 'Please enter a memory access pattern or select a predefined pattern')
+            if not self.has_access_pattern():
+                tk.messagebox.showwarning('Warning', 'Please enter a memory access pattern or select a workload')
                 return
                 
-            # Reset simulator
-            self.simulator.reset()
+            if self.simulation_thread is not None:
+                return
             
-            # Configure simulator
-            self.simulator.cache_size = cache_size
-            self.simulator.block_size = block_size
-            self.simulator.associativity = self.associativity_var.get()
-            self.simulator.replacement_policy = self.policy_var.get()
-
-            # Run simulation
-            addresses = access_pattern.split()
-            for addr in addresses:
-                self.simulator.access_memory(int(addr))
+            chunks = self.iter_access_records()
+            self.simulation_total = self.count_accesses()
             
-            # Update UI
-            self.update_cache_display()
-            self.update_statistics()
+            if self.warm_start_path:
+                # Continue from the checkpoint, with its configuration, after the accesses it covers
+                try:
+                    self.simulation_position = restore_checkpoint(self.simulator, self.warm_start_path)
+                except ValueError as e:
+                    tk.messagebox.showerror('Error', f"Failed to read checkpoint: {str(e)}")
+                    return
+                config = {name: getattr(self.simulator, name) for name in
+                          ('cache_size', 'block_size', 'associativity', 'ways', 'replacement_policy',
+                           'write_policy', 'write_allocate')}
+                self.show_configuration(config)
+                chunks = skip_accesses(chunks, self.simulation_position)
+                if self.simulation_total:
+                    self.simulation_total = max(self.simulation_total - self.simulation_position, 0)
+            else:
+                # Reset simulator
+                self.simulator.reset()
+                self.simulation_position = 0
+                
+                # Configure simulator
+                self.simulator.cache_size = cache_size
+                self.simulator.block_size = block_size
+                self.simulator.associativity = self.associativity_var.get()
+                self.simulator.ways = ways
+                self.simulator.replacement_policy = self.policy_var.get()
+                self.simulator.write_policy = self.write_policy_var.get()
+                self.simulator.write_allocate = self.write_allocate_var.get()
             
-            # Switch to results tab
-            self.notebook.select(1)  # Select the Results tab
+            # Record the hit-rate time series in about TIME_SERIES_WINDOWS windows
+            if self.simulation_total:
+                window = max(MIN_TIME_SERIES_WINDOW, -(-self.simulation_total // TIME_SERIES_WINDOWS))
+            else:
+                window = DEFAULT_TIME_SERIES_WINDOW
+            self.simulator.enable_instrumentation(window_size=window, classify=self.classify_var.get())
+            # Count into the current profiler, if profiling is on
+            self.simulator.disable_profiling()
+            self.simulator.enable_profiling()
 
         except ValueError as e:
-            tk.messagebox.showerror('Error', 'Please enter valid numeric values for cache size, block size, and memory addresses')
+            tk.messagebox.showerror('Error', 'Please enter valid numeric values for cache size, block size, ways, and memory addresses')
+            return
+        except OSError as e:
+            tk.messagebox.showerror('Error', f"Failed to read trace file or checkpoint: {str(e)}")
+            return
+        
+        # Run simulation on a worker thread; the Tk thread only polls its progress
+        self._start_worker(self._simulation_worker, (chunks,), 'Simulating...', self._finish_simulation)
+        self.notebook.select(1)  # Watch the live chart on the Results tab
+
+    def _start_worker(self, work, args, text, finish):
+        """Run work(*args, cancel_event, progress_queue) on the worker thread and poll it
+
+        work posts ('progress', processed, ...) messages and returns the final
+        ('done', processed, ...) or ('cancelled', processed) message, which
+        is passed to finish on the Tk thread.
+        """
+        self.cancel_event.clear()
+        self.progress_queue = queue.Queue()
+        self.worker_finish = finish
+        self.simulation_thread = threading.Thread(
+            target=self._run_worker,
+            args=(work, (*args, self.cancel_event, self.progress_queue), self.progress_queue),
+            daemon=True
+        )
+        self.start_button.config(state='disabled')
+        self.mrc_button.config(state='disabled')
+        self.cancel_button.config(state='normal')
+        if self.simulation_total:
+            self.progress_bar.config(mode='determinate', value=0)
+        else:
+            self.progress_bar.config(mode='indeterminate')
+            self.progress_bar.start()
+        self.progress_label.config(text=text)
+        self.simulation_thread.start()
+        self.root.after(POLL_INTERVAL_MS, self._poll_simulation)
+
+    def _run_worker(self, work, args, progress_queue):
+        """Thread target: run work and post its final message, or the error that stopped it
+
+        A final message is posted however the worker ends, so the Tk thread
+        never polls forever (a truncated gzip trace raises EOFError or
+        zlib.error, a huge trace MemoryError).
+        """
+        message = ('error', 'The worker stopped unexpectedly')
+        profiler = active_profiler()
+        try:
+            with profiler.capture() if profiler is not None else nullcontext():
+                message = work(*args)
+        except ValueError:
+            message = ('error', 'Please enter valid numeric values for memory addresses')
+        except OSError as e:
+            message = ('error', f"Failed to read trace file: {str(e)}")
+        except Exception as e:
+            message = ('error', f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+        finally:
+            progress_queue.put(message)
+
+    def _simulation_worker(self, chunks, cancel_event, progress_queue):
+        """Run the simulation in steps, posting progress to the queue (worker thread)"""
+        processed = 0
+        for chunk, ops in chunks:
+            for start in range(0, len(chunk), SIMULATION_STEP):
+                if cancel_event.is_set():
+                    return ('cancelled', processed)
+                step = chunk[start:start + SIMULATION_STEP]
+                step_ops = ops[start:start + SIMULATION_STEP] if ops is not None else None
+                with stage('simulate'):
+                    self.simulator.run_trace(step, step_ops)
+                processed += len(step)
+                progress_queue.put(('progress', processed, self.simulator.hits, self.simulator.misses,
+                                    hit_rate_series(self.simulator)))
+        return ('done', processed)
+
+    def _poll_simulation(self):
+        """Apply the worker's latest progress and reschedule until it finishes"""
+        if self.simulation_thread is None:
+            return  # Stopped by reset_simulation
+        latest = None
+        try:
+            while True:
+                message = self.progress_queue.get_nowait()
+                if message[0] == 'progress':
+                    latest = message
+                else:
+                    self._finish_worker(message)
+                    return
+        except queue.Empty:
+            pass
+        
+        if latest is not None:
+            # Simulations also report their counters; miss-ratio curves only their position
+            _, processed, *counts = latest
+            if self.simulation_total:
+                self.progress_bar.config(value=processed / self.simulation_total)
+                text = f'Processed {processed:,} of {self.simulation_total:,} accesses'
+            else:
+                text = f'Processed {processed:,} accesses'
+            if counts:
+                hits, misses, series = counts
+                hit_rate = hits / (hits + misses) * 100 if hits + misses else 0
+                text = f'{text} - hit rate {hit_rate:.1f}%'
+                self.show_live_statistics(hits, misses, series)
+            self.progress_label.config(text=text)
+        self.root.after(POLL_INTERVAL_MS, self._poll_simulation)
+
+    def _finish_worker(self, message):
+        self.simulation_thread = None
+        self.progress_bar.stop()
+        self.start_button.config(state='normal')
+        self.mrc_button.config(state='normal')
+        self.cancel_button.config(state='disabled')
+        
+        if message[0] == 'error':
+            self.progress_bar.config(mode='determinate', value=0)
+            self.progress_label.config(text='Failed')
+            tk.messagebox.showerror('Error', message[1])
+            return
+        self.worker_finish(message)
+
+    def _finish_simulation(self, message):
+        self.simulation_position += message[1]
+        if message[0] == 'cancelled':
+            self.progress_label.config(text=f'Cancelled after {message[1]:,} accesses')
+        else:
+            self.progress_bar.config(mode='determinate', value=1.0)
+            self.progress_label.config(text=f'Simulated {message[1]:,} accesses')
+        
+        # Update UI
+        self.update_cache_display()
+        self.update_statistics()
+        
+        # Switch to results tab
+        self.notebook.select(1)  # Select the Results tab
+
+    def cancel_simulation(self):
+        """Ask the running simulation or miss-ratio curve to stop after its current step"""
+        self.cancel_event.set()
 
     def reset_simulation(self):
+        # Stop a running simulation before clearing its state
+        if self.simulation_thread is not None:
+            self.cancel_event.set()
+            self.simulation_thread.join()
+            self.simulation_thread = None
+            self.progress_bar.stop()
+            self.start_button.config(state='normal')
+            self.mrc_button.config(state='normal')
+            self.cancel_button.config(state='disabled')
+        self.progress_bar.config(mode='determinate', value=0)
+        self.progress_label.config(text='Ready')
+        
         # Reset simulator
         self.simulator.reset()
+        self.simulation_position = 0
+        self.clear_warm_start()
         
         # Clear access pattern
         self.access_pattern_var.set('')
+        self.clear_trace_file()
+        self.mock_loader.clear_generator()
         
         # Update UI
         self.update_cache_display()
@@ -353,6 +809,15 @@ class CacheSimulatorGUI:
         # Show a confirmation message
         tk.messagebox.showinfo('Reset', 'Simulation has been reset successfully')
     
+    @property
+    def ai_optimizer(self):
+        """The AI optimizer, imported and created the first time it is needed"""
+        if self._ai_optimizer is None:
+            from cachesim.ai_optimizer import AIOptimizer
+            self._ai_optimizer = AIOptimizer()
+            self._ai_optimizer.set_api_key(self.api_key_manager.get_api_key())
+        return self._ai_optimizer
+    
     def configure_api_key(self):
         """Open the API key configuration dialog"""
         api_key = self.api_key_manager.show_api_key_dialog()
@@ -361,8 +826,12 @@ class CacheSimulatorGUI:
     
     def optimize_with_ai(self):
         """Use AI to optimize cache configuration based on access pattern"""
-        # Check if API key is set
-        if not self.ai_optimizer.api_key:
+        mode = OPTIMIZER_CHOICES[self.optimizer_var.get()]
+        self.ai_optimizer.set_mode(mode)
+        local = mode == 'local'
+        
+        # Check if API key is set (the local search runs offline)
+        if not local and not self.ai_optimizer.api_key:
             response = messagebox.askyesno(
                 'API Key Required', 
                 'You need to set your Google AI Studio API key to use this feature. Would you like to set it now?'
@@ -371,10 +840,15 @@ class CacheSimulatorGUI:
                 self.configure_api_key()
             return
         
-        # Get current access pattern
-        access_pattern = self.access_pattern_var.get().strip()
-        if not access_pattern:
-            messagebox.showwarning('Warning', 'Please enter a memory access pattern or select a predefined pattern')
+        # Get current access pattern (the optimizer summarizes it on its worker thread)
+        if not self.has_access_pattern():
+            messagebox.showwarning('Warning', 'Please enter a memory access pattern or select a workload')
+            return
+        
+        try:
+            access_pattern = self.iter_access_chunks()
+        except ValueError:
+            messagebox.showerror('Error', 'Please enter valid numeric values for memory addresses')
             return
         
         # Get current configuration
@@ -382,6 +856,7 @@ class CacheSimulatorGUI:
             'cache_size': self.cache_size_var.get(),
             'block_size': self.block_size_var.get(),
             'associativity': self.associativity_var.get(),
+            'ways': self.ways_var.get(),
             'replacement_policy': self.policy_var.get()
         }
         
@@ -398,18 +873,34 @@ class CacheSimulatorGUI:
         y = self.root.winfo_y() + (self.root.winfo_height() - loading_window.winfo_height()) // 2
         loading_window.geometry(f"+{x}+{y}")
         
-        loading_label = ttk.Label(loading_window, text='Analyzing access pattern with AI...\nThis may take a few seconds.', justify='center')
+        if local:
+            loading_text = 'Simulating candidate configurations...\nThis may take a few seconds.'
+        else:
+            loading_text = 'Analyzing access pattern with AI...\nThis may take a few seconds.'
+        loading_label = ttk.Label(loading_window, text=loading_text, justify='center')
         loading_label.pack(pady=20)
         
-        # Update UI to show we're processing
-        self.root.update()
-        
-        # Get recommendation from AI
-        recommendation = self.ai_optimizer.get_cache_recommendation(access_pattern, current_config)
+        # Request the recommendation on the optimizer's worker thread and poll for it,
+        # so the event loop keeps running while the request is in flight
+        future = self.ai_optimizer.get_cache_recommendation_async(access_pattern, current_config)
+        self.root.after(AI_POLL_INTERVAL_MS, self._poll_ai_recommendation, future, loading_window)
+    
+    def _poll_ai_recommendation(self, future, loading_window):
+        if not future.done():
+            self.root.after(AI_POLL_INTERVAL_MS, self._poll_ai_recommendation, future, loading_window)
+            return
         
         # Close loading window
         loading_window.destroy()
         
+        try:
+            recommendation = future.result()
+        except Exception as e:
+            recommendation = {"error": f"Error communicating with AI API: {str(e)}"}
+        self.apply_ai_recommendation(recommendation)
+    
+    def apply_ai_recommendation(self, recommendation):
+        """Show an AI recommendation and offer to apply it"""
         # Handle error
         if 'error' in recommendation:
             messagebox.showerror('Error', recommendation['error'])
@@ -426,7 +917,17 @@ class CacheSimulatorGUI:
             self.cache_size_var.set(str(recommendation['cache_size']))
             self.block_size_var.set(str(recommendation['block_size']))
             self.associativity_var.set(recommendation['associativity'])
+            if recommendation.get('ways'):
+                self.ways_var.set(str(recommendation['ways']))
+            self.update_ways_state()
             self.policy_var.set(recommendation['replacement_policy'])
+            # A warm start would restore the checkpoint's own configuration over the recommended one
+            warm_start_cleared = self.warm_start_path is not None
+            self.clear_warm_start()
+            
+            associativity = recommendation['associativity']
+            if associativity == 'Set-Associative' and recommendation.get('ways'):
+                associativity += f" ({recommendation['ways']}-way)"
             
             # Show success message with details and explanations
             message = f"AI Recommendation Applied:\n\n"
@@ -439,7 +940,7 @@ class CacheSimulatorGUI:
                 message += f"Block Size: {recommendation['block_size']}\n"
                 message += f"→ Why? {recommendation['explanations'].get('block_size', '')}\n\n"
                 
-                message += f"Associativity: {recommendation['associativity']}\n"
+                message += f"Associativity: {associativity}\n"
                 message += f"→ Why? {recommendation['explanations'].get('associativity', '')}\n\n"
                 
                 message += f"Replacement Policy: {recommendation['replacement_policy']}\n"
@@ -448,9 +949,23 @@ class CacheSimulatorGUI:
                 # Fallback to original format if no explanations
                 message += f"Cache Size: {recommendation['cache_size']}\n" \
                           f"Block Size: {recommendation['block_size']}\n" \
-                          f"Associativity: {recommendation['associativity']}\n" \
+                          f"Associativity: {associativity}\n" \
                           f"Replacement Policy: {recommendation['replacement_policy']}\n\n"
             
+            if recommendation.get('hit_rate') is not None:
+                message += f"Measured hit rate: {recommendation['hit_rate'] * 100:.2f}%"
+                if recommendation.get('current_hit_rate') is not None:
+                    message += f" (current settings: {recommendation['current_hit_rate'] * 100:.2f}%)"
+                message += "\n"
+                if recommendation.get('best_hit_rate') is not None:
+                    # The local search trades a little hit rate for a smaller cache
+                    message += (f"Smallest configuration within {recommendation['tolerance'] * 100:g} points "
+                                f"of the best hit rate found ({recommendation['best_hit_rate'] * 100:.2f}%)\n")
+                message += "\n"
+            
+            if warm_start_cleared:
+                message += "The warm start was cleared, so the simulation starts from a cold cache.\n\n"
+            
             message += "Would you like to run the simulation with these settings?"
             
             if messagebox.askyesno('AI Recommendation', message):
@@ -461,6 +976,11 @@ class CacheSimulatorGUI:
 
 
 if __name__ == "__main__":
+    # CACHESIM_PROFILE turns profiling on from launch; the report is written on exit
+    profiler, report = profiling_from_environment()
     root = tk.Tk()
     app = CacheSimulatorGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    profiler = active_profiler() or profiler
+    if report and profiler is not None:
+        profiler.write_report(report)
\ No newline at end of file
@@ -1,28 +1,37 @@
 import tkinter as tk
-from tkinter import ttk
+from cachesim.workload_generators import GENERATOR_SIZES, WORKLOADS, generate
 
 class MockDataLoader:
     def __init__ (self, root, access_pattern_var):
         self.root = root
         self.access_pattern_var = access_pattern_var
-        self.patterns = {
-            'Sequential': '0 1 2 3 4 5 6 7 8 9',
-            'Random': '3 1 4 1 5 9 2 6 5 3',
-            'Loop': '0 1 2 3 0 1 2 3 0 1',
-            'Repeated': '1 1 1 2 2 2 3 3 3 4',
-            'Mixed': '0 1 0 2 0 3 0 4 0 5'
-        }
+        # Synthetic workloads are generated lazily at simulation time instead of pasted into the entry
+        self.generators = tuple(WORKLOADS)
+        self.size_var = tk.StringVar(value='100K')
+        self.seed_var = tk.StringVar(value='0')
+        self.selection_var = tk.StringVar(value='(none)')
+        self.selection = None
+        # Typing a pattern replaces the selected generator
+        access_pattern_var.trace_add('write', self._pattern_changed)
 
-    def create_loader_ui(self, container):
-        loader_frame = ttk.LabelFrame(container, text='Mock Data Patterns', padding='5')
-        loader_frame.pack(fill=tk.X, padx=0, pady=5)
+    def select_generator(self, name):
+        """Select a workload at the current size and seed; raises ValueError for a bad seed"""
+        count = GENERATOR_SIZES[self.size_var.get()]
+        seed = int(self.seed_var.get())
+        if self.access_pattern_var.get():
+            self.access_pattern_var.set('')
+        self.selection = (name, count, seed)
+        self.selection_var.set(f'{name}: {count:,} accesses, seed {seed}')
 
-        for i, (pattern_name, pattern) in enumerate(self.patterns.items()):
-            ttk.Button(
-                loader_frame,
-                text=pattern_name,
-                command=lambda p=pattern: self.load_pattern(p)
-            ).grid(row=i//2, column=i%2, padx=5, pady=5, sticky='ew')
+    def clear_generator(self):
+        self.selection = None
+        self.selection_var.set('(none)')
 
-    def load_pattern(self, pattern):
-        self.access_pattern_var.set(pattern)
\ No newline at end of file
+    def iter_chunks(self):
+        """Return an iterator over the selected workload's addresses as int64 chunks"""
+        name, count, seed = self.selection
+        return generate(name, count, seed)
+
+    def _pattern_changed(self, *args):
+        if self.selection is not None and self.access_pattern_var.get():
+            self.clear_generator()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cachesim.cache_simulator import CacheSimulator
+
+
+def make_simulator(cache_size, block_size, associativity='Set-Associative', replacement_policy='LRU', ways=2,
+                   **settings):
+    simulator = CacheSimulator()
+    simulator.cache_size = cache_size
+    simulator.block_size = block_size
+    simulator.associativity = associativity
+    simulator.replacement_policy = replacement_policy
+    simulator.ways = ways
+    for name, value in settings.items():
+        setattr(simulator, name, value)
+    return simulator
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(1234)
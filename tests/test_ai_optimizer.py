@@ -0,0 +1,118 @@
+import importlib
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from cachesim.ai_optimizer import AIOptimizer
+
+RECOMMENDATION = {'cache_size': 64, 'block_size': 16, 'associativity': 'Set-Associative', 'ways': '4',
+                  'replacement_policy': 'LRU'}
+CONFIG = {'cache_size': 16, 'block_size': 4, 'associativity': 'Direct', 'replacement_policy': 'LRU'}
+
+
+class StubModel(BaseHTTPRequestHandler):
+    """Answers like the generateContent endpoint with the queued replies"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append((self.path, body))
+        status, reply = self.server.replies.pop(0)
+        payload = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _answer(text):
+    return {'candidates': [{'content': {'parts': [{'text': text}]}}]}
+
+
+@pytest.fixture
+def server():
+    server = HTTPServer(('127.0.0.1', 0), StubModel)
+    server.requests = []
+    server.replies = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def optimizer(server, tmp_path):
+    optimizer = AIOptimizer(api_url=f'http://127.0.0.1:{server.server_port}/generate',
+                            cache_path=str(tmp_path / 'cache.json'), timeout=5, max_retries=0)
+    optimizer.set_api_key('test-key')
+    yield optimizer
+    optimizer.executor.shutdown()
+
+
+def test_parses_and_caches_recommendation(server, optimizer):
+    server.replies.append((200, _answer(f'Try this:\n```json\n{json.dumps(RECOMMENDATION)}\n```')))
+    recommendation = optimizer.get_cache_recommendation('0 4 8 12 0 4', CONFIG)
+    assert recommendation == {**RECOMMENDATION, 'ways': 4}
+
+    path, body = server.requests[0]
+    assert path == '/generate?key=test-key'
+    prompt = body['contents'][0]['parts'][0]['text']
+    assert 'Direct' in prompt and 'cache_size' in prompt
+
+    # The same pattern and configuration are answered without a request
+    assert optimizer.get_cache_recommendation('0 4 8 12 0 4', CONFIG) == recommendation
+    assert len(server.requests) == 1
+
+
+def test_async_request(server, optimizer):
+    server.replies.append((200, _answer(json.dumps(RECOMMENDATION))))
+    future = optimizer.get_cache_recommendation_async('0 16 32 48', CONFIG)
+    assert future.result(timeout=10)['cache_size'] == 64
+
+
+def test_unparseable_answer_is_returned_raw_and_not_cached(server, optimizer):
+    server.replies.extend([(200, _answer('No idea.')), (200, _answer('Still no idea.'))])
+    assert optimizer.get_cache_recommendation('0 4', CONFIG) == {'raw_response': 'No idea.'}
+    assert optimizer.get_cache_recommendation('0 4', CONFIG) == {'raw_response': 'Still no idea.'}
+
+
+def test_http_error(server, optimizer):
+    server.replies.append((400, {'error': 'bad key'}))
+    result = optimizer.get_cache_recommendation('0 4', CONFIG)
+    assert 'status code 400' in result['error']
+
+
+def test_invalid_pattern_and_missing_key(server, optimizer):
+    assert 'invalid memory addresses' in optimizer.get_cache_recommendation('0 x4', CONFIG)['error']
+    optimizer.set_api_key('')
+    assert 'API key not set' in optimizer.get_cache_recommendation('0 4', CONFIG)['error']
+    assert server.requests == []
+
+
+def test_local_mode_needs_no_server(server, optimizer):
+    optimizer.set_mode('local')
+    optimizer.set_api_key('')
+    recommendation = optimizer.get_cache_recommendation(' '.join([str(i * 4) for i in range(64)] * 4), CONFIG)
+    assert 'error' not in recommendation
+    assert recommendation['hit_rate'] >= recommendation['current_hit_rate']
+    assert server.requests == []
+
+
+def test_local_mode_needs_no_requests_package(monkeypatch, tmp_path):
+    # An install without requests: importing it fails, from a fresh import of the optimizer
+    monkeypatch.setitem(sys.modules, 'requests', None)
+    monkeypatch.delitem(sys.modules, 'cachesim.ai_optimizer')
+    module = importlib.import_module('cachesim.ai_optimizer')
+    optimizer = module.AIOptimizer(cache_path=str(tmp_path / 'cache.json'), mode='local')
+    try:
+        recommendation = optimizer.get_cache_recommendation(' '.join([str(i * 4) for i in range(64)] * 4), CONFIG)
+    finally:
+        optimizer.executor.shutdown()
+    assert 'error' not in recommendation
@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The benchmarks are scripts, not a package; the worker pool needs them importable by name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import bench_simulator as bench
+
+OPTIONS = {'cache_size': 64, 'block_size': 16, 'ways': 4, 'write_ratio': 0.2, 'max_scalar': 500, 'repeat': 1,
+           'seed': 3}
+
+
+def test_synthetic_trace_is_seeded():
+    addresses, ops = bench.synthetic_trace(1000, seed=5, write_ratio=0.5)
+    again, again_ops = bench.synthetic_trace(1000, seed=5, write_ratio=0.5)
+    assert np.array_equal(addresses, again) and np.array_equal(ops, again_ops)
+    assert bench.synthetic_trace(1000, seed=5)[1] is None
+    assert not np.array_equal(addresses, bench.synthetic_trace(1000, seed=6)[0])
+
+
+def test_direct_caches_run_once_without_a_policy():
+    cases = bench.make_cases(['run_trace'], ['Direct', 'Set-Associative'], ['LRU', 'FIFO'], [10])
+    assert cases == [('run_trace', 'Direct', '-', 10), ('run_trace', 'Set-Associative', 'LRU', 10),
+                     ('run_trace', 'Set-Associative', 'FIFO', 10)]
+
+
+def test_scalar_cases_are_capped():
+    row = bench.run_case(('access_memory', 'Set-Associative', 'LRU', 2000), OPTIONS)
+    assert row['name'] == 'access_memory/Set-Associative/LRU/2000'
+    assert row['accesses'] == OPTIONS['max_scalar'] and not row['vectorized']
+    assert row['accesses_per_second'] > 0 and 0 <= row['hit_rate'] <= 1
+
+
+def test_compare_flags_drops_past_the_threshold():
+    baseline = {'results': [{'name': 'a', 'accesses_per_second': 100.0},
+                            {'name': 'b', 'accesses_per_second': 100.0}]}
+    results = [{'name': 'a', 'accesses_per_second': 95.0}, {'name': 'b', 'accesses_per_second': 80.0},
+               {'name': 'new', 'accesses_per_second': 1.0}]
+    comparisons = bench.compare(results, baseline, 0.1)
+    assert [(name, regressed) for name, _, _, _, regressed in comparisons] == [('a', False), ('b', True)]
+
+
+def test_baseline_check_exits_on_a_regression(tmp_path, capsys):
+    saved = tmp_path / 'baseline.json'
+    argv = ['--sizes', '1000', '--paths', 'run_trace', '--associativity', 'Direct', '--repeat', '1']
+    bench.main(argv + ['--save', str(saved)])
+    report = json.loads(saved.read_text())
+    assert [row['name'] for row in report['results']] == ['run_trace/Direct/-/1000']
+
+    # A baseline far faster than any machine must count as a regression
+    report['results'][0]['accesses_per_second'] *= 1000
+    saved.write_text(json.dumps(report))
+    with pytest.raises(SystemExit) as exit_info:
+        bench.main(argv + ['--baseline', str(saved)])
+    assert exit_info.value.code == 1
+    assert 'REGRESSION' in capsys.readouterr().out
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from conftest import make_simulator
+from cachesim.binary_trace import convert_trace, is_binary_trace, open_binary_trace, write_binary_trace
+from cachesim.trace_loader import OP_IFETCH, OP_READ, OP_WRITE, detect_format, load_trace, load_trace_records
+
+
+@pytest.mark.parametrize('width', [4, 8])
+def test_din_trace_round_trips_through_the_memory_map(tmp_path, rng, width):
+    addresses = rng.integers(0, 1 << 31, 1000)
+    ops = rng.choice([OP_READ, OP_WRITE, OP_IFETCH], len(addresses)).astype(np.uint8)
+    src = tmp_path / 'trace.din'
+    src.write_text(''.join(f'{op} {address:x}\n' for op, address in zip(ops.tolist(), addresses.tolist())))
+    dst = tmp_path / 'trace.ctr'
+
+    # Small chunks so the op column is spooled across several writes
+    assert convert_trace(src, dst, width, chunk_size=64) == len(addresses)
+    assert is_binary_trace(dst) and not is_binary_trace(src)
+    assert detect_format(dst) == 'binary'
+    trace = open_binary_trace(dst)
+    assert isinstance(trace.addresses, np.memmap) and trace.address_width == width
+    assert np.array_equal(trace.addresses, addresses)
+    assert np.array_equal(trace.ops, ops)
+
+    loaded, loaded_ops = load_trace_records(dst)
+    assert np.array_equal(loaded, addresses) and np.array_equal(loaded_ops, ops)
+    text = make_simulator(64, 16, ways=4)
+    text.run_trace(*load_trace_records(src))
+    binary = make_simulator(64, 16, ways=4)
+    binary.run_trace(loaded, loaded_ops)
+    assert (binary.hits, binary.misses, binary.get_traffic()) == (text.hits, text.misses, text.get_traffic())
+
+
+def test_chunks_without_ops_are_stored_as_reads(tmp_path):
+    path = tmp_path / 'trace.ctr'
+    write_binary_trace(path, [([1, 2], None), ([3], [OP_WRITE])])
+    trace = open_binary_trace(path)
+    assert trace.addresses.tolist() == [1, 2, 3]
+    assert trace.ops.tolist() == [OP_READ, OP_READ, OP_WRITE]
+    write_binary_trace(path, [([5, 6], None)])
+    assert open_binary_trace(path).ops is None
+    assert isinstance(load_trace(path), np.memmap)
+
+
+def test_rejects_addresses_that_do_not_fit(tmp_path):
+    with pytest.raises(ValueError):
+        write_binary_trace(tmp_path / 'trace.ctr', [([1 << 32], None)], address_width=4)
+    (tmp_path / 'short.ctr').write_bytes(b'CTRC')
+    with pytest.raises(ValueError):
+        open_binary_trace(tmp_path / 'short.ctr')
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from cachesim.cache_hierarchy import CacheHierarchy
+from cachesim.trace_loader import OP_READ, OP_WRITE
+from conftest import make_simulator
+
+
+def _blocks(level):
+    return {block for _, block in level.cache_contents()}
+
+
+def _hierarchy(inclusion, l2_block_size=16):
+    levels = [make_simulator(8, 16, 'Set-Associative', 'LRU', 2),
+              make_simulator(32, l2_block_size, 'Set-Associative', 'LRU', 4)]
+    return CacheHierarchy(levels, [1, 10], 100, inclusion)
+
+
+def _trace(rng):
+    # Hot blocks stay in L1 while the rest churn through L2 behind them
+    blocks = np.where(rng.random(4000) < 0.5, rng.integers(0, 4, 4000), rng.integers(0, 96, 4000))
+    return blocks * 16 + rng.integers(0, 16, 4000)
+
+
+@pytest.mark.parametrize('l2_block_size', [16, 32])
+def test_inclusive_lower_level_holds_every_upper_block(rng, l2_block_size):
+    hierarchy = _hierarchy('inclusive', l2_block_size)
+    first, second = hierarchy.levels
+    for address in _trace(rng).tolist():
+        hierarchy.access_memory(address)
+        lower = _blocks(second)
+        assert all(block * 16 // l2_block_size in lower for block in _blocks(first))
+    assert hierarchy.back_invalidations > 0
+
+
+def test_exclusive_levels_never_share_a_block(rng):
+    hierarchy = _hierarchy('exclusive')
+    first, second = hierarchy.levels
+    for address in _trace(rng).tolist():
+        hierarchy.access_memory(address)
+        assert not _blocks(first) & _blocks(second)
+    # Together the levels hold more distinct blocks than L2 alone could
+    assert len(_blocks(first) | _blocks(second)) > 32
+
+
+def test_exclusive_hit_below_moves_block_up():
+    hierarchy = _hierarchy('exclusive')
+    first, second = hierarchy.levels
+    # Blocks 0, 4 and 8 share L1 set 0, so 0 is pushed down to L2
+    for address in (0, 64, 128):
+        assert hierarchy.access_memory(address) == 2
+    assert 0 in _blocks(second)
+    assert hierarchy.access_memory(0) == 1
+    assert 0 in _blocks(first) and 0 not in _blocks(second)
+
+
+@pytest.mark.parametrize('inclusion', ['NINE', 'inclusive', 'exclusive'])
+def test_run_trace_equals_access_memory(rng, inclusion):
+    trace = _trace(rng)
+    batch = _hierarchy(inclusion)
+    served = batch.run_trace(trace)
+    single = _hierarchy(inclusion)
+    levels = [single.access_memory(address) for address in trace.tolist()]
+    assert served == sum(level < 2 for level in levels)
+    assert batch.get_stats() == single.get_stats()
+
+
+def test_nine_levels_see_the_miss_stream_above(rng):
+    hierarchy = _hierarchy('NINE')
+    hierarchy.run_trace(_trace(rng))
+    first, second = hierarchy.levels
+    assert second.hits + second.misses == first.misses
+    assert hierarchy.memory_accesses == second.misses
+
+
+def test_exclusive_store_around_l1_keeps_blocks_in_place():
+    hierarchy = _hierarchy('exclusive')
+    first, second = hierarchy.levels
+    first.write_allocate = False
+    # Fill L1 set 0, then push block 0 down to L2 (L1's last victim)
+    for address in (0, 64, 128):
+        hierarchy.access_memory(address)
+    assert 0 in _blocks(second)
+    # A store miss to an uncached block allocates nowhere and must not re-insert the stale victim
+    second.invalidate(0)
+    assert hierarchy.access_memory(192, OP_WRITE) == 2
+    assert 0 not in _blocks(first) | _blocks(second)
+    assert 12 not in _blocks(first) | _blocks(second)
+    # A store miss to a block in L2 is written there and stays there
+    assert hierarchy.access_memory(128 + 1024, OP_READ) == 2
+    l2_block = next(iter(_blocks(second)))
+    assert hierarchy.access_memory(l2_block * 16, OP_WRITE) == 1
+    assert l2_block in _blocks(second) and l2_block not in _blocks(first)
+    assert not _blocks(first) & _blocks(second)
+
+
+def test_exclusive_dirty_block_keeps_its_dirty_bit_between_levels():
+    levels = [make_simulator(1, 16, 'Direct', ways=1), make_simulator(2, 16, 'Fully-Associative')]
+    hierarchy = CacheHierarchy(levels, [1, 10], 100, 'exclusive')
+    first, second = levels
+    hierarchy.access_memory(0, OP_WRITE)
+    # Block 0 moves down dirty, then back up from L2 without a writeback there
+    hierarchy.access_memory(16)
+    assert (first.writebacks, second.writebacks) == (1, 0)
+    assert hierarchy.access_memory(0) == 1
+    assert (first.writebacks, second.writebacks) == (1, 0)
+    # Still dirty in L1: evicting it writes it down again, and leaving L2 writes it to memory
+    hierarchy.access_memory(32)
+    assert (first.writebacks, second.writebacks) == (2, 0)
+    for address in (48, 64, 80):
+        hierarchy.access_memory(address)
+    assert (first.writebacks, second.writebacks) == (2, 1)
@@ -0,0 +1,167 @@
+import numpy as np
+import pytest
+
+from cachesim import cache_simulator
+from cachesim.profiling import Profiler
+from cachesim.trace_loader import OP_IFETCH, OP_READ, OP_WRITE
+from conftest import make_simulator
+
+
+class ReferenceCache:
+    """List-per-set model of an LRU or FIFO cache, oldest block first"""
+
+    def __init__(self, num_sets, ways, block_size, policy, write_allocate=True):
+        self.sets = [[] for _ in range(num_sets)]
+        self.ways = ways
+        self.block_size = block_size
+        self.policy = policy
+        self.write_allocate = write_allocate
+        self.hits = self.misses = self.writebacks = 0
+
+    def access(self, address, op=OP_READ):
+        block = address // self.block_size
+        lines = self.sets[block % len(self.sets)]
+        write = op == OP_WRITE
+        for position, line in enumerate(lines):
+            if line[0] == block:
+                self.hits += 1
+                if self.policy == 'LRU':
+                    lines.append(lines.pop(position))
+                line[1] = line[1] or write
+                return True
+        self.misses += 1
+        if write and not self.write_allocate:
+            return False
+        if len(lines) == self.ways:
+            _, dirty = lines.pop(0)
+            self.writebacks += dirty
+        lines.append([block, write])
+        return False
+
+
+GEOMETRIES = [
+    # cache_size, associativity, ways -> (num_sets, ways)
+    (16, 'Direct', 1),
+    (16, 'Set-Associative', 2),
+    (32, 'Set-Associative', 4),
+    (16, 'Fully-Associative', 16),
+    # Wide enough for the block index
+    (256, 'Fully-Associative', 256),
+]
+
+
+def _trace(rng, length, blocks, block_size):
+    # Mix of a hot set of blocks and a wider cold range so every branch is taken
+    hot = rng.integers(0, blocks // 4, length)
+    cold = rng.integers(0, blocks, length)
+    return np.where(rng.random(length) < 0.6, hot, cold) * block_size + rng.integers(0, block_size, length)
+
+
+@pytest.mark.parametrize('policy', ['LRU', 'FIFO'])
+@pytest.mark.parametrize('cache_size, associativity, ways', GEOMETRIES)
+def test_access_memory_matches_reference(rng, policy, cache_size, associativity, ways):
+    simulator = make_simulator(cache_size, 8, associativity, policy, ways)
+    num_sets = cache_size // ways
+    reference = ReferenceCache(num_sets, ways, 8, policy)
+    addresses = _trace(rng, 5000, cache_size * 3, 8)
+    ops = np.where(rng.random(len(addresses)) < 0.3, OP_WRITE, OP_READ)
+    for address, op in zip(addresses.tolist(), ops.tolist()):
+        assert simulator.access_memory(address, op) == reference.access(address, op)
+    assert (simulator.hits, simulator.misses, simulator.writebacks) == \
+        (reference.hits, reference.misses, reference.writebacks)
+
+
+@pytest.mark.parametrize('policy', ['LRU', 'FIFO'])
+@pytest.mark.parametrize('cache_size, associativity, ways', GEOMETRIES)
+def test_run_trace_matches_reference(rng, policy, cache_size, associativity, ways):
+    simulator = make_simulator(cache_size, 8, associativity, policy, ways)
+    reference = ReferenceCache(cache_size // ways, ways, 8, policy)
+    addresses = _trace(rng, 5000, cache_size * 3, 8)
+    # Split in two so the second run starts from a warm cache
+    hits = simulator.run_trace(addresses[:1700]) + simulator.run_trace(addresses[1700:])
+    expected = sum(reference.access(address) for address in addresses.tolist())
+    assert hits == expected
+    assert (simulator.hits, simulator.misses) == (reference.hits, reference.misses)
+
+
+def test_run_trace_hits_marks_each_access(rng):
+    simulator = make_simulator(64, 4, 'Direct')
+    reference = ReferenceCache(64, 1, 4, 'LRU')
+    addresses = _trace(rng, 3000, 256, 4)
+    hit_mask = simulator.run_trace_hits(addresses)
+    assert hit_mask.tolist() == [reference.access(address) for address in addresses.tolist()]
+
+
+@pytest.mark.parametrize('chunk_size', [64, cache_simulator.TRACE_CHUNK_SIZE])
+def test_vectorized_direct_mapped_path_matches_access_memory(rng, monkeypatch, chunk_size):
+    # Small chunks put repeated and conflicting blocks on both sides of chunk boundaries
+    monkeypatch.setattr(cache_simulator, 'TRACE_CHUNK_SIZE', chunk_size)
+    addresses = _trace(rng, 5000, 256, 4)
+    ops = np.where(rng.random(len(addresses)) < 0.2, OP_IFETCH, OP_READ)
+    batch = make_simulator(64, 4, 'Direct')
+    profiler = Profiler()
+    batch.enable_profiling(profiler)
+    hits = batch.run_trace(addresses[:1700], ops[:1700])
+    hit_mask = batch.run_trace_hits(addresses[1700:])
+    assert profiler.counters['vectorized'] == len(addresses)
+
+    single = make_simulator(64, 4, 'Direct')
+    expected = [single.access_memory(address, op) for address, op in zip(addresses.tolist(), ops.tolist())]
+    assert hits == sum(expected[:1700])
+    assert hit_mask.tolist() == expected[1700:]
+    assert (batch.hits, batch.misses) == (single.hits, single.misses)
+    assert batch.cache_contents() == single.cache_contents()
+
+
+def test_no_write_allocate_matches_reference(rng):
+    simulator = make_simulator(16, 4, 'Set-Associative', 'LRU', 4, write_allocate=False)
+    reference = ReferenceCache(4, 4, 4, 'LRU', write_allocate=False)
+    addresses = _trace(rng, 3000, 64, 4)
+    ops = np.where(rng.random(len(addresses)) < 0.4, OP_WRITE, OP_READ)
+    simulator.run_trace(addresses, ops)
+    for address, op in zip(addresses.tolist(), ops.tolist()):
+        reference.access(address, op)
+    assert (simulator.hits, simulator.misses, simulator.writebacks) == \
+        (reference.hits, reference.misses, reference.writebacks)
+    assert simulator.write_arounds > 0
+
+
+# The engine follows the documented model; the original scans did not (see the cases below)
+
+def test_direct_mapped_miss_only_replaces_its_own_line():
+    simulator = make_simulator(4, 1, 'Direct')
+    for address in (0, 1, 2, 3):
+        simulator.access_memory(address)
+    # 4 maps to line 0 and must leave lines 1-3 alone
+    assert not simulator.access_memory(4)
+    assert [simulator.access_memory(address) for address in (1, 2, 3)] == [True, True, True]
+    assert not simulator.access_memory(0)
+
+
+def test_set_associative_finds_blocks_in_their_set():
+    simulator = make_simulator(8, 1, 'Set-Associative', ways=2)
+    # 0 and 4 share set 0 of 4; both fit in its two ways
+    assert [simulator.access_memory(address) for address in (0, 4, 0, 4)] == [False, False, True, True]
+    # A third block evicts the least recently used of them
+    assert not simulator.access_memory(8)
+    assert simulator.access_memory(4)
+    assert not simulator.access_memory(0)
+
+
+@pytest.mark.parametrize('policy, hit_on_first', [('LRU', True), ('FIFO', False)])
+def test_fully_associative_eviction_keeps_live_lines(policy, hit_on_first):
+    simulator = make_simulator(4, 1, 'Fully-Associative', policy)
+    for address in (0, 1, 2, 3, 0):
+        simulator.access_memory(address)
+    # Evicts 1 under LRU (0 was just used) and 0 under FIFO
+    assert not simulator.access_memory(4)
+    assert simulator.access_memory(0) == hit_on_first
+    assert simulator.access_memory(2) and simulator.access_memory(3)
+    assert len(simulator.cache_contents()) == 4
+
+
+def test_block_size_groups_addresses():
+    simulator = make_simulator(4, 16, 'Direct')
+    assert [simulator.access_memory(address) for address in (0, 15, 16, 31, 64)] == \
+        [False, True, False, True, False]
+    assert simulator.get_hit_rate() == pytest.approx(2 / 5)
@@ -0,0 +1,47 @@
+from array import array
+
+import pytest
+
+from cachesim.cache_state import BlockIndex, CacheState
+
+
+def test_block_index_matches_a_dict_under_churn(rng):
+    num_lines = 64
+    tags = array('q', bytes(8 * num_lines))
+    index = BlockIndex(tags, num_lines)
+    resident = {}
+    free = list(range(num_lines))
+    # Nearby blocks collide often, which exercises the backward-shift deletion
+    for block in rng.integers(0, 256, 20000).tolist():
+        if block in resident:
+            line = resident.pop(block)
+            index.remove(block)
+            free.append(line)
+        elif free:
+            line = free.pop()
+            tags[line] = block
+            index.insert(block, line)
+            resident[block] = line
+        assert index.find(block) == resident.get(block, -1)
+    assert all(index.find(block) == line for block, line in resident.items())
+
+
+def test_invalidated_line_is_refilled_without_an_eviction():
+    state = CacheState(2, 4)
+    lines = [state.allocate(0, block) for block in (0, 2, 4, 6)]
+    assert state.find(4, 0) == lines[2]
+    assert state.invalidate(4, 0) == lines[2] and state.find(4, 0) == -1
+    assert state.allocate(0, 8) == lines[2]
+    assert state.evicted_block == -1
+    # The set is full again, so the next block evicts a resident one
+    state.allocate(0, 10)
+    assert state.evicted_block in (0, 2, 6, 8)
+
+
+# Bytes per line besides the 10 of tags and bits and the 4 per set of occupancy
+@pytest.mark.parametrize('ways, policy, extra', [(1, 'LRU', 0), (8, 'LRU', 9), (8, 'PLRU', 0.125),
+                                                 (32, 'LRU', 16.5)])
+def test_state_is_packed(ways, policy, extra):
+    num_lines = 1 << 16
+    state = CacheState(num_lines // ways, ways, policy)
+    assert state.nbytes() <= (10 + 4 / ways + extra) * num_lines
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from conftest import make_simulator
+
+pytest.importorskip('tkinter')
+from cache_view import EMPTY_CELL, heat_map_cells, heat_map_layout, heat_map_ppm
+
+
+def test_heat_map_cells_follow_occupancy_and_misses():
+    simulator = make_simulator(8, 1, ways=2)
+    assert heat_map_cells(simulator) is None
+    simulator.enable_instrumentation(window_size=16)
+    # Set 0 misses three times and fills both ways; set 1 holds one block
+    for address in [0, 4, 8, 1]:
+        simulator.access_memory(address)
+    occupancy, miss_density, group = heat_map_cells(simulator)
+    assert group == 1
+    assert occupancy.tolist() == [1.0, 0.5, 0.0, 0.0]
+    assert miss_density.tolist() == [1.0, 1 / 3, 0.0, 0.0]
+
+
+def test_large_caches_are_averaged_into_at_most_max_cells():
+    simulator = make_simulator(20, 1, ways=2)
+    simulator.run_trace(np.arange(4))
+    occupancy, miss_density, group = heat_map_cells(simulator, max_cells=4)
+    # 10 sets in groups of 3, the last one padded with empty sets
+    assert group == 3 and len(occupancy) == 4
+    assert np.allclose(occupancy, [0.5, 1 / 6, 0, 0])
+    assert not miss_density.any()
+
+
+@pytest.mark.parametrize('cells, width, height', [(1, 100, 100), (10, 200, 100), (1 << 16, 800, 600),
+                                                  (7, 10, 1000)])
+def test_layout_fits_every_cell(cells, width, height):
+    columns, rows, scale = heat_map_layout(cells, width, height)
+    assert columns * rows >= cells and (rows - 1) * columns < cells
+    assert columns * scale <= width and rows * scale <= height
+
+
+def test_ppm_colors_cells_and_pads_the_last_row():
+    image = heat_map_ppm(np.array([1.0, 0.0, 0.5]), np.array([0.0, 1.0, 0.0]), 2, 2, 3)
+    header = b'P6 6 6 255\n'
+    assert image.startswith(header)
+    pixels = np.frombuffer(image[len(header):], dtype=np.uint8).reshape(6, 6, 3)
+    assert pixels[0, 0].tolist() == [0, 255, 0]
+    assert pixels[2, 5].tolist() == [255, 0, 0]
+    assert pixels[3, 0].tolist() == [0, 128, 0]
+    assert pixels[5, 5].tolist() == list(EMPTY_CELL)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from cachesim.checkpoint import (COUNTER_FIELDS, load_checkpoint, run_with_checkpoints, save_checkpoint,
+                                 skip_accesses)
+from cachesim.replacement_policies import REPLACEMENT_POLICIES
+from cachesim.trace_loader import OP_READ, OP_WRITE
+from conftest import make_simulator
+
+
+def _chunks(addresses, ops, size):
+    for start in range(0, len(addresses), size):
+        yield addresses[start:start + size], ops[start:start + size]
+
+
+@pytest.fixture
+def trace(rng):
+    addresses = rng.integers(0, 1 << 10, 12000) * 8
+    ops = np.where(rng.random(len(addresses)) < 0.3, OP_WRITE, OP_READ).astype(np.uint8)
+    return addresses, ops
+
+
+@pytest.mark.parametrize('policy', sorted(REPLACEMENT_POLICIES))
+@pytest.mark.parametrize('associativity, ways', [('Direct', 1), ('Set-Associative', 4), ('Fully-Associative', 128)])
+def test_resumed_run_equals_uninterrupted(tmp_path, trace, policy, associativity, ways):
+    addresses, ops = trace
+    whole = make_simulator(128, 8, associativity, policy, ways, seed=5)
+    whole.run_trace(addresses, ops)
+
+    path = tmp_path / 'run.ckpt'
+    first = make_simulator(128, 8, associativity, policy, ways, seed=5)
+    first.run_trace(addresses[:5000], ops[:5000])
+    save_checkpoint(first, path)
+    resumed, position = load_checkpoint(path)
+    assert position == 5000
+    resumed.run_trace(addresses[position:], ops[position:])
+
+    assert {name: getattr(resumed, name) for name in COUNTER_FIELDS} == \
+        {name: getattr(whole, name) for name in COUNTER_FIELDS}
+    assert resumed.cache_contents() == whole.cache_contents()
+
+
+def test_periodic_checkpoints_resume_mid_chunk(tmp_path, trace):
+    addresses, ops = trace
+    whole = make_simulator(64, 8, 'Set-Associative', 'LRU', 2)
+    whole.run_trace(addresses, ops)
+
+    path = tmp_path / 'run.ckpt'
+    interrupted = make_simulator(64, 8, 'Set-Associative', 'LRU', 2)
+    # Stop after 7000 accesses, between two saves taken every 3000
+    run_with_checkpoints(interrupted, _chunks(addresses[:7000], ops[:7000], 2500), path, 3000)
+    resumed, position = load_checkpoint(path)
+    assert position == 7000
+    run_with_checkpoints(resumed, skip_accesses(_chunks(addresses, ops, 2500), position), path, 3000, position)
+    assert (resumed.hits, resumed.misses, resumed.writebacks) == (whole.hits, whole.misses, whole.writebacks)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'trace.txt'
+    path.write_text('0 4 8\n')
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
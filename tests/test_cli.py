@@ -0,0 +1,57 @@
+import json
+
+from cachesim.__main__ import main
+
+
+def test_subcommand_trace_option_is_not_taken_for_a_profiling_option(tmp_path, capsys):
+    trace = tmp_path / 'trace.txt'
+    trace.write_text('\n'.join('01230123'))
+    assert not main(['sweep', '--trace', str(trace), '--cache-sizes', '4', '--block-sizes', '1',
+                     '--associativity', 'Direct', '--policy', 'LRU', '--workers', '1', '--json'])
+    rows = json.loads(capsys.readouterr().out)
+    assert [(row['hits'], row['misses']) for row in rows] == [(4, 4)]
+
+
+def test_sweep_reports_a_missing_trace(tmp_path, capsys):
+    assert main(['sweep', '--trace', str(tmp_path / 'missing.txt'), '--cache-sizes', '4',
+                 '--block-sizes', '1']) == 1
+    assert 'File error' in capsys.readouterr().err
+
+
+def test_sweep_reads_bare_hex_addresses(tmp_path, capsys):
+    trace = tmp_path / 'trace.txt'
+    # Read as decimal, 440 would not evict 40 from the direct-mapped cache
+    trace.write_text('40 440 40\n')
+    assert not main(['sweep', '--trace', str(trace), '--format', 'hex', '--cache-sizes', '4',
+                     '--block-sizes', '16', '--associativity', 'Direct', '--policy', 'LRU', '--workers', '1',
+                     '--json'])
+    rows = json.loads(capsys.readouterr().out)
+    assert [(row['hits'], row['misses']) for row in rows] == [(0, 3)]
+
+
+def test_hierarchy_reports_a_missing_trace(tmp_path, capsys):
+    assert main(['hierarchy', '--trace', str(tmp_path / 'missing.txt'), '--level', '4,16,1,LRU,1']) == 1
+    assert 'File error' in capsys.readouterr().err
+
+
+def test_hierarchy_reads_bare_hex_addresses(tmp_path, capsys):
+    trace = tmp_path / 'trace.txt'
+    trace.write_text('40 440 40\n')
+    assert not main(['hierarchy', '--trace', str(trace), '--format', 'hex', '--level', '4,16,1,LRU,1', '--json'])
+    level = json.loads(capsys.readouterr().out)['levels'][0]
+    assert (level['hits'], level['misses']) == (0, 3)
+
+
+def test_multicore_reports_a_missing_trace(tmp_path, capsys):
+    assert main(['multicore', '--trace', str(tmp_path / 'missing.txt'), '--cache-size', '4',
+                 '--block-size', '16']) == 1
+    assert 'File error' in capsys.readouterr().err
+
+
+def test_multicore_reads_bare_hex_addresses(tmp_path, capsys):
+    trace = tmp_path / 'trace.txt'
+    trace.write_text('0:40 0:440 0:40 1:W:ff\n')
+    assert not main(['multicore', '--trace', str(trace), '--format', 'hex', '--cache-size', '4',
+                     '--block-size', '16', '--associativity', 'Direct', '--json'])
+    cores = json.loads(capsys.readouterr().out)['cores']
+    assert [(core['hits'], core['misses']) for core in cores] == [(0, 3), (0, 1)]
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from cachesim.checkpoint import load_checkpoint, restore_checkpoint, save_checkpoint
+from cachesim.instrumentation import SEEN_FILTER_BITS
+from conftest import make_simulator
+
+
+def _exact_classes(blocks, hits, num_lines):
+    """3C classes with an exact set of seen blocks"""
+    shadow = OrderedDict()
+    seen = set()
+    classes = {'compulsory': 0, 'capacity': 0, 'conflict': 0}
+    for block, hit in zip(blocks, hits):
+        if block in shadow:
+            shadow.move_to_end(block)
+            if not hit:
+                classes['conflict'] += 1
+        else:
+            shadow[block] = None
+            if len(shadow) > num_lines:
+                shadow.popitem(last=False)
+            if not hit:
+                classes['capacity' if block in seen else 'compulsory'] += 1
+        seen.add(block)
+    return classes
+
+
+@pytest.fixture
+def addresses(rng):
+    return rng.integers(0, 1 << 12, 20000) * 4
+
+
+def test_classification_is_opt_in(addresses):
+    simulator = make_simulator(256, 16, 'Direct', ways=1)
+    instrumentation = simulator.enable_instrumentation(window_size=1000)
+    simulator.run_trace(addresses)
+    assert not instrumentation.classify and instrumentation.seen is None
+    assert 'miss_classes' not in instrumentation.summary()
+    # The windowed counters are kept regardless
+    assert instrumentation.summary()['window_misses'][0] > 0
+    assert instrumentation.set_misses.sum() == simulator.misses
+
+
+@pytest.mark.parametrize('associativity, ways', [('Direct', 1), ('Set-Associative', 4)])
+def test_classes_match_exact_tracking(addresses, associativity, ways):
+    batch = make_simulator(256, 16, associativity, ways=ways)
+    instrumentation = batch.enable_instrumentation(window_size=1000, classify=True)
+    hits = batch.run_trace_hits(addresses)
+    assert instrumentation.seen.nbytes == SEEN_FILTER_BITS // 8
+
+    single = make_simulator(256, 16, associativity, ways=ways)
+    single.enable_instrumentation(window_size=1000, classify=True)
+    for address in addresses.tolist():
+        single.access_memory(address)
+
+    expected = _exact_classes((addresses // 16).tolist(), hits.tolist(), 256)
+    assert instrumentation.miss_classes() == expected
+    assert single.instrumentation.miss_classes() == expected
+    assert sum(expected.values()) == batch.misses
+
+
+def test_repeated_blocks_in_one_batch_are_compulsory_once():
+    simulator = make_simulator(4, 16, 'Direct', ways=1)
+    instrumentation = simulator.enable_instrumentation(classify=True)
+    # Blocks 0, 4 and 8 share set 0 and evict each other
+    simulator.run_trace(np.array([0, 64, 0, 64, 128]))
+    assert instrumentation.miss_classes() == {'compulsory': 3, 'capacity': 0, 'conflict': 2}
+
+
+def test_no_classes_from_a_warm_cache(tmp_path, addresses):
+    cold = make_simulator(256, 16, 'Direct', ways=1)
+    cold.run_trace(addresses[:10000])
+    save_checkpoint(cold, tmp_path / 'run.ckpt')
+
+    resumed, position = load_checkpoint(tmp_path / 'run.ckpt')
+    instrumentation = resumed.enable_instrumentation(window_size=1000, classify=True)
+    resumed.run_trace(addresses[position:])
+    assert instrumentation.warm
+    assert instrumentation.summary()['miss_classes'] is None
+    assert instrumentation.set_misses.sum() == resumed.misses - cold.misses
+
+    # Restoring under running instrumentation, then starting over cold
+    restore_checkpoint(resumed, tmp_path / 'run.ckpt')
+    assert instrumentation.warm
+    resumed.reset()
+    resumed.run_trace(addresses)
+    assert not instrumentation.warm
+    assert sum(instrumentation.miss_classes().values()) == resumed.misses
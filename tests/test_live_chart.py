@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from conftest import make_simulator
+
+matplotlib = pytest.importorskip('matplotlib')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import live_chart
+from live_chart import LiveChart, hit_rate_series
+
+
+def test_series_needs_instrumentation_and_two_windows():
+    simulator = make_simulator(4, 1, 'Direct')
+    assert hit_rate_series(simulator) is None
+    simulator.enable_instrumentation(window_size=4)
+    simulator.run_trace([0, 1, 2, 3])
+    assert hit_rate_series(simulator) is None
+
+
+def test_overall_rate_counts_windows_that_were_dropped():
+    simulator = make_simulator(4, 1, 'Direct')
+    # Warm start: these accesses come before any window
+    simulator.run_trace([0, 1, 2, 3])
+    simulator.enable_instrumentation(window_size=4, capacity=2)
+    # Windows of 4 hits, 4 misses, 4 hits and an open window of 2 hits; only the last two whole ones are kept
+    simulator.run_trace([0, 1, 2, 3, 4, 5, 6, 7, 4, 5, 6, 7, 4, 5])
+    window_size, starts, rates, running = hit_rate_series(simulator)
+    assert window_size == 4
+    assert starts.tolist() == [4, 8, 12]
+    assert rates.tolist() == [0.0, 1.0, 1.0]
+    assert running.tolist() == pytest.approx([4 / 12, 8 / 16, 10 / 18])
+    assert running[-1] == simulator.get_hit_rate()
+
+
+@pytest.fixture
+def unthrottled(monkeypatch):
+    monkeypatch.setattr(live_chart, 'FRAME_INTERVAL', 0)
+    monkeypatch.setattr(live_chart, 'MAX_RENDER_SHARE', float('inf'))
+
+
+def make_chart():
+    fig = Figure()
+    canvas = FigureCanvasAgg(fig)
+    return LiveChart(fig, fig.add_subplot(), canvas)
+
+
+def test_live_updates_reuse_the_artists(unthrottled):
+    chart = make_chart()
+    chart.show_counts(10, 5, force=True)
+    bars, background = list(chart.bars), chart.background
+    assert background is not None
+    chart.show_counts(12, 6)
+    # Within the axis limit: no rebuild and no full draw, so the cached background is kept
+    assert list(chart.bars) == bars and chart.background is background
+    assert [bar.get_height() for bar in chart.bars] == [12, 6]
+    chart.show_counts(1000, 6)
+    assert chart.ax.get_ylim()[1] >= 1000 and chart.background is not background
+
+
+def test_updates_are_throttled_but_forced_ones_are_not():
+    chart = make_chart()
+    chart.show_counts(1, 1, force=True)
+    chart.show_counts(5, 1)
+    assert chart.bars[0].get_height() == 1
+    chart.show_counts(5, 1, force=True)
+    assert chart.bars[0].get_height() == 5
+
+
+def test_series_layout_grows_the_axis_towards_the_end(unthrottled):
+    chart = make_chart()
+    series = (4, np.array([0, 4]), np.array([0.5, 1.0]), np.array([0.5, 0.75]))
+    chart.show_series(series, end=100)
+    assert chart.layout == ('series', 4)
+    assert chart.ax.get_xlim() == (0, 100)
+    x, y = chart.window_line.get_data()
+    assert x.tolist() == [0, 4, 8] and y.tolist() == [50, 100, 100]
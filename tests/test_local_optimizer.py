@@ -0,0 +1,43 @@
+import numpy as np
+
+from cachesim.local_optimizer import SAMPLE_WINDOW, LocalOptimizer, collect_addresses
+
+
+def test_short_patterns_are_kept_whole():
+    assert collect_addresses('0 16 0x20').tolist() == [0, 16, 32]
+    addresses = np.arange(1000)
+    assert collect_addresses(addresses) is addresses
+    assert collect_addresses(iter([np.arange(3), np.arange(3, 5)])).tolist() == list(range(5))
+
+
+def test_long_traces_are_sampled_in_spread_windows():
+    limit = 8 * SAMPLE_WINDOW
+    chunks = (np.arange(start, start + 3 * SAMPLE_WINDOW) for start in range(0, 100 * SAMPLE_WINDOW,
+                                                                              3 * SAMPLE_WINDOW))
+    sample = collect_addresses(chunks, limit)
+    assert limit // 2 < len(sample) <= limit
+    windows = sample.reshape(-1, SAMPLE_WINDOW)
+    # Each window is a run of consecutive accesses, and the windows cover the whole trace evenly
+    assert (np.diff(windows, axis=1) == 1).all()
+    starts = windows[:, 0] // SAMPLE_WINDOW
+    assert starts[0] == 0 and starts[-1] > 80
+    assert len(set(np.diff(starts).tolist())) == 1
+    assert len(collect_addresses(np.arange(100 * SAMPLE_WINDOW), limit)) <= limit
+
+
+def test_recommends_smallest_configuration_within_tolerance(rng):
+    # A loop over 48 blocks plus noise: more capacity keeps helping a little
+    addresses = np.concatenate([np.tile(np.arange(48) * 16, 40), rng.integers(0, 1 << 12, 200) * 16])
+    optimizer = LocalOptimizer(cache_sizes=(16, 32, 64), block_sizes=(16, 32), tolerance=0.05)
+    recommendation = optimizer.recommend(addresses)
+    front = recommendation['pareto_front']
+    best = front[-1]
+    assert recommendation['best_hit_rate'] == best['hit_rate']
+    assert recommendation['hit_rate'] >= best['hit_rate'] - 0.05
+    capacity = recommendation['cache_size'] * recommendation['block_size']
+    # Every smaller configuration on the front is further than the tolerance from the best
+    for row in front:
+        if row['cache_size'] * row['block_size'] < capacity:
+            assert row['hit_rate'] < best['hit_rate'] - 0.05
+    exact = LocalOptimizer(cache_sizes=(16, 32, 64), block_sizes=(16, 32), tolerance=0).recommend(addresses)
+    assert exact['hit_rate'] == exact['best_hit_rate']
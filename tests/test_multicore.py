@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from cachesim import multicore
+from cachesim.multicore import MultiCoreSimulator, make_caches
+from cachesim.trace_loader import OP_READ, OP_WRITE
+
+
+def _simulator(protocol, max_workers=1):
+    return MultiCoreSimulator(make_caches(4, 16, 16, 'Set-Associative', 'LRU', 2), protocol, max_workers)
+
+
+def _trace(rng, length=20000):
+    """Four cores over private blocks and blocks that only become shared part way through"""
+    cores = rng.integers(0, 4, length)
+    blocks = rng.integers(0, 48, length)
+    # Block b belongs to core b % 4 until its own point in the trace, then to everyone
+    private = np.arange(length) < blocks * (length // 48)
+    cores = np.where(private, blocks % 4, cores)
+    addresses = blocks * 16 + rng.integers(0, 4, length) * 4
+    ops = np.where(rng.random(length) < 0.3, OP_WRITE, OP_READ).astype(np.uint8)
+    return cores, addresses, ops
+
+
+def _stats(simulator):
+    stats = simulator.get_stats(top=100)
+    stats.pop('shared_accesses')
+    return stats
+
+
+def _run(cores, addresses, ops):
+    simulator = _simulator('MESI')
+    simulator.run_trace(cores, addresses, ops)
+    return simulator
+
+
+@pytest.mark.parametrize('protocol', ['MSI', 'MESI'])
+def test_chunked_runs_equal_one_run(rng, protocol):
+    cores, addresses, ops = _trace(rng)
+    whole = _simulator(protocol)
+    whole.run_trace(cores, addresses, ops)
+    for step in (5000, 777, 64):
+        chunked = _simulator(protocol)
+        for start in range(0, len(addresses), step):
+            end = start + step
+            chunked.run_trace(cores[start:end], addresses[start:end], ops[start:end])
+        assert _stats(chunked) == _stats(whole), step
+
+
+def test_private_read_then_shared_write_is_silent_under_mesi():
+    cores, addresses, ops = [0, 0, 1], [0, 0, 0], [OP_READ, OP_WRITE, OP_READ]
+    split = _simulator('MESI')
+    split.run_trace(cores[:1], addresses[:1], ops[:1])
+    split.run_trace(cores[1:], addresses[1:], ops[1:])
+    # The first read left the line Exclusive, so the write needs no upgrade
+    assert split.get_upgrades() == 0
+    assert split.interventions == 1
+    assert _stats(split) == _stats(_run(cores, addresses, ops))
+
+
+def test_false_sharing_is_detected():
+    # Cores 0 and 1 write different words of the same block in turn
+    cores = [0, 1] * 50
+    addresses = [0, 4] * 50
+    simulator = _run(cores, addresses, [OP_WRITE] * 100)
+    stats = simulator.get_stats()
+    assert stats['coherence_misses'] == 98
+    assert stats['false_sharing_misses'] == 98
+    assert stats['hot_blocks'][0]['block'] == 0
+
+
+def test_parallel_flush_matches_serial(rng, monkeypatch):
+    monkeypatch.setattr(multicore, 'PARALLEL_MIN_ACCESSES', 0)
+    cores, addresses, ops = _trace(rng)
+    serial = _simulator('MESI')
+    serial.run_trace(cores, addresses, ops)
+    parallel = _simulator('MESI', max_workers=4)
+    parallel.run_trace(cores, addresses, ops)
+    assert parallel.get_stats() == serial.get_stats()
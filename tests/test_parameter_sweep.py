@@ -0,0 +1,39 @@
+import numpy as np
+
+from cachesim.binary_trace import open_binary_trace, write_binary_trace
+from cachesim.parameter_sweep import SharedTrace, run_sweep, simulate_config, sweep_grid
+from cachesim.trace_loader import OP_READ, OP_WRITE
+
+
+def test_ways_only_multiply_set_associative_points():
+    grid = sweep_grid([16, 32], [4], ('Direct', 'Set-Associative'), ('LRU',), ways=(2, 4))
+    assert grid == [(16, 4, 'Direct', 'LRU', 2), (16, 4, 'Set-Associative', 'LRU', 2),
+                    (16, 4, 'Set-Associative', 'LRU', 4), (32, 4, 'Direct', 'LRU', 2),
+                    (32, 4, 'Set-Associative', 'LRU', 2), (32, 4, 'Set-Associative', 'LRU', 4)]
+
+
+def test_parallel_sweep_matches_serial_simulation(rng):
+    addresses = rng.integers(0, 1 << 12, 5000) * 4
+    ops = np.where(rng.random(len(addresses)) < 0.3, OP_WRITE, OP_READ).astype(np.uint8)
+    rows = run_sweep(addresses, [16, 64], [4, 16], ('Direct', 'Set-Associative', 'Fully-Associative'),
+                     ('LRU', 'FIFO'), max_workers=2, ways=(2, 4), ops=ops, write_allocate=False)
+    grid = sweep_grid([16, 64], [4, 16], ('Direct', 'Set-Associative', 'Fully-Associative'), ('LRU', 'FIFO'),
+                      ways=(2, 4))
+    assert len(rows) == len(grid)
+    for row, config in zip(rows, grid):
+        expected = simulate_config(addresses, *config, ops=ops, write_allocate=False)
+        assert {key: value for key, value in row.items() if key != 'seconds'} == \
+            {key: value for key, value in expected.items() if key != 'seconds'}
+
+
+def test_memory_mapped_trace_is_shared_in_place(tmp_path, rng):
+    addresses = rng.integers(0, 1 << 20, 1000)
+    path = tmp_path / 'trace.ctr'
+    write_binary_trace(path, [(addresses, None)])
+    mapped = open_binary_trace(path).addresses
+    with SharedTrace(mapped) as shared:
+        assert not shared.temporary and shared.path == mapped.filename
+        assert np.array_equal(shared.open(), addresses)
+    with SharedTrace(addresses[:10].tolist()) as shared:
+        assert shared.temporary
+        assert shared.open().tolist() == addresses[:10].tolist()
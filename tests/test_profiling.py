@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from cachesim.profiling import Profiler
+from cachesim.trace_loader import OP_READ, OP_WRITE
+from conftest import make_simulator
+
+
+def _run(simulator, profiler, addresses, ops, length):
+    # As the GUI does for every run: start cold and re-attach the profiler
+    simulator.reset()
+    simulator.disable_profiling()
+    simulator.enable_profiling(profiler)
+    simulator.run_trace(addresses[:3000])
+    simulator.run_trace(addresses[3000:length], ops[3000:length])
+
+
+@pytest.mark.parametrize('instrumented', [False, True])
+def test_counters_cover_every_access_over_repeated_runs(rng, instrumented):
+    addresses = rng.integers(0, 1 << 12, 6000) * 4
+    ops = np.where(rng.random(len(addresses)) < 0.3, OP_WRITE, OP_READ).astype(np.uint8)
+    simulator = make_simulator(64, 16, 'Direct', ways=1)
+    if instrumented:
+        simulator.enable_instrumentation(window_size=500)
+    profiler = Profiler()
+    writebacks = 0
+    for length in (6000, 5000, 4000):
+        _run(simulator, profiler, addresses, ops, length)
+        writebacks += simulator.writebacks
+    counters = profiler.report()['counters']
+    # The read-only first part of each run takes the vectorized path, the rest goes access by access
+    assert counters['vectorized'] == 3 * 3000
+    assert counters['hit'] + counters['miss'] == 3000 + 1000 + 2000
+    assert counters['writeback'] == writebacks > 0
+
+
+def test_writebacks_outside_accesses_are_counted():
+    simulator = make_simulator(4, 16, 'Direct', ways=1)
+    profiler = Profiler()
+    simulator.enable_profiling(profiler)
+    simulator.access_memory(0, OP_WRITE)
+    simulator.invalidate(0)
+    simulator.access_memory(16, OP_WRITE)
+    simulator.insert(80)
+    simulator.disable_profiling()
+    simulator.access_memory(32, OP_WRITE)
+    simulator.invalidate(32)
+    assert profiler.counters['writeback'] == 2
+    assert simulator.writebacks == 3
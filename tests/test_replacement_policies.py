@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from conftest import make_simulator
+from cachesim.replacement_policies import REPLACEMENT_POLICIES, make_policy
+
+
+@pytest.mark.parametrize('policy, hits, victim', [
+    ('LRU', [0, 2], 1),
+    ('FIFO', [0, 2], 0),
+    # The tree only remembers which half was touched last, unlike LRU
+    ('PLRU', [2, 0], 3),
+    ('LFU', [3, 3, 3, 0, 1, 2], 0),
+    ('SRRIP', [0, 1], 2),
+])
+def test_eviction_order(policy, hits, victim):
+    simulator = make_simulator(4, 1, 'Fully-Associative', policy)
+    for address in [0, 1, 2, 3] + hits:
+        simulator.access_memory(address)
+    assert simulator.misses == 4 and simulator.hits == len(hits)
+    assert not simulator.access_memory(4)
+    assert simulator.state.evicted_block == victim
+
+
+def test_random_policy_is_reproducible_per_seed(rng):
+    addresses = rng.integers(0, 64, 5000)
+
+    def hit_mask(seed):
+        simulator = make_simulator(16, 1, 'Set-Associative', 'Random', ways=8, seed=seed)
+        return simulator.run_trace_hits(addresses)
+
+    assert np.array_equal(hit_mask(1), hit_mask(1))
+    assert not np.array_equal(hit_mask(1), hit_mask(2))
+
+
+@pytest.mark.parametrize('name', sorted(REPLACEMENT_POLICIES))
+def test_victims_stay_in_their_set(name):
+    policy = make_policy(name, 4, 3, seed=7)
+    for set_index in range(4):
+        for line in range(set_index * 3, set_index * 3 + 3):
+            policy.on_fill(set_index, line)
+    for _ in range(20):
+        for set_index in range(4):
+            line = policy.victim(set_index)
+            assert set_index * 3 <= line < set_index * 3 + 3
+            policy.on_fill(set_index, line)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        make_policy('MRU', 1, 4)
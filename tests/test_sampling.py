@@ -0,0 +1,118 @@
+import json
+
+import numpy as np
+import pytest
+
+from cachesim.sampling import ShardsMRC, estimate_hit_rate, main, stratified_estimate
+from cachesim.stack_distance import StackDistanceAnalyzer
+from cachesim.workload_generators import generate
+from conftest import make_simulator
+
+
+@pytest.fixture(scope='module')
+def mixed():
+    # Zipf hot set, sequential scan and pointer chase, so a few cache sets carry most accesses
+    return np.concatenate(list(generate('Mixed', 500000)))
+
+
+def _exact_hit_rate(addresses, cache_size, block_size, associativity, ways=1):
+    simulator = make_simulator(cache_size, block_size, associativity, 'LRU', ways)
+    simulator.run_trace(addresses)
+    return simulator.get_hit_rate()
+
+
+def test_set_sampling_within_one_percent(mixed):
+    exact = _exact_hit_rate(mixed, 4096, 64, 'Set-Associative', 8)
+    for sample_seed in range(4):
+        estimate = estimate_hit_rate(mixed, 4096, 64, 'Set-Associative', 'LRU', 8, rate=0.02,
+                                     sample_seed=sample_seed)
+        assert estimate['method'] == 'set sampling'
+        assert estimate['sampled_accesses'] < len(mixed) / 2
+        assert abs(estimate['hit_rate'] - exact) < 0.01
+
+
+@pytest.mark.parametrize('workload, cache_size, rate, share', [('Zipf Hot Set', 1024, 0.05, 0.15),
+                                                               ('Mixed', 65536, 0.01, 0.2)])
+def test_set_sampling_simulates_a_small_share_of_the_trace(mixed, workload, cache_size, rate, share):
+    addresses = mixed if workload == 'Mixed' else np.concatenate(list(generate(workload, 1000000)))
+    exact = _exact_hit_rate(addresses, cache_size, 64, 'Set-Associative', 8)
+    estimate = estimate_hit_rate(addresses, cache_size, 64, 'Set-Associative', 'LRU', 8, rate=rate)
+    assert estimate['method'] == 'set sampling'
+    # Neither the floor on sampled sets nor the hot sets may take most of the trace
+    assert estimate['sampled_accesses'] / estimate['accesses'] < share
+    assert abs(estimate['hit_rate'] - exact) < 3 * estimate['stderr']
+
+
+def test_shards_within_its_error(mixed):
+    exact = _exact_hit_rate(mixed, 4096, 32, 'Fully-Associative')
+    for sample_seed in range(4):
+        estimate = estimate_hit_rate(mixed, 4096, 32, 'Fully-Associative', 'LRU', rate=0.01,
+                                     sample_seed=sample_seed)
+        assert estimate['method'] == 'shards'
+        error = abs(estimate['hit_rate'] - exact)
+        assert error < 0.03 and error < 3 * estimate['stderr']
+
+
+def test_small_fully_associative_cache_is_simulated_in_full(mixed):
+    estimate = estimate_hit_rate(mixed, 64, 32, 'Fully-Associative', 'LRU', rate=0.01)
+    assert estimate['method'] == 'exact'
+    assert estimate['hit_rate'] == _exact_hit_rate(mixed, 64, 32, 'Fully-Associative')
+
+
+@pytest.mark.parametrize('associativity, policy, ways', [('Set-Associative', 'LRU', 8),
+                                                         ('Fully-Associative', 'LRU', 1),
+                                                         ('Fully-Associative', 'FIFO', 1)])
+def test_streamed_chunks_equal_one_array(mixed, associativity, policy, ways):
+    whole = estimate_hit_rate(mixed, 4096, 64, associativity, policy, ways, rate=0.05)
+    chunks = ((mixed[start:start + 100000], None) for start in range(0, len(mixed), 100000))
+    streamed = estimate_hit_rate(chunks, 4096, 64, associativity, policy, ways, rate=0.05)
+    assert streamed['accesses'] == len(mixed)
+    if associativity == 'Set-Associative':
+        # Hot sets are noticed at chunk boundaries, so they may join the sample at other times
+        assert abs(streamed['hit_rate'] - whole['hit_rate']) < 3 * whole['stderr']
+    else:
+        assert streamed['hit_rate'] == whole['hit_rate']
+        assert streamed['sampled_accesses'] == whole['sampled_accesses']
+        assert streamed['stderr'] == pytest.approx(whole['stderr'])
+
+
+def test_small_footprint_is_sampled_whole(rng):
+    addresses = rng.integers(0, 500, 20000) * 16
+    shards = ShardsMRC(16, 0.01, min_blocks=2048)
+    shards.process(addresses)
+    assert shards.rate() == 1.0 and shards.sampled_blocks() == 500
+    exact = StackDistanceAnalyzer(16)
+    exact.process(addresses)
+    sizes, miss_ratios = exact.miss_ratio_curve()
+    sampled_sizes, sampled_ratios, _ = shards.miss_ratio_curve(max_size=400)
+    assert np.allclose(sampled_ratios, np.interp(sampled_sizes, sizes, miss_ratios), atol=0.01)
+
+
+def test_fixed_size_sample_stays_bounded_and_within_its_error(mixed):
+    exact = StackDistanceAnalyzer(64)
+    exact.process(mixed)
+    sizes, miss_ratios = exact.miss_ratio_curve()
+    for seed in range(4):
+        shards = ShardsMRC(64, 0.05, max_blocks=400, seed=seed)
+        for start in range(0, len(mixed), 100000):
+            shards.process(mixed[start:start + 100000])
+        # The footprint needs more than 400 blocks at 5%, so the rate must have come down
+        assert shards.sampled_blocks() <= 400 and shards.rate() < 0.05
+        for cache_size in (1024, 4096, 16384):
+            hit_rate, stderr = shards.get_hit_rate(cache_size)
+            assert abs(1 - hit_rate - np.interp(cache_size, sizes, miss_ratios)) < 3 * stderr
+
+
+def test_mrc_cli_prints_the_exact_curve(capsys):
+    # Three blocks in a loop miss every time in two lines and only on first use in three
+    assert main(['--pattern', '0 1 2 0 1 2', '--block-size', '1', '--sizes', '2,3', '--json']) == 0
+    rows = json.loads(capsys.readouterr().out)
+    assert [(row['cache_size'], row['miss_ratio'], row['stderr']) for row in rows] == [(2, 1.0, 0.0), (3, 0.5, 0.0)]
+
+
+def test_stratified_estimate_of_the_whole_population_is_exact(rng):
+    accesses = rng.integers(1, 1000, 64)
+    hits = rng.integers(0, accesses + 1)
+    rate, stderr = stratified_estimate(hits, accesses, accesses)
+    assert rate == pytest.approx(hits.sum() / accesses.sum())
+    assert stderr == 0
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from cachesim.replacement_policies import REPLACEMENT_POLICIES
+from cachesim.set_partition import simulate_partitioned
+from cachesim.trace_loader import OP_READ, OP_WRITE
+from conftest import make_simulator
+
+RESULT_COUNTERS = ('hits', 'misses', 'writes', 'writebacks', 'write_throughs', 'write_arounds')
+
+
+@pytest.fixture
+def trace(rng):
+    addresses = rng.integers(0, 1 << 12, 20000) * 4
+    ops = np.where(rng.random(len(addresses)) < 0.25, OP_WRITE, OP_READ).astype(np.uint8)
+    return addresses, ops
+
+
+@pytest.mark.parametrize('policy', sorted(REPLACEMENT_POLICIES))
+@pytest.mark.parametrize('associativity, ways', [('Direct', 1), ('Set-Associative', 4)])
+def test_partitioned_equals_serial(trace, policy, associativity, ways):
+    addresses, ops = trace
+    serial = make_simulator(256, 16, associativity, policy, ways, seed=3)
+    serial.run_trace(addresses, ops)
+    result = simulate_partitioned(addresses, 256, 16, associativity, policy, ways, ops=ops, seed=3,
+                                  shards=5, max_workers=1)
+    assert result['shards'] == 5
+    assert {name: result[name] for name in RESULT_COUNTERS} == \
+        {name: getattr(serial, name) for name in RESULT_COUNTERS}
+
+
+def test_partitioned_across_processes(trace):
+    addresses, ops = trace
+    serial = make_simulator(256, 16, 'Set-Associative', 'Random', 4, seed=7)
+    serial.run_trace(addresses, ops)
+    result = simulate_partitioned(addresses, 256, 16, 'Set-Associative', 'Random', 4, ops=ops, seed=7,
+                                  max_workers=2)
+    assert (result['hits'], result['misses'], result['writebacks']) == \
+        (serial.hits, serial.misses, serial.writebacks)
+
+
+def test_fully_associative_runs_as_one_shard(trace):
+    addresses, _ = trace
+    result = simulate_partitioned(addresses[:2000], 64, 16, 'Fully-Associative', 'LRU', max_workers=4)
+    assert result['shards'] == 1
@@ -0,0 +1,34 @@
+import numpy as np
+
+from cachesim.stack_distance import StackDistanceAnalyzer
+from conftest import make_simulator
+
+
+def test_every_size_matches_a_fully_associative_lru_simulation(rng):
+    # Enough accesses over enough blocks that the tree is compacted and grown several times
+    blocks = np.where(rng.random(6000) < 0.7, rng.integers(0, 40, 6000), rng.integers(0, 1500, 6000))
+    addresses = blocks * 16 + rng.integers(0, 16, 6000)
+    analyzer = StackDistanceAnalyzer(16)
+    for start in range(0, len(addresses), 1000):
+        analyzer.process(addresses[start:start + 1000])
+    assert analyzer.total == len(addresses)
+    assert analyzer.cold_misses == len(np.unique(blocks))
+
+    sizes, miss_ratios = analyzer.miss_ratio_curve()
+    assert sizes[-1] == len(np.unique(blocks))
+    for cache_size in (1, 2, 7, 40, 41, 300, 1500):
+        simulator = make_simulator(cache_size, 16, 'Fully-Associative')
+        simulator.run_trace(addresses)
+        assert analyzer.get_hit_rate(cache_size) == simulator.get_hit_rate()
+        if cache_size <= sizes[-1]:
+            assert miss_ratios[cache_size - 1] == 1 - simulator.get_hit_rate()
+
+
+def test_forgotten_block_is_not_counted():
+    analyzer = StackDistanceAnalyzer()
+    analyzer.process([1, 2, 3])
+    analyzer.forget(2)
+    # Only 3 lies between the two accesses to 1 now, and 2 comes back cold
+    analyzer.process([1, 2])
+    assert analyzer.histogram.tolist() == [0, 1]
+    assert analyzer.cold_misses == 4
@@ -0,0 +1,71 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from cachesim.trace_loader import (OP_READ, OP_WRITE, detect_format, iter_trace_records, load_trace_records,
+                                   parse_records)
+from conftest import make_simulator
+
+
+def test_decimal_and_prefixed_hex():
+    addresses, ops = parse_records(['16', '0x20', 'W:0X30', 'r:4'])
+    assert addresses.tolist() == [16, 32, 48, 4]
+    assert ops.tolist() == [OP_READ, OP_READ, OP_WRITE, OP_READ]
+    assert parse_records(['1', '2'])[1] is None
+
+
+def test_bare_hex_needs_base_16():
+    with pytest.raises(ValueError):
+        parse_records(['7fff1a20'])
+    addresses, ops = parse_records(['7fff1a20', '0x10', 'W:ff', '10'], 16)
+    assert addresses.tolist() == [0x7fff1a20, 0x10, 0xff, 0x10]
+    assert ops.tolist() == [OP_READ, OP_READ, OP_WRITE, OP_READ]
+
+
+def test_rejects_unknown_operation():
+    with pytest.raises(ValueError):
+        parse_records(['X:10'])
+
+
+@pytest.mark.parametrize('text, trace_format', [
+    ('# comment\n7fff1a20 7fff1a24\n', 'hex'),
+    ('W:deadbeef\n', 'hex'),
+    ('0x7fff1a20 16\n', 'text'),
+    ('1000 2000\n', 'text'),
+    ('0 7fff1a20\n1 7fff1a24\n', 'din'),
+    ('2 400 4\n0 7fff1a20 4\n1 7fff1a24 4\n', 'din'),
+    ('0 1 2 3 0 1 2 3 0 1\n', 'text'),
+    ('0 7fff1a20\n1 7fff1a24\n0 1 2 3\n', 'text'),
+])
+def test_detect_format(tmp_path, text, trace_format):
+    path = tmp_path / 'trace.txt'
+    path.write_text(text)
+    assert detect_format(path) == trace_format
+
+
+def test_lines_of_small_addresses_are_not_din(tmp_path):
+    path = tmp_path / 'trace.txt'
+    path.write_text('0 1 2 3 0 1 2 3 0 1\n')
+    simulator = make_simulator(4, 1, 'Direct', ways=1)
+    for addresses, ops in iter_trace_records(path):
+        simulator.run_trace(addresses, ops)
+    assert (simulator.hits, simulator.misses) == (6, 4)
+
+
+def test_hex_trace_streams_in_chunks(tmp_path):
+    path = tmp_path / 'trace.txt.gz'
+    addresses = np.arange(0x7fff0000, 0x7fff0000 + 100 * 64, 64)
+    with gzip.open(path, 'wt') as f:
+        f.write('\n'.join(f'{address:x}' for address in addresses))
+    chunks = list(iter_trace_records(path, chunk_size=30))
+    assert [len(chunk) for chunk, _ in chunks] == [30, 30, 30, 10]
+    assert load_trace_records(path)[0].tolist() == addresses.tolist()
+
+
+def test_all_digit_hex_trace_needs_the_format(tmp_path):
+    path = tmp_path / 'trace.txt'
+    path.write_text('1000\n1a00\n')
+    with pytest.raises(ValueError):
+        load_trace_records(path)
+    assert load_trace_records(path, 'hex')[0].tolist() == [0x1000, 0x1a00]
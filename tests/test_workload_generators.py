@@ -0,0 +1,63 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from cachesim.workload_generators import WORKLOADS, generate, main
+from cachesim.trace_loader import load_trace
+
+
+def collect(chunks):
+    return np.concatenate(list(chunks))
+
+
+@pytest.mark.parametrize('name', sorted(WORKLOADS))
+def test_same_seed_gives_the_same_trace_whatever_the_chunk_size(name):
+    trace = collect(generate(name, 5000, seed=3))
+    assert len(trace) == 5000 and trace.dtype == np.int64
+    assert np.array_equal(trace, collect(generate(name, 5000, seed=3, chunk_size=777)))
+    assert np.array_equal(trace[:1000], collect(generate(name, 1000, seed=3, chunk_size=64)))
+
+
+@pytest.mark.parametrize('name', ['Zipf Hot Set', 'Pointer Chase', 'Mixed'])
+def test_seed_changes_random_workloads(name):
+    assert not np.array_equal(collect(generate(name, 2000, seed=1)), collect(generate(name, 2000, seed=2)))
+
+
+def test_endless_when_count_is_none():
+    chunks = generate('Loop', None, chunk_size=100, working_set=64, stride=4)
+    trace = collect(itertools.islice(chunks, 50))
+    assert len(trace) == 5000
+    assert np.array_equal(trace, np.tile(np.arange(0, 64, 4), 5000 // 16 + 1)[:5000])
+
+
+def test_pointer_chase_visits_every_node_once_per_lap():
+    trace = collect(generate('Pointer Chase', 3 * 256, nodes=256, node_size=64))
+    laps = trace.reshape(3, 256)
+    assert sorted(laps[0].tolist()) == list(range(0, 256 * 64, 64))
+    assert (laps == laps[0]).all()
+
+
+def test_matrix_multiply_touches_each_operand_once_per_element():
+    n = 8
+    trace = collect(generate('Matrix Multiply', 3 * n ** 3, n=n, tile=4, element_size=8))
+    operands, offsets = np.divmod(trace, n * n * 8)
+    for operand in range(3):
+        _, counts = np.unique(offsets[operands == operand], return_counts=True)
+        assert len(counts) == n * n and (counts == n).all()
+
+
+def test_rejects_unknown_workloads_and_bad_parameters():
+    with pytest.raises(ValueError):
+        generate('Random Walk', 10)
+    with pytest.raises(ValueError):
+        generate('Sequential', -1)
+    with pytest.raises(ValueError):
+        generate('Matrix Multiply', 10, n=10, tile=4)
+
+
+@pytest.mark.parametrize('suffix', ['.txt', '.ctr'])
+def test_cli_writes_a_loadable_trace(tmp_path, suffix):
+    path = tmp_path / f'trace{suffix}'
+    main(['Zipf Hot Set', str(path), '--count', '1e3', '--seed', '4'])
+    assert np.array_equal(load_trace(str(path)), collect(generate('Zipf Hot Set', 1000, seed=4)))